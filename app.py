@@ -1,12 +1,39 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import sqlite3
-import pandas as pd
-import plotly.express as px
-import altair as alt
-from PIL import Image
 from datetime import datetime
 import os
+import re
 import base64
+import io
+import json
+import hashlib
+import hmac
+import secrets
+import mimetypes
+import tempfile
+import atexit
+import time
+import functools
+import contextlib
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
+from collections import namedtuple
+from lazy_modules import lazy_import
+import auth
+import reporting
+import storage
+import shared_cache
+import write_behind
+
+logger = logging.getLogger(__name__)
+
+# Heavy modules load on the first page that uses them; the login page needs none of them
+pd = lazy_import("pandas")
+px = lazy_import("plotly.express")
+portfolio_io = lazy_import("portfolio_io")
+excel_import = lazy_import("excel_import")
 
 # ---------- Custom UI Styling ----------
 def set_professional_theme():
@@ -839,16 +866,53 @@ def set_professional_theme():
     </style>
     """
 
-# ---------- 1) Thread-safe SQLite connection ----------
+# ---------- 1) Thread-safe database connection ----------
+# SQLite by default; set DATABASE_URL=postgresql://... to run against a server database
+POSTGRES_SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schema_postgres.sql")
+
+@st.cache_resource
+def get_storage_backend():
+    return storage.backend_from_url()
+
 @st.cache_resource
 def get_db_connection():
-    conn = sqlite3.connect('industry_4_0_app.db', check_same_thread=False)
-    return conn
+    return get_storage_backend().connect()
 
+DB_BACKEND = get_storage_backend()
+DB_DIALECT = DB_BACKEND.dialect
 conn = get_db_connection()
 c = conn.cursor()
 
+# Lightweight row types; select_rows() fetches exactly these columns, so listings that
+# only need a name never materialize action plans, comments or password hashes
+UserRef = namedtuple("UserRef", "user_id username role department")
+Credentials = namedtuple("Credentials", "user_id username password role tenant_id")
+TenantRef = namedtuple("TenantRef", "tenant_id tenant_name")
+DepartmentRef = namedtuple("DepartmentRef", "department_id department_name")
+ProjectRef = namedtuple("ProjectRef", "project_id project_name")
+ProjectRecord = namedtuple("ProjectRecord", reporting.PROJECT_FIELDS)
+VersionedProject = namedtuple("VersionedProject", reporting.PROJECT_FIELDS + ["row_version"])
+
+def select_rows(row_type, table, clause="", params=(), connection=None):
+    """SELECT <row_type's fields> FROM table <clause>, each row wrapped in row_type."""
+    cursor = connection.cursor() if connection is not None else c
+    cursor.execute(f"SELECT {', '.join(row_type._fields)} FROM {table} {clause}", params)
+    return [row_type._make(row) for row in cursor.fetchall()]
+
+def query_frame(sql, params=(), connection=None):
+    """Runs a query on `connection` (default: the shared connection) and returns the rows as a DataFrame."""
+    cursor = (connection or conn).cursor()
+    cursor.execute(sql, params)
+    return pd.DataFrame(cursor.fetchall(), columns=[d[0] for d in cursor.description])
+
 # ---------- 2) Session State Management ----------
+# Every organization or plant is a tenant; users, departments, projects and training sessions carry
+# its tenant_id. Rows from before tenants existed belong to the default tenant, the group itself,
+# whose admins can switch between tenants.
+DEFAULT_TENANT_ID = 1
+DEFAULT_TENANT_NAME = "Jay Jay Group"
+TENANT_TABLES = ["users", "departments", "projects", "training_sessions"]
+
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
 if "user_id" not in st.session_state:
@@ -857,25 +921,58 @@ if "role" not in st.session_state:
     st.session_state.role = ""
 if "page" not in st.session_state:
     st.session_state.page = "login"
+if "auth_token" not in st.session_state:
+    st.session_state.auth_token = None
+if "tenant_id" not in st.session_state:
+    st.session_state.tenant_id = DEFAULT_TENANT_ID
+
+def current_tenant_id():
+    """The tenant this session reads and writes: the one a group admin switched to, else the user's own."""
+    return st.session_state.get("active_tenant_id") or st.session_state.tenant_id
 
 # ---------- 3) Create necessary tables ----------
+# Runs once per process; Streamlit re-executes this script on every rerun
+@st.cache_resource
 def create_tables():
+    if DB_DIALECT == "postgresql":
+        # Server databases start from the current schema; the migrations below are SQLite history
+        DB_BACKEND.create_schema(POSTGRES_SCHEMA_PATH)
+        return
+
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS tenants (
+            tenant_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tenant_name TEXT NOT NULL UNIQUE,
+            created_at TEXT
+        )
+    ''')
+    c.execute("INSERT INTO tenants (tenant_id, tenant_name, created_at) VALUES (?, ?, ?) ON CONFLICT DO NOTHING",
+              (DEFAULT_TENANT_ID, DEFAULT_TENANT_NAME, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+
     c.execute('''
         CREATE TABLE IF NOT EXISTS users (
             user_id INTEGER PRIMARY KEY AUTOINCREMENT, 
             username TEXT, 
             password TEXT, 
             role TEXT,
-            department TEXT
+            department TEXT,
+            tenant_id INTEGER NOT NULL DEFAULT 1 REFERENCES tenants(tenant_id)
         )
     ''')
     
     c.execute('''
         CREATE TABLE IF NOT EXISTS departments (
             department_id INTEGER PRIMARY KEY AUTOINCREMENT, 
-            department_name TEXT
+            department_name TEXT,
+            tenant_id INTEGER NOT NULL DEFAULT 1 REFERENCES tenants(tenant_id)
         )
     ''')
+    # Unique usernames back the login lookup; fall back to a plain index if legacy duplicates exist
+    try:
+        c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_users_username_unique ON users(username)")
+        c.execute("DROP INDEX IF EXISTS idx_users_username")
+    except sqlite3.IntegrityError:
+        c.execute("CREATE INDEX IF NOT EXISTS idx_users_username ON users(username)")
     
     c.execute('''
         CREATE TABLE IF NOT EXISTS projects (
@@ -896,7 +993,9 @@ def create_tables():
             task_completion_rate REAL, 
             jjm_comments TEXT,
             target_remark TEXT,
-            manager TEXT
+            manager TEXT,
+            row_version INTEGER NOT NULL DEFAULT 1,
+            tenant_id INTEGER NOT NULL DEFAULT 1 REFERENCES tenants(tenant_id)
         )
     ''')
     
@@ -906,6 +1005,120 @@ def create_tables():
     existing_cols = [col[1] for col in columns_info]
     if "manager" not in existing_cols:
         c.execute("ALTER TABLE projects ADD COLUMN manager TEXT;")
+    if "row_version" not in existing_cols:
+        c.execute("ALTER TABLE projects ADD COLUMN row_version INTEGER NOT NULL DEFAULT 1")
+    # Every write path (forms, grid, bulk, imports) advances the version, so compare-and-swap sees it
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_projects_row_version AFTER UPDATE ON projects
+        WHEN new.row_version = old.row_version
+        BEGIN
+            UPDATE projects SET row_version = old.row_version + 1 WHERE project_id = new.project_id;
+        END
+    ''')
+
+    # Full-text index over the projects' free-text fields (external content: stores only the index)
+    c.execute("SELECT 1 FROM sqlite_master WHERE name = 'projects_fts'")
+    fts_exists = c.fetchone() is not None
+    try:
+        c.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts USING fts5(
+                project_name, jjm_action_plan, jjm_comments, target_remark,
+                content='projects', content_rowid='project_id', tokenize='unicode61 remove_diacritics 2'
+            )
+        ''')
+    except sqlite3.OperationalError:
+        pass  # SQLite built without FTS5; search_projects falls back to LIKE
+    else:
+        c.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_projects_fts_ai AFTER INSERT ON projects BEGIN
+                INSERT INTO projects_fts(rowid, project_name, jjm_action_plan, jjm_comments, target_remark)
+                VALUES (new.project_id, new.project_name, new.jjm_action_plan, new.jjm_comments, new.target_remark);
+            END
+        ''')
+        c.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_projects_fts_au
+            AFTER UPDATE OF project_name, jjm_action_plan, jjm_comments, target_remark ON projects BEGIN
+                INSERT INTO projects_fts(projects_fts, rowid, project_name, jjm_action_plan, jjm_comments, target_remark)
+                VALUES ('delete', old.project_id, old.project_name, old.jjm_action_plan, old.jjm_comments, old.target_remark);
+                INSERT INTO projects_fts(rowid, project_name, jjm_action_plan, jjm_comments, target_remark)
+                VALUES (new.project_id, new.project_name, new.jjm_action_plan, new.jjm_comments, new.target_remark);
+            END
+        ''')
+        c.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_projects_fts_ad AFTER DELETE ON projects BEGIN
+                INSERT INTO projects_fts(projects_fts, rowid, project_name, jjm_action_plan, jjm_comments, target_remark)
+                VALUES ('delete', old.project_id, old.project_name, old.jjm_action_plan, old.jjm_comments, old.target_remark);
+            END
+        ''')
+        if not fts_exists:
+            # Index the projects that predate the FTS table
+            c.execute("INSERT INTO projects_fts(projects_fts) VALUES ('rebuild')")
+
+    # Archive tier: completed projects of long-ended periods, moved out of the live table with their IDs
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS projects_archive (
+            project_id INTEGER PRIMARY KEY,
+            project_name TEXT,
+            year TEXT,
+            jjm_strategic_pillars TEXT,
+            target_main_category TEXT,
+            target_sub_category TEXT,
+            target_16_dimensions TEXT,
+            jjm_action_plan TEXT,
+            start_date TEXT,
+            end_date TEXT,
+            roadmap_captain TEXT,
+            project_leaders TEXT,
+            project_owners TEXT,
+            task_status TEXT,
+            task_completion_rate REAL,
+            jjm_comments TEXT,
+            target_remark TEXT,
+            manager TEXT,
+            row_version INTEGER NOT NULL DEFAULT 1,
+            tenant_id INTEGER NOT NULL DEFAULT 1 REFERENCES tenants(tenant_id),
+            archived_at TEXT
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_projects_archive_tenant_year ON projects_archive(tenant_id, year)")
+    # Dimension scores travel with their project, so neither table points at a row that moved away
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS dimensions_archive (
+            dimension_id INTEGER PRIMARY KEY,
+            project_id INTEGER REFERENCES projects_archive(project_id),
+            dimension_name TEXT,
+            dimension_score INTEGER,
+            timestamp TEXT
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_dimensions_archive_project ON dimensions_archive(project_id)")
+
+    # One row per imported Excel sheet, for provenance of bulk imports
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS import_sheets (
+            import_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            workbook TEXT,
+            sheet TEXT,
+            rows_read INTEGER,
+            rows_inserted INTEGER,
+            rows_updated INTEGER,
+            rows_skipped INTEGER,
+            error TEXT,
+            imported_at TEXT
+        )
+    ''')
+
+    # Excel column-mapping profiles keyed by a fingerprint of the sheet's header row
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS excel_mapping_profiles (
+            fingerprint TEXT PRIMARY KEY,
+            name TEXT,
+            headers TEXT,
+            mapping TEXT,
+            created_at TEXT,
+            last_used_at TEXT
+        )
+    ''')
     
     c.execute('''
         CREATE TABLE IF NOT EXISTS dimensions (
@@ -924,43 +1137,692 @@ def create_tables():
             title TEXT, 
             description TEXT, 
             schedule TEXT, 
-            material_path TEXT
+            material_path TEXT,
+            tenant_id INTEGER NOT NULL DEFAULT 1 REFERENCES tenants(tenant_id)
         )
     ''')
     
+    # If "material_sha256" column was missing in older DB, add it
+    c.execute("PRAGMA table_info(training_sessions)")
+    if "material_sha256" not in [col[1] for col in c.fetchall()]:
+        c.execute("ALTER TABLE training_sessions ADD COLUMN material_sha256 TEXT;")
+
+    # Tables from before tenants existed get the key, every existing row landing in the default tenant
+    for table in TENANT_TABLES:
+        c.execute(f"PRAGMA table_info({table})")
+        if "tenant_id" not in [col[1] for col in c.fetchall()]:
+            c.execute(f"ALTER TABLE {table} ADD COLUMN tenant_id INTEGER NOT NULL DEFAULT {DEFAULT_TENANT_ID}")
+
+    # Every lookup is scoped to one tenant, so indexes lead with tenant_id: a tenant's queries
+    # walk only its own slice of each index, however large the other tenants are
+    for index in ["idx_projects_name", "idx_projects_name_nocase", "idx_departments_name",
+                  "idx_training_sessions_schedule"]:
+        c.execute(f"DROP INDEX IF EXISTS {index}")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_projects_tenant ON projects(tenant_id, project_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_projects_tenant_name ON projects(tenant_id, project_name)")
+    # Case-insensitive prefix lookups (LIKE 'abc%') for the project picker
+    c.execute("CREATE INDEX IF NOT EXISTS idx_projects_tenant_name_nocase "
+              "ON projects(tenant_id, project_name COLLATE NOCASE)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_projects_tenant_status ON projects(tenant_id, task_status)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_users_tenant_role ON users(tenant_id, role, username)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_departments_tenant_name ON departments(tenant_id, department_name)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_training_sessions_tenant_schedule "
+              "ON training_sessions(tenant_id, schedule)")
+
+    # Content-addressed training material blobs, one row per distinct file content
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS training_materials (
+            sha256 TEXT PRIMARY KEY,
+            file_name TEXT,
+            content_type TEXT,
+            size_bytes INTEGER,
+            stored_path TEXT,
+            created_at TEXT
+        )
+    ''')
+
     c.execute('''
         CREATE TABLE IF NOT EXISTS user_progress (
-            user_id INTEGER, 
-            session_id INTEGER,
-            status TEXT,
+            user_id INTEGER NOT NULL,
+            session_id INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'Not Started',
+            updated_at TEXT,
+            PRIMARY KEY (user_id, session_id),
             FOREIGN KEY(session_id) REFERENCES training_sessions(session_id)
+        ) WITHOUT ROWID
+    ''')
+
+    # Older DBs created user_progress without a key; rebuild it keyed on (user_id, session_id)
+    c.execute("PRAGMA table_info(user_progress)")
+    if not any(col[5] for col in c.fetchall()):
+        c.execute("ALTER TABLE user_progress RENAME TO user_progress_old")
+        c.execute('''
+            CREATE TABLE user_progress (
+                user_id INTEGER NOT NULL,
+                session_id INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'Not Started',
+                updated_at TEXT,
+                PRIMARY KEY (user_id, session_id),
+                FOREIGN KEY(session_id) REFERENCES training_sessions(session_id)
+            ) WITHOUT ROWID
+        ''')
+        c.execute('''
+            INSERT OR REPLACE INTO user_progress (user_id, session_id, status)
+            SELECT user_id, session_id, COALESCE(status, 'Not Started') FROM user_progress_old
+            WHERE user_id IS NOT NULL AND session_id IS NOT NULL
+        ''')
+        c.execute("DROP TABLE user_progress_old")
+
+    c.execute("CREATE INDEX IF NOT EXISTS idx_user_progress_session ON user_progress(session_id, status)")
+
+    # Per-user completion figures, kept current by triggers so dashboards never aggregate on read
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS user_training_summary (
+            user_id INTEGER PRIMARY KEY,
+            enrolled_sessions INTEGER NOT NULL DEFAULT 0,
+            in_progress_sessions INTEGER NOT NULL DEFAULT 0,
+            completed_sessions INTEGER NOT NULL DEFAULT 0,
+            completion_pct REAL NOT NULL DEFAULT 0
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_user_training_summary_pct ON user_training_summary(completion_pct)")
+
+    # Upsert rather than OR REPLACE: the outer statement's conflict policy would override it
+    refresh_summary = '''
+        INSERT INTO user_training_summary (
+            user_id, enrolled_sessions, in_progress_sessions, completed_sessions, completion_pct
         )
+        SELECT {uid}, COUNT(*),
+               COALESCE(SUM(status = 'In Progress'), 0),
+               COALESCE(SUM(status = 'Completed'), 0),
+               COALESCE(ROUND(100.0 * SUM(status = 'Completed') / COUNT(*), 1), 0)
+        FROM user_progress WHERE user_id = {uid}
+        ON CONFLICT(user_id) DO UPDATE SET
+            enrolled_sessions = excluded.enrolled_sessions,
+            in_progress_sessions = excluded.in_progress_sessions,
+            completed_sessions = excluded.completed_sessions,
+            completion_pct = excluded.completion_pct;
+    '''
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_user_progress_ai AFTER INSERT ON user_progress
+        BEGIN {refresh_summary.format(uid="NEW.user_id")} END
     ''')
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_user_progress_au AFTER UPDATE ON user_progress
+        BEGIN
+            {refresh_summary.format(uid="OLD.user_id")}
+            {refresh_summary.format(uid="NEW.user_id")}
+        END
+    ''')
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_user_progress_ad AFTER DELETE ON user_progress
+        BEGIN {refresh_summary.format(uid="OLD.user_id")} END
+    ''')
+
+    # Backfill the summary for progress rows recorded before it existed
+    c.execute("SELECT COUNT(*) FROM user_training_summary")
+    if c.fetchone()[0] == 0:
+        c.execute('''
+            INSERT INTO user_training_summary (
+                user_id, enrolled_sessions, in_progress_sessions, completed_sessions, completion_pct
+            )
+            SELECT user_id, COUNT(*),
+                   SUM(status = 'In Progress'),
+                   SUM(status = 'Completed'),
+                   ROUND(100.0 * SUM(status = 'Completed') / COUNT(*), 1)
+            FROM user_progress GROUP BY user_id
+        ''')
+
+    # Training uptake per (session, department, role), adjusted incrementally by triggers
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS training_cohort_stats (
+            session_id INTEGER NOT NULL,
+            department TEXT NOT NULL,
+            role TEXT NOT NULL,
+            enrolled INTEGER NOT NULL DEFAULT 0,
+            in_progress INTEGER NOT NULL DEFAULT 0,
+            completed INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (session_id, department, role)
+        ) WITHOUT ROWID
+    ''')
+
+    apply_cohort_delta = '''
+        INSERT INTO training_cohort_stats (session_id, department, role, enrolled, in_progress, completed)
+        SELECT {row}.session_id,
+               COALESCE(u.department, 'Unassigned'),
+               COALESCE(u.role, 'Unassigned'),
+               {sign} 1,
+               {sign} ({row}.status = 'In Progress'),
+               {sign} ({row}.status = 'Completed')
+        FROM (SELECT 1) LEFT JOIN users u ON u.user_id = {row}.user_id
+        WHERE true
+        ON CONFLICT(session_id, department, role) DO UPDATE SET
+            enrolled = enrolled + excluded.enrolled,
+            in_progress = in_progress + excluded.in_progress,
+            completed = completed + excluded.completed;
+    '''
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_user_progress_cohort_ai AFTER INSERT ON user_progress
+        BEGIN {apply_cohort_delta.format(row="NEW", sign="+")} END
+    ''')
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_user_progress_cohort_au AFTER UPDATE ON user_progress
+        BEGIN
+            {apply_cohort_delta.format(row="OLD", sign="-")}
+            {apply_cohort_delta.format(row="NEW", sign="+")}
+        END
+    ''')
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_user_progress_cohort_ad AFTER DELETE ON user_progress
+        BEGIN {apply_cohort_delta.format(row="OLD", sign="-")} END
+    ''')
+
+    # A user's department or role change moves their progress rows to the new cohort bucket
+    move_user_cohort = '''
+        INSERT INTO training_cohort_stats (session_id, department, role, enrolled, in_progress, completed)
+        SELECT p.session_id,
+               COALESCE({row}.department, 'Unassigned'),
+               COALESCE({row}.role, 'Unassigned'),
+               {sign} COUNT(*),
+               {sign} SUM(p.status = 'In Progress'),
+               {sign} SUM(p.status = 'Completed')
+        FROM user_progress p
+        WHERE p.user_id = {row}.user_id
+        GROUP BY p.session_id
+        ON CONFLICT(session_id, department, role) DO UPDATE SET
+            enrolled = enrolled + excluded.enrolled,
+            in_progress = in_progress + excluded.in_progress,
+            completed = completed + excluded.completed;
+    '''
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_users_cohort_au AFTER UPDATE OF department, role ON users
+        WHEN OLD.department IS NOT NEW.department OR OLD.role IS NOT NEW.role
+        BEGIN
+            {move_user_cohort.format(row="OLD", sign="-")}
+            {move_user_cohort.format(row="NEW", sign="+")}
+        END
+    ''')
+
+    c.execute("SELECT COUNT(*) FROM training_cohort_stats")
+    if c.fetchone()[0] == 0:
+        rebuild_training_cohort_stats()
+
+    # Issued login sessions; only a hash of each token is stored
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS session_tokens (
+            token_hash TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            role TEXT,
+            created_at TEXT,
+            expires_at TEXT NOT NULL
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_session_tokens_user ON session_tokens(user_id)")
+    # One-time codes the browser swaps for the HttpOnly session cookie (see auth.py)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS session_handoffs (
+            code_hash TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            expires_at TEXT NOT NULL
+        )
+    ''')
+
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS app_settings (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+
+    # Monotonic per-scope, per-tenant counters; cached loaders take the version as a cache key
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS data_versions (
+            scope TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+    # Telemetry tables, written only through the write-behind queue
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS audit_log (
+            audit_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            logged_at TEXT,
+            user_id INTEGER,
+            action TEXT,
+            detail TEXT
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_audit_log_logged_at ON audit_log(logged_at)")
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS view_counters (
+            view TEXT NOT NULL,
+            day TEXT NOT NULL,
+            views INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (view, day)
+        ) WITHOUT ROWID
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS timing_spans (
+            span_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            started_at TEXT,
+            duration_ms REAL,
+            user_id INTEGER
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_timing_spans_name ON timing_spans(name, started_at)")
     conn.commit()
 
+def rebuild_training_cohort_stats():
+    """Recomputes training_cohort_stats from scratch with one grouped join over user_progress and users."""
+    c.execute("DELETE FROM training_cohort_stats")
+    c.execute('''
+        INSERT INTO training_cohort_stats (session_id, department, role, enrolled, in_progress, completed)
+        SELECT p.session_id,
+               COALESCE(u.department, 'Unassigned'),
+               COALESCE(u.role, 'Unassigned'),
+               COUNT(*),
+               SUM(p.status = 'In Progress'),
+               SUM(p.status = 'Completed')
+        FROM user_progress p
+        LEFT JOIN users u ON u.user_id = p.user_id
+        GROUP BY 1, 2, 3
+    ''')
+
+def get_data_version(scope, tenant_id=None, connection=None):
+    """Version of a scope's data in one tenant (default: the session's tenant), as seen by `connection`."""
+    row = (connection or conn).execute(
+        'SELECT version FROM data_versions WHERE scope = ?', (f"{scope}@{tenant_id or current_tenant_id()}",)
+    ).fetchone()
+    return row[0] if row else 0
+
+def bump_data_version(scope, tenant_id=None, connection=None):
+    """
+    Invalidates cached reads for a scope in one tenant (default: the session's tenant), leaving
+    other tenants' caches warm; call inside the writing transaction (on `connection`), before commit.
+    """
+    (connection or conn).execute('''
+        INSERT INTO data_versions (scope, version) VALUES (?, 1)
+        ON CONFLICT(scope) DO UPDATE SET version = data_versions.version + 1
+    ''', (f"{scope}@{tenant_id or current_tenant_id()}",))
+
+@contextlib.contextmanager
+def own_transaction():
+    """
+    A private connection for one transaction, committed on success and rolled back on error. Compare-and-swap
+    writes run on it so their rowcount and rollback cannot be mixed up with another session's on the shared one.
+    """
+    tx = DB_BACKEND.connect()
+    try:
+        yield tx
+        tx.commit()
+    except BaseException:
+        tx.rollback()
+        raise
+    finally:
+        tx.close()
+
 create_tables()
 
+# ---------- 3b) Write-behind telemetry ----------
+# Audit rows, view counters and timing spans are queued and group-committed on a background
+# thread with its own connection, so a rerun only waits for its primary write
+@st.cache_resource
+def get_write_behind():
+    queue = write_behind.WriteBehindQueue(DB_BACKEND.connect)
+    atexit.register(queue.close)
+    return queue
+
+def audit(action, detail="", user_id=None):
+    """Queues an audit_log row; user_id defaults to the logged-in user."""
+    get_write_behind().put(
+        'INSERT INTO audit_log (logged_at, user_id, action, detail) VALUES (?, ?, ?, ?)',
+        (datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+         user_id if user_id is not None else st.session_state.get("user_id"), action, str(detail))
+    )
+
+def count_view(view):
+    """Counts a view when the session navigates to it, not on every rerun while it stays open."""
+    if st.session_state.get("last_view") == view:
+        return
+    st.session_state.last_view = view
+    get_write_behind().put('''
+        INSERT INTO view_counters (view, day, views) VALUES (?, ?, 1)
+        ON CONFLICT(view, day) DO UPDATE SET views = view_counters.views + 1
+    ''', (view, datetime.now().strftime("%Y-%m-%d")))
+
+def timed_span(func):
+    """Records each call's wall time as a timing_spans row named after the function."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            get_write_behind().put(
+                'INSERT INTO timing_spans (name, started_at, duration_ms, user_id) VALUES (?, ?, ?, ?)',
+                (func.__name__, started_at, round((time.perf_counter() - started) * 1000, 3),
+                 st.session_state.get("user_id"))
+            )
+    return wrapper
+
+# ---------- 3c) Read snapshot ----------
+# Dashboards and reports read a copy of the SQLite file refreshed in the background, so their
+# scans never compete with writers for the primary. SNAPSHOT_MAX_AGE_SECONDS bounds how stale
+# the copy may be (0 reads the primary directly); Postgres always reads the primary.
+SNAPSHOT_MAX_AGE_SECONDS = int(os.environ.get("SNAPSHOT_MAX_AGE_SECONDS", "60"))
+SNAPSHOT_PATH = os.environ.get("SNAPSHOT_PATH")
+
+@st.cache_resource
+def get_read_snapshot():
+    if DB_DIALECT != "sqlite" or SNAPSHOT_MAX_AGE_SECONDS <= 0:
+        return None
+    path = SNAPSHOT_PATH or os.path.join(".cache", "snapshots", os.path.basename(DB_BACKEND.path))
+    return storage.ReadSnapshot(DB_BACKEND, path, SNAPSHOT_MAX_AGE_SECONDS)
+
+@contextlib.contextmanager
+def analytics_connection(scope=None, data_version=None, tenant_id=None):
+    """
+    Connection for dashboard and report reads: a lease on the snapshot, else the primary. Cached loaders
+    pass the data version they are keyed on, and a snapshot that predates it is refreshed first, so a
+    cache entry is never filled with rows older than its key. If the refreshed copy is still behind
+    (the version was read inside another session's open transaction) or cannot be taken, the read
+    goes to the primary. The snapshot generation stays open until the block exits.
+    """
+    snapshot = get_read_snapshot()
+    if snapshot is None:
+        yield conn
+        return
+    with contextlib.ExitStack() as leases:
+        try:
+            snapshot_conn = leases.enter_context(snapshot.lease())
+            if scope is not None and get_data_version(scope, tenant_id, snapshot_conn) < data_version:
+                leases.close()
+                snapshot_conn = leases.enter_context(snapshot.lease(max_age_seconds=0))
+                if get_data_version(scope, tenant_id, snapshot_conn) < data_version:
+                    snapshot_conn = conn
+        except (OSError, sqlite3.Error):
+            logger.exception("read snapshot unavailable; reading the primary")
+            snapshot_conn = conn
+        yield snapshot_conn
+
+def data_as_of():
+    """When the data behind dashboards and reports was last known to match the primary."""
+    snapshot = get_read_snapshot()
+    as_of = datetime.fromtimestamp(snapshot.as_of) if snapshot is not None and snapshot.as_of else datetime.now()
+    return as_of.strftime("%Y-%m-%d %H:%M:%S")
+
 # ---------- 4) User Authentication Functions ----------
-def login_user(username, password):
-    c.execute('SELECT * FROM users WHERE username =? AND password = ?', (username, password))
-    return c.fetchone()
+# PBKDF2 cost and session lifetime are configurable through the environment
+PASSWORD_HASH_ITERATIONS = int(os.environ.get("PASSWORD_HASH_ITERATIONS", "600000"))
+SESSION_TOKEN_TTL_HOURS = auth.SESSION_TOKEN_TTL_HOURS
+# The session token lives in session state and in an HttpOnly cookie (see auth.py), so a reload or a
+# reconnect to another replica resumes the login; run through server.py so the cookie route exists
+PASSWORD_HASH_PREFIX = "pbkdf2_sha256"
+
+@st.cache_resource
+def get_auth_executor():
+    # PBKDF2 releases the GIL, so bulk hashing (user imports, legacy migration) runs in parallel here.
+    # Single logins and sign-ups hash on the session thread: waiting on a pool would not free it anyway
+    return ThreadPoolExecutor(max_workers=os.cpu_count() or 2, thread_name_prefix="auth")
+
+def hash_password(password, iterations=None):
+    iterations = iterations or PASSWORD_HASH_ITERATIONS
+    salt = secrets.token_bytes(16)
+    derived = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return "$".join([
+        PASSWORD_HASH_PREFIX, str(iterations),
+        base64.b64encode(salt).decode(), base64.b64encode(derived).decode()
+    ])
+
+def verify_password(password, stored):
+    try:
+        prefix, iterations, salt, expected = stored.split("$")
+    except (AttributeError, ValueError):
+        return False
+    if prefix != PASSWORD_HASH_PREFIX:
+        return False
+    derived = hashlib.pbkdf2_hmac("sha256", password.encode(), base64.b64decode(salt), int(iterations))
+    return hmac.compare_digest(derived, base64.b64decode(expected))
+
+@st.cache_resource
+def upgrade_legacy_passwords():
+    """Hashes any passwords still stored in plain text (from before hashing existed)."""
+    c.execute("SELECT user_id, password FROM users WHERE password NOT LIKE ?", (PASSWORD_HASH_PREFIX + "$%",))
+    legacy = [row for row in c.fetchall() if row[1] is not None]
+    if legacy:
+        hashes = get_auth_executor().map(hash_password, [row[1] for row in legacy])
+        c.executemany('UPDATE users SET password = ? WHERE user_id = ?',
+                      [(h, row[0]) for h, row in zip(hashes, legacy)])
+        conn.commit()
 
-def add_user(username, password, role, department):
-    c.execute('INSERT INTO users (username, password, role, department) VALUES (?, ?, ?, ?)',
-              (username, password, role, department))
+def login_user(username, password):
+    """Returns the user's Credentials if the password matches, else None."""
+    rows = select_rows(Credentials, "users", "WHERE username = ?", (username,))
+    if not rows:
+        audit("login_failed", username)
+        return None
+    user = rows[0]
+    if not verify_password(password, user.password):
+        audit("login_failed", username, user_id=user.user_id)
+        return None
+    audit("login", username, user_id=user.user_id)
+    # Re-hash on login when the configured cost has been raised since this hash was made
+    if int(user.password.split("$")[1]) < PASSWORD_HASH_ITERATIONS:
+        c.execute('UPDATE users SET password = ? WHERE user_id = ?', (hash_password(password), user.user_id))
+        conn.commit()
+    return user
+
+def add_user(username, password, role, department, tenant_id=None):
+    """Adds a user to `tenant_id` (default: the session's tenant). Usernames are unique across tenants."""
+    c.execute('INSERT INTO users (username, password, role, department, tenant_id) VALUES (?, ?, ?, ?, ?)',
+              (username, hash_password(password), role, department,
+               tenant_id or current_tenant_id()))
     conn.commit()
+    audit("add_user", f"{username} ({role})")
+
+@st.cache_resource
+def get_session_secret():
+    return auth.session_secret(conn)
+
+def issue_session_token(user_id, role):
+    return auth.issue_session_token(conn, get_session_secret(), user_id, role)
+
+def validate_session_token(token):
+    """Returns (user_id, role, tenant_id) for a live, correctly signed token, else None; role is read from users."""
+    return auth.validate_session_token(conn, get_session_secret(), token)
+
+def revoke_session_token(token):
+    auth.revoke_session_token(conn, token)
+
+def session_cookie_token():
+    """The session token from the browser's HttpOnly cookie, if any."""
+    try:
+        token = st.context.cookies.get(auth.SESSION_COOKIE)
+    except Exception:
+        token = None
+    # Anything but a string means no browser is behind this run (bare mode, tests)
+    return token if isinstance(token, str) else None
+
+def start_session(user_id, role, tenant_id, token):
+    st.session_state.auth_token = token
+    st.session_state.logged_in = True
+    st.session_state.user_id = user_id
+    st.session_state.role = role
+    st.session_state.tenant_id = tenant_id
+    st.session_state.pop("active_tenant_id", None)
+
+def _session_route_call(method, body=None):
+    # Component iframes share the app's origin, so this request carries and receives its cookies
+    options = {"method": method, "credentials": "same-origin"}
+    if body is not None:
+        options.update(headers={"Content-Type": "application/json"}, body=json.dumps(body))
+    components.html(f"<script>fetch({json.dumps(auth.SESSION_ROUTE)}, {json.dumps(options)});</script>", height=0)
+
+def set_session_cookie():
+    """Has the browser swap this login's one-time handoff code for the HttpOnly session cookie."""
+    code = st.session_state.pop("session_handoff", None)
+    if code:
+        _session_route_call("POST", {"code": code})
+
+def clear_session_cookie():
+    """Has the browser revoke and drop its session cookie, which this session may never have seen."""
+    revoke_session_token(session_cookie_token())
+    _session_route_call("DELETE")
 
 def get_all_users():
-    c.execute('SELECT * FROM users')
+    return select_rows(UserRef, "users", "WHERE tenant_id = ?", (current_tenant_id(),))
+
+def get_users_by_role(role):
+    return select_rows(UserRef, "users", "WHERE tenant_id = ? AND role = ? ORDER BY username",
+                       (current_tenant_id(), role))
+
+def get_all_departments(tenant_id=None):
+    return select_rows(DepartmentRef, "departments", "WHERE tenant_id = ?", (tenant_id or current_tenant_id(),))
+
+def add_department(department_name):
+    c.execute('INSERT INTO departments (department_name, tenant_id) VALUES (?, ?)',
+              (department_name, current_tenant_id()))
+    conn.commit()
+
+def count_users():
+    c.execute('SELECT COUNT(*) FROM users WHERE tenant_id = ?', (current_tenant_id(),))
+    return c.fetchone()[0]
+
+def get_users_page(limit, offset):
+    # Never select the password column for listings
+    c.execute('SELECT user_id, username, role, department FROM users WHERE tenant_id = ? '
+              'ORDER BY user_id LIMIT ? OFFSET ?', (current_tenant_id(), limit, offset))
     return c.fetchall()
 
-def get_all_departments():
-    c.execute('SELECT * FROM departments')
+def get_all_tenants():
+    return select_rows(TenantRef, "tenants", "ORDER BY tenant_id")
+
+def get_tenant_overview():
+    """(tenant_id, tenant_name, users, projects, training sessions) per tenant, each counted from its tenant index."""
+    c.execute('''
+        SELECT t.tenant_id, t.tenant_name,
+               (SELECT COUNT(*) FROM users u WHERE u.tenant_id = t.tenant_id),
+               (SELECT COUNT(*) FROM projects p WHERE p.tenant_id = t.tenant_id),
+               (SELECT COUNT(*) FROM training_sessions s WHERE s.tenant_id = t.tenant_id)
+        FROM tenants t ORDER BY t.tenant_id
+    ''')
     return c.fetchall()
 
-def add_department(department_name):
-    c.execute('INSERT INTO departments (department_name) VALUES (?)', (department_name,))
+def add_tenant(tenant_name):
+    c.execute('INSERT INTO tenants (tenant_name, created_at) VALUES (?, ?)',
+              (tenant_name, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
     conn.commit()
+    audit("add_tenant", tenant_name)
+
+def is_group_admin():
+    """Admins of the default tenant administer the whole group and may switch into any tenant."""
+    return st.session_state.role == "Admin" and st.session_state.tenant_id == DEFAULT_TENANT_ID
+
+upgrade_legacy_passwords()
+
+# ---------- 4b) Bulk Provisioning ----------
+USER_ROLES = ["Admin", "Manager", "User"]
+
+def read_tabular_upload(uploaded_file):
+    """Reads a CSV or Excel upload as strings with normalized snake_case headers."""
+    if uploaded_file.name.lower().endswith(".csv"):
+        df = pd.read_csv(uploaded_file, dtype=str)
+    else:
+        df = pd.read_excel(uploaded_file, dtype=str)
+    df.columns = [str(col).strip().lower().replace(" ", "_") for col in df.columns]
+    return df.apply(lambda col: col.str.strip()).replace("", None)
+
+def validate_user_rows(df):
+    """
+    Returns (rows, rejected): rows are (username, password, role, department) tuples,
+    deduplicated by username (first occurrence wins); rejected is a list of (row_number, reason).
+    """
+    rows, rejected, seen = [], [], set()
+    if "username" not in df.columns or "password" not in df.columns:
+        return rows, [(0, "File must have 'username' and 'password' columns")]
+
+    roles_by_key = {r.lower(): r for r in USER_ROLES}
+    for idx, record in enumerate(df.to_dict("records"), start=2):
+        username = record.get("username")
+        password = record.get("password")
+        if not username or pd.isna(username):
+            rejected.append((idx, "Missing username"))
+            continue
+        if not password or pd.isna(password):
+            rejected.append((idx, f"Missing password for '{username}'"))
+            continue
+        if username in seen:
+            rejected.append((idx, f"Duplicate username '{username}' in file"))
+            continue
+        role = record.get("role")
+        if not role or pd.isna(role):
+            role = "User"
+        if str(role).lower() not in roles_by_key:
+            rejected.append((idx, f"Unknown role '{role}' for '{username}'"))
+            continue
+        department = record.get("department")
+        if not department or pd.isna(department):
+            department = "General"
+        seen.add(username)
+        rows.append((username, password, roles_by_key[str(role).lower()], department))
+    return rows, rejected
+
+def bulk_add_departments(department_names):
+    """Inserts departments not already present in the tenant in one transaction; returns the number inserted."""
+    names = list(dict.fromkeys(n for n in department_names if n))
+    tenant_id = current_tenant_id()
+    before = conn.total_changes
+    try:
+        c.executemany('''
+            INSERT INTO departments (department_name, tenant_id)
+            SELECT ?, ? WHERE NOT EXISTS (SELECT 1 FROM departments WHERE tenant_id = ? AND department_name = ?)
+        ''', [(n, tenant_id, tenant_id, n) for n in names])
+        conn.commit()
+    except storage.DatabaseError:
+        conn.rollback()
+        raise
+    return conn.total_changes - before
+
+def bulk_add_users(rows):
+    """
+    Inserts (username, password, role, department) rows into the session's tenant in one transaction,
+    skipping usernames that already exist (in any tenant) and creating any departments missing from
+    the tenant. Returns (users_inserted, departments_inserted).
+    """
+    departments = list(dict.fromkeys(r[3] for r in rows))
+    tenant_id = current_tenant_id()
+    try:
+        before = conn.total_changes
+        c.executemany('''
+            INSERT INTO departments (department_name, tenant_id)
+            SELECT ?, ? WHERE NOT EXISTS (SELECT 1 FROM departments WHERE tenant_id = ? AND department_name = ?)
+        ''', [(d, tenant_id, tenant_id, d) for d in departments])
+        departments_inserted = conn.total_changes - before
+
+        # Only hash passwords for usernames that will actually be inserted
+        c.execute("CREATE TEMP TABLE IF NOT EXISTS import_usernames (username TEXT PRIMARY KEY)")
+        c.execute("DELETE FROM import_usernames")
+        c.executemany("INSERT INTO import_usernames (username) VALUES (?) ON CONFLICT DO NOTHING",
+                      [(r[0],) for r in rows])
+        c.execute("SELECT i.username FROM import_usernames i JOIN users u ON u.username = i.username")
+        existing = {row[0] for row in c.fetchall()}
+        new_rows = [r for r in rows if r[0] not in existing]
+        hashes = get_auth_executor().map(hash_password, [r[1] for r in new_rows])
+
+        before = conn.total_changes
+        c.executemany('''
+            INSERT INTO users (username, password, role, department, tenant_id)
+            SELECT ?, ?, ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM users WHERE username = ?)
+        ''', [(u, h, r, d, tenant_id, u) for (u, _, r, d), h in zip(new_rows, hashes)])
+        users_inserted = conn.total_changes - before
+        conn.commit()
+    except storage.DatabaseError:
+        conn.rollback()
+        raise
+    audit("bulk_add_users", f"{users_inserted} users, {departments_inserted} departments")
+    return users_inserted, departments_inserted
 
 # ---------- 5) Project Management ----------
 def add_project(project_name, year, jjm_strategic_pillars, target_main_category,
@@ -973,211 +1835,743 @@ def add_project(project_name, year, jjm_strategic_pillars, target_main_category,
             project_name, year, jjm_strategic_pillars, target_main_category,
             target_sub_category, target_16_dimensions, jjm_action_plan,
             start_date, end_date, roadmap_captain, project_leaders, project_owners,
-            task_status, task_completion_rate, jjm_comments, target_remark, manager
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            task_status, task_completion_rate, jjm_comments, target_remark, manager, tenant_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     ''',
     (
         project_name, year, jjm_strategic_pillars, target_main_category,
         target_sub_category, target_16_dimensions, jjm_action_plan, str(start_date),
         str(end_date), roadmap_captain, project_leaders, project_owners,
-        task_status, task_completion_rate, jjm_comments, target_remark, manager
+        task_status, task_completion_rate, jjm_comments, target_remark, manager, current_tenant_id()
     ))
+    bump_data_version("projects")
     conn.commit()
 
+class StaleProjectError(Exception):
+    """A compare-and-swap update found that the project changed since the editor loaded it."""
+    def __init__(self, project_ids):
+        super().__init__(f"Project {', '.join(map(str, project_ids))} was changed by someone else")
+        self.project_ids = project_ids
+
+def get_project_record(project_id):
+    rows = select_rows(VersionedProject, "projects", "WHERE project_id = ? AND tenant_id = ?",
+                       (project_id, current_tenant_id()))
+    return rows[0] if rows else None
+
 def update_project(project_id, project_name, year, jjm_strategic_pillars, target_main_category,
                    target_sub_category, target_16_dimensions, jjm_action_plan,
                    start_date, end_date, roadmap_captain, project_leaders,
                    project_owners, task_status, task_completion_rate, jjm_comments,
-                   target_remark, manager):
-    c.execute('''
-        UPDATE projects
-        SET project_name=?,
-            year=?,
-            jjm_strategic_pillars=?,
-            target_main_category=?,
-            target_sub_category=?,
-            target_16_dimensions=?,
-            jjm_action_plan=?,
-            start_date=?,
-            end_date=?,
-            roadmap_captain=?,
-            project_leaders=?,
-            project_owners=?,
-            task_status=?,
-            task_completion_rate=?,
-            jjm_comments=?,
-            target_remark=?,
-            manager=?
-        WHERE project_id=?
-    ''',
-    (
-        project_name, year, jjm_strategic_pillars, target_main_category,
-        target_sub_category, target_16_dimensions, jjm_action_plan, str(start_date),
-        str(end_date), roadmap_captain, project_leaders, project_owners,
-        task_status, task_completion_rate, jjm_comments, target_remark, manager, project_id
-    ))
-    conn.commit()
-
-def get_all_projects():
-    c.execute('SELECT * FROM projects')
-    return c.fetchall()
+                   target_remark, manager, expected_version=None):
+    """
+    Rewrites a project's details. With `expected_version`, the write only succeeds if the row is
+    still at that version; otherwise StaleProjectError is raised and nothing is written.
+    """
+    with own_transaction() as tx:
+        updated = tx.execute('''
+            UPDATE projects
+            SET project_name=?,
+                year=?,
+                jjm_strategic_pillars=?,
+                target_main_category=?,
+                target_sub_category=?,
+                target_16_dimensions=?,
+                jjm_action_plan=?,
+                start_date=?,
+                end_date=?,
+                roadmap_captain=?,
+                project_leaders=?,
+                project_owners=?,
+                task_status=?,
+                task_completion_rate=?,
+                jjm_comments=?,
+                target_remark=?,
+                manager=?
+            WHERE project_id=? AND tenant_id=?
+        ''' + (" AND row_version=?" if expected_version is not None else ""),
+        (
+            project_name, year, jjm_strategic_pillars, target_main_category,
+            target_sub_category, target_16_dimensions, jjm_action_plan, str(start_date),
+            str(end_date), roadmap_captain, project_leaders, project_owners,
+            task_status, task_completion_rate, jjm_comments, target_remark, manager, project_id,
+            current_tenant_id()
+        ) + ((expected_version,) if expected_version is not None else ())).rowcount
+        if updated == 0 and expected_version is not None:
+            raise StaleProjectError([project_id])
+        bump_data_version("projects", connection=tx)
+    audit("update_project", project_id)
+
+def get_all_projects(archived_periods=(), connection=None):
+    """The tenant's live projects, followed by its archived projects from `archived_periods` if any are given."""
+    tenant_id = current_tenant_id()
+    projects = select_rows(ProjectRecord, "projects", "WHERE tenant_id = ?", (tenant_id,), connection)
+    if archived_periods:
+        projects += select_rows(ProjectRecord, "projects_archive",
+                                f"WHERE tenant_id = ? AND year IN ({', '.join('?' for _ in archived_periods)})",
+                                [tenant_id] + list(archived_periods), connection)
+    return projects
 
 def get_project_by_name(project_name):
-    c.execute('SELECT * FROM projects WHERE project_name = ?', (project_name,))
-    return c.fetchone()
+    rows = select_rows(ProjectRecord, "projects", "WHERE tenant_id = ? AND project_name = ? LIMIT 1",
+                       (current_tenant_id(), project_name))
+    return rows[0] if rows else None
+
+PROJECT_PICKER_LIMIT = 50
+
+# Case-insensitive name-prefix match within a tenant, in the form each backend serves from its
+# tenant-leading folded-name index
+NAME_PREFIX_CLAUSE = {
+    "sqlite": "WHERE tenant_id = ? AND project_name LIKE ? ESCAPE '\\' ORDER BY project_name COLLATE NOCASE",
+    "postgresql": "WHERE tenant_id = ? AND lower(project_name) LIKE lower(?) ESCAPE '\\' ORDER BY lower(project_name)",
+}
+
+def find_projects(prefix, limit=PROJECT_PICKER_LIMIT):
+    """
+    (project_id, project_name) pairs whose name starts with `prefix` (case-insensitive), in name order,
+    preceded by the project whose ID equals `prefix` if it is a number. Served from a case-folded name index.
+    """
+    tenant_id = current_tenant_id()
+    matches = []
+    if prefix.isdigit():
+        matches = select_rows(ProjectRef, "projects", "WHERE project_id = ? AND tenant_id = ?", (int(prefix), tenant_id))
+    pattern = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    by_name = select_rows(ProjectRef, "projects", f"{NAME_PREFIX_CLAUSE[DB_DIALECT]} LIMIT ?",
+                          (tenant_id, pattern, limit))
+    matches += [row for row in by_name if row not in matches]
+    return matches[:limit]
 
 def update_project_status(project_id, new_status):
-    c.execute('UPDATE projects SET task_status = ? WHERE project_id = ?', (new_status, project_id))
+    c.execute('UPDATE projects SET task_status = ? WHERE project_id = ? AND tenant_id = ?',
+              (new_status, project_id, current_tenant_id()))
+    bump_data_version("projects")
     conn.commit()
 
 def get_project_status():
-    c.execute("SELECT task_status, COUNT(*) FROM projects GROUP BY task_status")
+    c.execute("SELECT task_status, COUNT(*) FROM projects WHERE tenant_id = ? GROUP BY task_status",
+              (current_tenant_id(),))
     return c.fetchall()
 
+# Columns the bulk status update can filter on, with their display labels
+BULK_FILTER_FIELDS = {
+    "jjm_strategic_pillars": "JJM Strategic Pillars",
+    "target_main_category": "Target Main Category",
+    "manager": "Manager",
+    "year": "Year",
+}
+
+def has_project_filters(filters):
+    return any(values for field, values in filters.items() if field in BULK_FILTER_FIELDS)
+
+def project_filter_clause(filters):
+    """
+    WHERE clause and params matching the session's tenant and every {field: [values]} filter;
+    empty value lists are ignored.
+    """
+    conditions, params = ["tenant_id = ?"], [current_tenant_id()]
+    for field, values in filters.items():
+        if field not in BULK_FILTER_FIELDS or not values:
+            continue
+        conditions.append(f"{field} IN ({', '.join('?' for _ in values)})")
+        params.extend(values)
+    return "WHERE " + " AND ".join(conditions), params
+
+def count_filtered_projects(filters):
+    clause, params = project_filter_clause(filters)
+    c.execute(f"SELECT COUNT(*) FROM projects {clause}", params)
+    return c.fetchone()[0]
+
+def get_project_refs(project_ids):
+    if not project_ids:
+        return []
+    return select_rows(ProjectRef, "projects",
+                       f"WHERE tenant_id = ? AND project_id IN ({', '.join('?' for _ in project_ids)})",
+                       [current_tenant_id()] + list(project_ids))
+
+def bulk_update_project_status(new_status, completion_rate=None, project_ids=None, filters=None):
+    """
+    Sets task_status (and optionally task_completion_rate) on the given project IDs, or on every
+    project matching `filters`, in one transaction with a single data-version bump. Only the session's
+    tenant's projects are touched. Returns rows changed.
+    """
+    assignments, values = "task_status = ?", [new_status]
+    if completion_rate is not None:
+        assignments += ", task_completion_rate = ?"
+        values.append(float(completion_rate))
+    try:
+        if project_ids is not None:
+            tenant_id = current_tenant_id()
+            # IDs that are missing or belong to another tenant match no row and are not counted
+            changed = c.executemany(f"UPDATE projects SET {assignments} WHERE project_id = ? AND tenant_id = ?",
+                                    [values + [pid, tenant_id] for pid in project_ids]).rowcount
+        else:
+            if not has_project_filters(filters or {}):
+                raise ValueError("Refusing to update every project: choose at least one filter")
+            clause, params = project_filter_clause(filters)
+            c.execute(f"UPDATE projects SET {assignments} {clause}", values + params)
+            changed = c.rowcount
+        bump_data_version("projects")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    prewarm_caches("projects")
+    audit("bulk_update_status", f"{changed} projects -> {new_status}")
+    return changed
+
+# Columns the inline grid may write; project_id is the key and stays read-only
+EDITABLE_PROJECT_FIELDS = [f for f in reporting.PROJECT_FIELDS if f != "project_id"]
+
+def count_projects():
+    c.execute('SELECT COUNT(*) FROM projects WHERE tenant_id = ?', (current_tenant_id(),))
+    return c.fetchone()[0]
+
+def get_projects_page(limit, offset):
+    return select_rows(VersionedProject, "projects", "WHERE tenant_id = ? ORDER BY project_id LIMIT ? OFFSET ?",
+                       (current_tenant_id(), limit, offset))
+
+def apply_project_edits(edits, versions=None):
+    """
+    Writes {project_id: {field: new_value}} cell edits: one UPDATE per changed row touching only
+    its changed columns, all in one transaction with a single data-version bump. Returns rows updated.
+    With `versions` ({project_id: row_version as loaded}), each row is compare-and-swapped and
+    StaleProjectError (listing every stale project) is raised with nothing written.
+    """
+    versions = versions or {}
+    tenant_id = current_tenant_id()
+    stale = []
+    with own_transaction() as tx:
+        for project_id, changes in edits.items():
+            fields = [f for f in changes if f in EDITABLE_PROJECT_FIELDS]
+            if not fields:
+                continue
+            expected = versions.get(project_id)
+            updated = tx.execute(
+                f"UPDATE projects SET {', '.join(f'{f} = ?' for f in fields)} WHERE project_id = ? AND tenant_id = ?"
+                + (" AND row_version = ?" if expected is not None else ""),
+                [changes[f] for f in fields] + [project_id, tenant_id] + ([expected] if expected is not None else [])
+            ).rowcount
+            if updated == 0 and expected is not None:
+                stale.append(project_id)
+        if stale:
+            raise StaleProjectError(stale)
+        bump_data_version("projects", connection=tx)
+    prewarm_caches("projects")
+    audit("edit_projects", sorted(edits))
+    return sum(1 for changes in edits.values() if any(f in EDITABLE_PROJECT_FIELDS for f in changes))
+
+# Search ranks name matches above action plan, comment and remark matches
+SEARCH_RANK_WEIGHTS = (10.0, 2.0, 1.0, 1.0)
+
+def fts_enabled():
+    if DB_DIALECT != "sqlite":
+        return False
+    c.execute("SELECT 1 FROM sqlite_master WHERE name = 'projects_fts'")
+    return c.fetchone() is not None
+
+# Fallback when FTS5 is unavailable (or on PostgreSQL): case-insensitive substring match within a tenant
+LIKE_SEARCH_CLAUSE = (
+    "WHERE tenant_id = ? AND (lower(project_name) LIKE ? OR lower(jjm_action_plan) LIKE ? "
+    "OR lower(jjm_comments) LIKE ? OR lower(target_remark) LIKE ?)"
+)
+
+def build_fts_query(text):
+    """Turns free text into an FTS5 query: every word must match, each as a quoted prefix."""
+    words = [w.replace('"', '""') for w in text.split()]
+    return " ".join(f'"{w}"*' for w in words)
+
+def count_search_results(text):
+    if fts_enabled():
+        c.execute('''
+            SELECT COUNT(*) FROM projects_fts
+            JOIN projects p ON p.project_id = projects_fts.rowid
+            WHERE projects_fts MATCH ? AND p.tenant_id = ?
+        ''', (build_fts_query(text), current_tenant_id()))
+    else:
+        pattern = f"%{text.strip().lower()}%"
+        c.execute(f"SELECT COUNT(*) FROM projects {LIKE_SEARCH_CLAUSE}", (current_tenant_id(),) + (pattern,) * 4)
+    return c.fetchone()[0]
+
+def search_projects(text, limit=25, offset=0):
+    """
+    Ranked full-text search over the tenant's project names, action plans, comments and remarks.
+    Returns (project_id, project_name, task_status, manager, snippet) rows, best match first.
+    """
+    if fts_enabled():
+        c.execute(f'''
+            SELECT p.project_id, p.project_name, p.task_status, p.manager,
+                   snippet(projects_fts, -1, '[', ']', '…', 12)
+            FROM projects_fts
+            JOIN projects p ON p.project_id = projects_fts.rowid
+            WHERE projects_fts MATCH ? AND p.tenant_id = ?
+            ORDER BY bm25(projects_fts, {", ".join(map(str, SEARCH_RANK_WEIGHTS))})
+            LIMIT ? OFFSET ?
+        ''', (build_fts_query(text), current_tenant_id(), limit, offset))
+    else:
+        pattern = f"%{text.strip().lower()}%"
+        c.execute(
+            "SELECT project_id, project_name, task_status, manager, substr(jjm_action_plan, 1, 80) FROM projects "
+            f"{LIKE_SEARCH_CLAUSE} ORDER BY project_name LIMIT ? OFFSET ?",
+            (current_tenant_id(),) + (pattern,) * 4 + (limit, offset)
+        )
+    return c.fetchall()
+
+# ---------- 5b) Project Archive ----------
+# Completed projects of periods that ended before this year move to projects_archive, keeping their
+# IDs, so live dashboards only load current work. The ARCHIVE_KEEP_PERIODS most recent ended periods
+# stay live; setting the variable also applies the policy to every tenant once per process.
+ARCHIVE_KEEP_PERIODS = int(os.environ.get("ARCHIVE_KEEP_PERIODS", "1"))
+ARCHIVABLE_STATUSES = ["Completed"]
+ARCHIVE_COLUMNS = reporting.PROJECT_FIELDS + ["row_version", "tenant_id"]
+DIMENSION_COLUMNS = ["dimension_id", "project_id", "dimension_name", "dimension_score", "timestamp"]
+
+def period_end_year(period):
+    """Last year of a period label such as '2023-2024' (or '2023'); None if it names no year."""
+    years = re.findall(r"\d{4}", period or "")
+    return int(years[-1]) if years else None
+
+def archivable_periods(periods, keep_periods=ARCHIVE_KEEP_PERIODS, today=None):
+    """The periods that ended before this year, minus the `keep_periods` most recent of them."""
+    current_year = (today or datetime.now()).year
+    ended = [p for p in periods if period_end_year(p) is not None and period_end_year(p) < current_year]
+    return sorted(ended, key=period_end_year, reverse=True)[keep_periods:]
+
+def get_archive_candidates(keep_periods=ARCHIVE_KEEP_PERIODS, tenant_id=None):
+    """{period: number of projects} the policy would move out of the tenant's live table."""
+    c.execute(f'''
+        SELECT year, COUNT(*) FROM projects
+        WHERE tenant_id = ? AND task_status IN ({', '.join('?' for _ in ARCHIVABLE_STATUSES)})
+        GROUP BY year
+    ''', [tenant_id or current_tenant_id()] + ARCHIVABLE_STATUSES)
+    counts = dict(c.fetchall())
+    return {period: counts[period] for period in archivable_periods(counts, keep_periods)}
+
+def archive_projects(keep_periods=ARCHIVE_KEEP_PERIODS, tenant_id=None):
+    """
+    Moves the tenant's archivable projects, with their dimension scores, to the archive tables in one
+    transaction. Returns how many projects moved.
+    """
+    tenant_id = tenant_id or current_tenant_id()
+    periods = list(get_archive_candidates(keep_periods, tenant_id))
+    if not periods:
+        return 0
+    where = (f"WHERE tenant_id = ? AND year IN ({', '.join('?' for _ in periods)}) "
+             f"AND task_status IN ({', '.join('?' for _ in ARCHIVABLE_STATUSES)})")
+    params = [tenant_id] + periods + ARCHIVABLE_STATUSES
+    columns, dimension_columns = ", ".join(ARCHIVE_COLUMNS), ", ".join(DIMENSION_COLUMNS)
+    moving = f"project_id IN (SELECT project_id FROM projects {where})"
+    try:
+        c.execute(f"INSERT INTO projects_archive ({columns}, archived_at) SELECT {columns}, ? FROM projects {where}",
+                  [datetime.now().strftime("%Y-%m-%d %H:%M:%S")] + params)
+        c.execute(f"INSERT INTO dimensions_archive ({dimension_columns}) "
+                  f"SELECT {dimension_columns} FROM dimensions WHERE {moving}", params)
+        c.execute(f"DELETE FROM dimensions WHERE {moving}", params)
+        c.execute(f"DELETE FROM projects {where}", params)
+        moved = c.rowcount
+        bump_data_version("projects", tenant_id)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    prewarm_caches("projects", [tenant_id])
+    audit("archive_projects", f"{moved} projects from {', '.join(periods)}")
+    return moved
+
+def get_archived_periods():
+    """{period: number of archived projects} for the session's tenant."""
+    c.execute("SELECT year, COUNT(*) FROM projects_archive WHERE tenant_id = ? GROUP BY year ORDER BY year",
+              (current_tenant_id(),))
+    return dict(c.fetchall())
+
+def restore_archived_projects(periods):
+    """
+    Moves the tenant's archived projects from `periods`, with their dimension scores, back to the live
+    tables. Returns how many projects moved.
+    """
+    tenant_id = current_tenant_id()
+    where = f"WHERE tenant_id = ? AND year IN ({', '.join('?' for _ in periods)})"
+    params = [tenant_id] + list(periods)
+    columns, dimension_columns = ", ".join(ARCHIVE_COLUMNS), ", ".join(DIMENSION_COLUMNS)
+    moving = f"project_id IN (SELECT project_id FROM projects_archive {where})"
+    try:
+        c.execute(f"INSERT INTO projects ({columns}) SELECT {columns} FROM projects_archive {where}", params)
+        c.execute(f"INSERT INTO dimensions ({dimension_columns}) "
+                  f"SELECT {dimension_columns} FROM dimensions_archive WHERE {moving}", params)
+        c.execute(f"DELETE FROM dimensions_archive WHERE {moving}", params)
+        c.execute(f"DELETE FROM projects_archive {where}", params)
+        restored = c.rowcount
+        bump_data_version("projects", tenant_id)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    prewarm_caches("projects", [tenant_id])
+    audit("restore_archived_projects", f"{restored} projects from {', '.join(periods)}")
+    return restored
+
+@st.cache_resource
+def apply_archive_policy():
+    """Applies the archive policy to every tenant once per process, when ARCHIVE_KEEP_PERIODS is set."""
+    if "ARCHIVE_KEEP_PERIODS" in os.environ:
+        for tenant in get_all_tenants():
+            archive_projects(ARCHIVE_KEEP_PERIODS, tenant.tenant_id)
+
 # ---------- 6) Progress / Training ----------
+TRAINING_STATUSES = ["Not Started", "In Progress", "Completed"]
+
 def get_user_progress(user_id):
     c.execute('SELECT session_id, status FROM user_progress WHERE user_id = ?', (user_id,))
     return c.fetchall()
 
-# ---------- 7) Excel Processing: Soft error handling ----------
-def process_excel_file(uploaded_file):
+# Training materials are stored once per distinct content under training_materials/<sha[:2]>/<sha>
+MATERIAL_STORE_DIR = "training_materials"
+MATERIAL_CHUNK_SIZE = 1024 * 1024
+
+def store_training_material(uploaded_file):
+    """
+    Writes an uploaded file into the content-addressed store and returns its sha256.
+    Identical uploads (under any name) resolve to the existing blob and are not rewritten.
+    """
+    # One pass in fixed-size chunks: each is hashed as it is written to a unique temp file, so a
+    # half-written blob is never visible under its hash and concurrent uploads of the same content
+    # (other sessions, other processes) never share one
+    os.makedirs(MATERIAL_STORE_DIR, exist_ok=True)
+    digest, size = hashlib.sha256(), 0
+    uploaded_file.seek(0)
+    with tempfile.NamedTemporaryFile(dir=MATERIAL_STORE_DIR, suffix=".tmp", delete=False) as f:
+        tmp_path = f.name
+        try:
+            for chunk in iter(functools.partial(uploaded_file.read, MATERIAL_CHUNK_SIZE), b""):
+                digest.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+        except BaseException:
+            f.close()
+            os.remove(tmp_path)
+            raise
+    sha256 = digest.hexdigest()
+
+    c.execute('SELECT stored_path FROM training_materials WHERE sha256 = ?', (sha256,))
+    existing = c.fetchone()
+    if existing and os.path.exists(existing[0]):
+        os.remove(tmp_path)
+        return sha256
+
+    stored_path = os.path.join(MATERIAL_STORE_DIR, sha256[:2], sha256)
+    os.makedirs(os.path.dirname(stored_path), exist_ok=True)
+    os.replace(tmp_path, stored_path)
+
+    content_type = uploaded_file.type or mimetypes.guess_type(uploaded_file.name)[0] or "application/octet-stream"
+    c.execute('''
+        INSERT INTO training_materials (sha256, file_name, content_type, size_bytes, stored_path, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(sha256) DO UPDATE SET
+            file_name = excluded.file_name,
+            content_type = excluded.content_type,
+            size_bytes = excluded.size_bytes,
+            stored_path = excluded.stored_path,
+            created_at = excluded.created_at
+    ''', (sha256, uploaded_file.name, content_type, size, stored_path,
+          datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    conn.commit()
+    return sha256
+
+def get_training_material(sha256):
+    c.execute('''
+        SELECT sha256, file_name, content_type, size_bytes, stored_path
+        FROM training_materials WHERE sha256 = ?
+    ''', (sha256,))
+    return c.fetchone()
+
+def add_training_session(title, description, schedule, material_sha256):
+    material = get_training_material(material_sha256)
+    c.execute('''
+        INSERT INTO training_sessions (title, description, schedule, material_path, material_sha256, tenant_id)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (title, description, str(schedule), material[4], material_sha256, current_tenant_id()))
+    bump_data_version("training")
+    conn.commit()
+
+def get_user_training_sessions(user_id):
+    """Sessions a user is enrolled in, joined with their details in a single PK range scan."""
+    c.execute('''
+        SELECT s.session_id, s.title, s.description, s.schedule, s.material_path, p.status, p.updated_at,
+               m.file_name, m.content_type
+        FROM user_progress p
+        JOIN training_sessions s ON s.session_id = p.session_id
+        LEFT JOIN training_materials m ON m.sha256 = s.material_sha256
+        WHERE p.user_id = ?
+        ORDER BY s.schedule, s.session_id
+    ''', (user_id,))
+    return c.fetchall()
+
+def get_available_training_sessions(user_id):
+    c.execute('''
+        SELECT s.session_id, s.title, s.schedule
+        FROM training_sessions s
+        WHERE s.tenant_id = ? AND NOT EXISTS (
+            SELECT 1 FROM user_progress p WHERE p.user_id = ? AND p.session_id = s.session_id
+        )
+        ORDER BY s.schedule, s.session_id
+    ''', (current_tenant_id(), user_id))
+    return c.fetchall()
+
+def get_user_training_summary(user_id):
+    """Returns (enrolled, in_progress, completed, completion_pct), precomputed by triggers."""
+    c.execute('''
+        SELECT enrolled_sessions, in_progress_sessions, completed_sessions, completion_pct
+        FROM user_training_summary WHERE user_id = ?
+    ''', (user_id,))
+    return c.fetchone() or (0, 0, 0, 0.0)
+
+def set_user_progress(user_id, session_id, status):
+    c.execute('''
+        INSERT INTO user_progress (user_id, session_id, status, updated_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(user_id, session_id) DO UPDATE SET
+            status = excluded.status,
+            updated_at = excluded.updated_at
+    ''', (user_id, session_id, status, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    bump_data_version("training")
+    conn.commit()
+
+def count_learners():
+    c.execute('''
+        SELECT COUNT(*) FROM user_training_summary s
+        JOIN users u ON u.user_id = s.user_id
+        WHERE u.tenant_id = ?
+    ''', (current_tenant_id(),))
+    return c.fetchone()[0]
+
+def get_learner_progress_page(limit, offset):
+    c.execute('''
+        SELECT u.username, u.department, u.role,
+               s.enrolled_sessions, s.in_progress_sessions, s.completed_sessions, s.completion_pct
+        FROM user_training_summary s
+        JOIN users u ON u.user_id = s.user_id
+        WHERE u.tenant_id = ?
+        ORDER BY s.completion_pct DESC, u.username
+        LIMIT ? OFFSET ?
+    ''', (current_tenant_id(), limit, offset))
+    return c.fetchall()
+
+@st.cache_resource
+def get_shared_cache():
+    return shared_cache.cache_from_url()
+
+def shared_across_replicas(func):
+    """
+    Backs a loader with the cross-process cache tier (CACHE_URL), keyed by the database, the
+    function name and its arguments. Stack it under st.cache_data: each process keeps its in-memory
+    copy, and a miss there is served by whichever replica computed the value first.
+    """
+    @functools.wraps(func)
+    def wrapper(*args):
+        return shared_cache.get_or_compute(
+            get_shared_cache(), func.__name__, (DB_BACKEND.url,) + args, lambda: func(*args)
+        )
+    return wrapper
+
+@st.cache_data(show_spinner=False)
+@shared_across_replicas
+def load_training_funnels(data_version, tenant_id):
     """
-    Reads Excel, skipping rows that are missing 'Project Name' entirely.
-    'Start Date'/'End Date' are attempted best-effort. 
-    Missing columns won't cause a crash; we fill with None or skip if absolutely necessary.
+    A tenant's completion funnels (enrolled -> started -> completed) by session, department and role.
+    Cached per tenant and training data version; reads only the pre-aggregated cohort table, on the snapshot.
     """
+    # Quoted aliases keep their case on every backend
+    stage_sql = '''
+        SUM(enrolled) AS "Enrolled",
+        SUM(in_progress) + SUM(completed) AS "Started",
+        SUM(completed) AS "Completed"
+    '''
+    with analytics_connection("training", data_version, tenant_id) as snapshot_conn:
+        funnels = {
+            "Session": query_frame(f'''
+                SELECT s.session_id || ' - ' || COALESCE(s.title, '') AS "Session", {stage_sql}
+                FROM training_cohort_stats t
+                JOIN training_sessions s ON s.session_id = t.session_id
+                WHERE s.tenant_id = ?
+                GROUP BY s.session_id, s.title
+                ORDER BY s.session_id
+            ''', (tenant_id,), snapshot_conn),
+            "Department": query_frame(f'''
+                SELECT t.department AS "Department", {stage_sql}
+                FROM training_cohort_stats t
+                JOIN training_sessions s ON s.session_id = t.session_id
+                WHERE s.tenant_id = ?
+                GROUP BY t.department ORDER BY t.department
+            ''', (tenant_id,), snapshot_conn),
+            "Role": query_frame(f'''
+                SELECT t.role AS "Role", {stage_sql}
+                FROM training_cohort_stats t
+                JOIN training_sessions s ON s.session_id = t.session_id
+                WHERE s.tenant_id = ?
+                GROUP BY t.role ORDER BY t.role
+            ''', (tenant_id,), snapshot_conn),
+        }
+    for dimension, funnel_df in funnels.items():
+        funnel_df["Completion %"] = (
+            100.0 * funnel_df["Completed"] / funnel_df["Enrolled"].where(funnel_df["Enrolled"] > 0)
+        ).fillna(0).round(1)
+    return funnels
+
+@st.cache_data(show_spinner=False)
+@shared_across_replicas
+def load_project_filter_options(data_version, tenant_id):
+    """A tenant's distinct values of each bulk-filter column, cached until its projects data version changes."""
+    options = {}
+    cursor = conn.cursor()
+    for field in BULK_FILTER_FIELDS:
+        cursor.execute(f"SELECT DISTINCT {field} FROM projects "
+                       f"WHERE tenant_id = ? AND {field} IS NOT NULL AND {field} != '' ORDER BY {field}", (tenant_id,))
+        options[field] = [row[0] for row in cursor.fetchall()]
+    return options
+
+@st.cache_data(show_spinner=False)
+@shared_across_replicas
+def load_project_snapshot(data_version, tenant_id):
+    """A tenant's projects as a prepared DataFrame from the snapshot, cached until its projects data version changes."""
+    with analytics_connection("projects", data_version, tenant_id) as snapshot_conn:
+        return reporting.load_projects(snapshot_conn, fields=reporting.DASHBOARD_FIELDS, tenant_id=tenant_id)
+
+@st.cache_data(show_spinner=False)
+@shared_across_replicas
+def load_project_figures(data_version, tenant_id):
+    """The dashboard's Plotly figures for a tenant's projects data version, built once across all replicas."""
+    return reporting.build_figures(load_project_snapshot(data_version, tenant_id))
+
+# ---------- 6b) Cache pre-warming ----------
+# After an import or bulk update commits, the tenant's dashboard loaders are recomputed on a small
+# background pool, so the first manager or admin to open the dashboard gets cache hits. Managers
+# and admins of a tenant share the same cached snapshot, figures and funnels.
+CACHE_PREWARM_WORKERS = int(os.environ.get("CACHE_PREWARM_WORKERS", "2"))
+PREWARM_LOADERS = {
+    "projects": (load_project_snapshot, load_project_figures, load_project_filter_options),
+    "training": (load_training_funnels,),
+}
+
+@st.cache_resource
+def get_prewarm_pool():
+    pool = ThreadPoolExecutor(max_workers=CACHE_PREWARM_WORKERS, thread_name_prefix="cache-prewarm")
+    atexit.register(pool.shutdown, wait=False, cancel_futures=True)
+    return pool
+
+def prewarm_caches(scope, tenant_ids=None):
+    """
+    Queues a background recompute of `scope`'s cached loaders for each tenant (default: the
+    session's tenant). Call after the writing transaction commits; returns the futures.
+    """
+    if CACHE_PREWARM_WORKERS <= 0:
+        return []
+    pool = get_prewarm_pool()
+    return [pool.submit(_prewarm_scope, scope, tenant_id) for tenant_id in tenant_ids or [current_tenant_id()]]
+
+def _prewarm_scope(scope, tenant_id):
+    # The version is read when the job runs, so jobs queued behind a newer write are cache hits
     try:
-        df = pd.read_excel(uploaded_file)
-    except Exception as e:
-        st.warning(f"Failed to read Excel: {e}")
-        return
+        data_version = get_data_version(scope, tenant_id)
+        for loader in PREWARM_LOADERS[scope]:
+            loader(data_version, tenant_id)
+    except Exception:
+        # A failed warm-up only means the next viewer computes the value themselves
+        logger.exception("pre-warming %s caches for tenant %s failed", scope, tenant_id)
 
-    # Map Excel columns to DB fields. If any column is missing, we won't error out.
-    mapping = {
-        "Project Name": "project_name",
-        "Year": "year",
-        "JJM Strategic Pillars": "jjm_strategic_pillars",
-        "Target Main Category": "target_main_category",
-        "Target Sub Category": "target_sub_category",
-        "Target 16 Dimensions": "target_16_dimensions",
-        "JJM Action Plan": "jjm_action_plan",
-        "Start Date": "start_date",
-        "End Date": "end_date",
-        "Roadmap Captain": "roadmap_captain",
-        "Project Leaders": "project_leaders",
-        "Project Owners": "project_owners",
-        "Task Status": "task_status",
-        "Task Completion Rate": "task_completion_rate",
-        "JJM Comments": "jjm_comments",
-        "Target Remark": "target_remark",
-        "Manager": "manager",
-    }
-
-    for idx, row in df.iterrows():
-        # Construct a dict from the row
-        row_data = {}
-        for excel_col, db_field in mapping.items():
-            if excel_col in df.columns:
-                # If the row doesn't have a valid value, store None
-                row_data[db_field] = row.get(excel_col, None)
-            else:
-                # This column missing in Excel, store None
-                row_data[db_field] = None
+# Runs once the loaders exist, since archiving pre-warms their caches
+apply_archive_policy()
 
-        p_name = row_data.get("project_name", "")
-        if not p_name or pd.isna(p_name):
-            st.warning(f"Skipping row {idx+1}: no Project Name.")
-            continue
+# ---------- 7) Excel Processing: Soft error handling ----------
+@st.cache_resource
+def get_excel_import_pool():
+    # Spawned workers only import excel_import, never this Streamlit script
+    workers = int(os.environ.get("EXCEL_IMPORT_WORKERS", os.cpu_count() or 2))
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
 
-        # Attempt to parse start_date / end_date as string
-        start_date_val = row_data.get("start_date")
-        end_date_val = row_data.get("end_date")
+@timed_span
+def process_excel_files(uploaded_files):
+    """
+    Imports every sheet of every uploaded workbook. Sheets are parsed in parallel worker processes,
+    then all rows are upserted by project name in a single transaction with per-sheet provenance.
+    Headers are matched through saved mapping profiles or alias/fuzzy resolution; rows missing
+    'Project Name' are skipped and unmatched fields become None. Returns per-sheet results.
+    """
+    workbooks = [(f.name, f.getvalue()) for f in uploaded_files]
+    results = excel_import.parse_workbooks(workbooks, executor=get_excel_import_pool(),
+                                           profiles=excel_import.load_profiles(conn))
+    try:
+        excel_import.write_projects(conn, results, current_tenant_id())
+        bump_data_version("projects")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    prewarm_caches("projects")
+    audit("excel_import", f"{len(workbooks)} workbooks, {len(results)} sheets")
+    return results
+
+def get_mapping_profiles():
+    c.execute("SELECT fingerprint, name, headers, mapping, last_used_at FROM excel_mapping_profiles ORDER BY name")
+    return [
+        (fingerprint, name, json.loads(headers), json.loads(mapping), last_used_at)
+        for fingerprint, name, headers, mapping, last_used_at in c.fetchall()
+    ]
 
-        # Convert if it's a Timestamp
-        if pd.notnull(start_date_val) and hasattr(start_date_val, "strftime"):
-            start_date_val = start_date_val.strftime("%Y-%m-%d")
-        else:
-            # If it's NaN or missing, store blank
-            start_date_val = "" if not start_date_val else str(start_date_val)
+def save_mapping_profile(fingerprint, name, mapping):
+    excel_import.save_profile(conn, fingerprint, name, mapping)
+    conn.commit()
 
-        if pd.notnull(end_date_val) and hasattr(end_date_val, "strftime"):
-            end_date_val = end_date_val.strftime("%Y-%m-%d")
-        else:
-            end_date_val = "" if not end_date_val else str(end_date_val)
+def delete_mapping_profile(fingerprint):
+    c.execute("DELETE FROM excel_mapping_profiles WHERE fingerprint = ?", (fingerprint,))
+    conn.commit()
 
-        # Convert numeric
-        tcr_val = 0.0
-        try:
-            tcr_val = float(row_data.get("task_completion_rate") or 0.0)
-        except:
-            tcr_val = 0.0
-
-        # Check if project exists
-        existing = get_project_by_name(p_name)
-        if existing:
-            # Update
-            pid = existing[0]
-            update_project(
-                project_id=pid,
-                project_name=p_name,
-                year=row_data.get("year", ""),
-                jjm_strategic_pillars=row_data.get("jjm_strategic_pillars", ""),
-                target_main_category=row_data.get("target_main_category", ""),
-                target_sub_category=row_data.get("target_sub_category", ""),
-                target_16_dimensions=row_data.get("target_16_dimensions", ""),
-                jjm_action_plan=row_data.get("jjm_action_plan", ""),
-                start_date=start_date_val,
-                end_date=end_date_val,
-                roadmap_captain=row_data.get("roadmap_captain", ""),
-                project_leaders=row_data.get("project_leaders", ""),
-                project_owners=row_data.get("project_owners", ""),
-                task_status=row_data.get("task_status", "Not Started"),
-                task_completion_rate=tcr_val,
-                jjm_comments=row_data.get("jjm_comments", ""),
-                target_remark=row_data.get("target_remark", ""),
-                manager=row_data.get("manager", "")
-            )
-            st.success(f"Updated project '{p_name}' from Excel row {idx+1}.")
-        else:
-            # Insert
-            add_project(
-                project_name=p_name,
-                year=row_data.get("year", ""),
-                jjm_strategic_pillars=row_data.get("jjm_strategic_pillars", ""),
-                target_main_category=row_data.get("target_main_category", ""),
-                target_sub_category=row_data.get("target_sub_category", ""),
-                target_16_dimensions=row_data.get("target_16_dimensions", ""),
-                jjm_action_plan=row_data.get("jjm_action_plan", ""),
-                start_date=start_date_val,
-                end_date=end_date_val,
-                roadmap_captain=row_data.get("roadmap_captain", ""),
-                project_leaders=row_data.get("project_leaders", ""),
-                project_owners=row_data.get("project_owners", ""),
-                task_status=row_data.get("task_status", "Not Started"),
-                task_completion_rate=tcr_val,
-                jjm_comments=row_data.get("jjm_comments", ""),
-                target_remark=row_data.get("target_remark", ""),
-                manager=row_data.get("manager", "")
-            )
-            st.success(f"Inserted new project '{p_name}' from Excel row {idx+1}.")
+# ---------- 7b) Columnar Export / Import ----------
+def export_projects_parquet():
+    """Deferred download body: streams the tenant's projects to Parquet on a private read-only connection."""
+    buffer = io.BytesIO()
+    export_conn = DB_BACKEND.connect_readonly()
+    try:
+        portfolio_io.write_table(export_conn, "projects", buffer, "parquet", tenant_id=current_tenant_id())
+    finally:
+        export_conn.close()
+    buffer.seek(0)
+    return buffer
+
+def import_columnar_file(uploaded_file):
+    """
+    Upserts a <table>.parquet/.arrow upload by primary key into the session's tenant.
+    Returns (table, rows written, keys skipped because another tenant owns them).
+    Tables keyed by user or project rather than tenant can only be imported by group admins.
+    """
+    table = portfolio_io.table_for_path(uploaded_file.name)
+    if table not in portfolio_io.TENANT_TABLES and not is_group_admin():
+        raise ValueError(f"Only group administrators can import {table}")
+    # Progress and dimension rows can belong to any tenant, so those imports refresh every tenant's caches
+    if table in portfolio_io.TENANT_TABLES:
+        tenant_ids = [current_tenant_id()]
+    else:
+        tenant_ids = [t.tenant_id for t in get_all_tenants()]
+    scope = "training" if table == "user_progress" else "projects"
+    try:
+        rows, skipped = portfolio_io.read_table(conn, table, uploaded_file, tenant_id=current_tenant_id())
+        for tenant_id in tenant_ids:
+            bump_data_version(scope, tenant_id)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    prewarm_caches(scope, tenant_ids)
+    return table, rows, skipped
 
 # ---------- 8) Visualization / Reporting ----------
+@timed_span
 def visualize_projects():
     st.subheader("Project Dashboard Overview")
 
-    # Fetch DB
-    projects = get_all_projects()
-    df = pd.DataFrame(projects, columns=[
-        "ID", "Project Name", "Year", "JJM Strategic Pillars", "Target Main Category",
-        "Target Sub Category", "Target 16 Dimensions", "JJM Action Plan", "Start Date",
-        "End Date", "Roadmap Captain", "Project Leaders", "Project Owners",
-        "Task Status", "Task Completion Rate", "JJM Comments", "Target Remark",
-        "Manager"
-    ])
-
-    # Convert date columns to datetime for analysis
-    df["Start Date"] = pd.to_datetime(df["Start Date"], errors="coerce")
-    df["End Date"]   = pd.to_datetime(df["End Date"], errors="coerce")
+    # Metrics and charts come from the headless reporting module; only rendering happens here
+    data_version, tenant_id = get_data_version("projects"), current_tenant_id()
+    df = load_project_snapshot(data_version, tenant_id)
+    summary = reporting.compute_summary(df)
+    figures = load_project_figures(data_version, tenant_id)
+    st.caption(f"Data as of {data_as_of()}")
 
     # ========== Dashboard Header with Animated Title ==========
     st.markdown("""
@@ -1201,183 +2595,21 @@ def visualize_projects():
     """, unsafe_allow_html=True)
     
     colA, colB, colC, colD = st.columns(4)
-    total_projects = len(df)
-    colA.metric("📊 Total Projects", total_projects)
-
-    # Let's also show Completed
-    completed_projects = len(df[df["Task Status"] == "Completed"])
-    colB.metric("✅ Completed", completed_projects)
-
-    # In Progress
-    in_progress_projects = len(df[df["Task Status"] == "In Progress"])
-    colC.metric("🔄 In Progress", in_progress_projects)
-
-    # Delayed: EndDate < now, not completed
-    now = datetime.now()
-    delayed_projects = df[
-        (df["End Date"].notnull()) &
-        (df["End Date"] < now) &
-        (df["Task Status"] != "Completed")
-    ]
-    colD.metric("⚠️ Delayed", len(delayed_projects))
+    colA.metric("📊 Total Projects", summary["Total Projects"])
+    colB.metric("✅ Completed", summary["Completed"])
+    colC.metric("🔄 In Progress", summary["In Progress"])
+    colD.metric("⚠️ Delayed", summary["Delayed"])
 
     # Another row for other statuses
     st.write("## Additional Status Counts:")
     colX, colY, colZ = st.columns(3)
-    trial_done = len(df[df["Task Status"] == "Trial Done"])
-    colX.metric("🧪 Trial Done", trial_done)
-
-    in_testing = len(df[df["Task Status"] == "In Testing"])
-    colY.metric("🔍 In Testing", in_testing)
-
-    deployed = len(df[df["Task Status"] == "Production Deployed"])
-    colZ.metric("🚀 Deployed", deployed)
-
-    # ========== Project Status Visualization (Plotly bar with fixed background) ==========
-    status_counts = df["Task Status"].value_counts()
-    status_df = pd.DataFrame({"Task Status": status_counts.index, "Count": status_counts.values})
-    fig_status_bar = px.bar(
-        status_df, x="Task Status", y="Count",
-        title="Project Status Overview",
-        color="Task Status", 
-        color_discrete_map={
-            "Completed": "#4CAF50", 
-            "In Progress": "#2196F3",
-            "Not Started": "#78909C", 
-            "Trial Done": "#00BCD4",
-            "In Testing": "#FF9800",
-            "Production Deployed": "#9C27B0",
-            "Running": "#009688"
-        }
-    )
-    
-    # Set dark mode for the plot
-    fig_status_bar.update_layout(
-        plot_bgcolor='rgba(15,23,42,0)',
-        paper_bgcolor='rgba(15,23,42,0)',
-        title_font=dict(size=20, color='#ffffff', family="Segoe UI, sans-serif"),
-        font=dict(family="Segoe UI, sans-serif", color='#ffffff'),
-        xaxis=dict(
-            showgrid=True,
-            gridcolor='rgba(255,255,255,0.1)'
-        ),
-        yaxis=dict(
-            showgrid=True,
-            gridcolor='rgba(255,255,255,0.1)'
-        ),
-        xaxis_title_font=dict(size=14),
-        yaxis_title_font=dict(size=14),
-        hoverlabel=dict(font_size=14, font_family="Segoe UI, sans-serif"),
-        margin=dict(t=80, b=40, l=40, r=40),
-    )
-    
-    # Add text labels on top of bars
-    fig_status_bar.update_traces(
-        texttemplate='%{y}',
-        textposition='outside'
-    )
-    
-    st.plotly_chart(fig_status_bar, use_container_width=True)
+    colX.metric("🧪 Trial Done", summary["Trial Done"])
+    colY.metric("🔍 In Testing", summary["In Testing"])
+    colZ.metric("🚀 Deployed", summary["Deployed"])
 
-    # ========== Completion Rate Visualization (REPLACED ALTAIR WITH PLOTLY) ==========
-    df["Task Completion Rate"] = pd.to_numeric(df["Task Completion Rate"], errors="coerce").fillna(0)
-    
-    # Group by JJM Strategic Pillars and Target Main Category
-    completion_df = df.groupby(['JJM Strategic Pillars', 'Target Main Category'])['Task Completion Rate'].mean().reset_index()
-    
-    # Create a line chart with Plotly instead of Altair
-    fig_completion = px.line(
-        completion_df, 
-        x='JJM Strategic Pillars', 
-        y='Task Completion Rate',
-        color='Target Main Category',
-        title="Task Completion Rate Across Projects",
-        markers=True,
-        line_shape='spline',  # Makes the lines curved
-    )
-    
-    # Update the chart styling to match other charts
-    fig_completion.update_layout(
-        plot_bgcolor='rgba(15,23,42,0)',
-        paper_bgcolor='rgba(15,23,42,0)',
-        title_font=dict(size=20, color='#ffffff', family="Segoe UI, sans-serif"),
-        font=dict(family="Segoe UI, sans-serif", color='#ffffff'),
-        xaxis=dict(
-            showgrid=True,
-            gridcolor='rgba(255,255,255,0.1)',
-            title="JJM Strategic Pillars"
-        ),
-        yaxis=dict(
-            showgrid=True,
-            gridcolor='rgba(255,255,255,0.1)',
-            title="Avg. Completion Rate (%)"
-        ),
-        legend_title_text="Target Main Category",
-        hovermode="x unified"
-    )
-    
-    # Add hover data and make lines thicker
-    fig_completion.update_traces(
-        line=dict(width=3),
-        marker=dict(size=8),
-        hovertemplate="<b>%{x}</b><br>%{y:.1f}%<extra></extra>"
-    )
-    
-    st.plotly_chart(fig_completion, use_container_width=True)
-
-    # ========== Milestone Visualization (REPLACED ALTAIR WITH PLOTLY) ==========
-    mile_df = df.groupby("Target Main Category")["Task Completion Rate"].mean().reset_index()
-    
-    # Create milestone chart with Plotly instead of Altair
-    fig_milestone = px.bar(
-        mile_df,
-        x='Target Main Category',
-        y='Task Completion Rate',
-        color='Target Main Category',
-        title="Milestone Progress by Category",
-        text_auto='.1f'  # Show the values on the bars
-    )
-    
-    # Update the chart styling to match other charts
-    fig_milestone.update_layout(
-        plot_bgcolor='rgba(15,23,42,0)',
-        paper_bgcolor='rgba(15,23,42,0)',
-        title_font=dict(size=20, color='#ffffff', family="Segoe UI, sans-serif"),
-        font=dict(family="Segoe UI, sans-serif", color='#ffffff'),
-        xaxis=dict(
-            showgrid=False,
-            title="Target Main Category",
-            categoryorder='total descending'  # Sort by highest value
-        ),
-        yaxis=dict(
-            showgrid=True,
-            gridcolor='rgba(255,255,255,0.1)',
-            title="Avg. Completion Rate (%)",
-            range=[0, 100]  # Fixed range for better comparison
-        ),
-        showlegend=False,
-        margin=dict(t=50, b=0, l=0, r=0),
-    )
-    
-    # Add hover data and bar styling
-    fig_milestone.update_traces(
-        marker_line_width=1,
-        marker_line_color="rgba(255,255,255,0.3)",
-        opacity=0.85,
-        textposition='outside',
-        textfont=dict(color='white'),
-        hovertemplate="<b>%{x}</b><br>Completion: %{y:.1f}%<extra></extra>"
-    )
-    
-    st.plotly_chart(fig_milestone, use_container_width=True)
-
-    # ========== Scatter of Completion Rate vs. Strategic Pillars (Plotly) ==========
-    scatter_fig = px.scatter(
-        df, x="JJM Strategic Pillars", y="Task Completion Rate",
-        color="Target Main Category", hover_data=["Project Name"],
-        title="Completion Rate vs. JJM Strategic Pillars"
-    )
-    st.plotly_chart(scatter_fig, use_container_width=True)
+    # ========== Status, completion, milestone and scatter charts ==========
+    for key in ("status", "completion", "milestone", "scatter"):
+        st.plotly_chart(figures[key], use_container_width=True)
 
     # ========== Kanban Board Visualization ==========
     st.markdown("""
@@ -1389,10 +2621,7 @@ def visualize_projects():
     """, unsafe_allow_html=True)
     
     kanban_df = df[["Project Name", "Task Status", "Manager", "Task Completion Rate"]].copy()
-    status_order = [
-        "Not Started", "In Progress", "Trial Done",
-        "In Testing", "Production Deployed", "Running", "Completed"
-    ]
+    status_order = reporting.STATUS_ORDER
     
     # Map status to icons and colors
     status_icons = {
@@ -1473,111 +2702,195 @@ def visualize_projects():
     st.markdown('</div>', unsafe_allow_html=True)
 
     # ========== Additional Visualizations ==========
-
-    # Bar chart for JJM Strategic Pillars (# of projects, # completed)
     st.subheader("Projects by JJM Strategic Pillars")
-    pillar_group = df.groupby('JJM Strategic Pillars').agg(
-        Total_Projects=('Project Name', 'count'),
-        Completed_Projects=('Task Status', lambda x: (x == 'Completed').sum())
-    ).reset_index()
-
-    # Ensure both columns are of the same numeric type (e.g., int)
-    pillar_group['Total_Projects'] = pillar_group['Total_Projects'].astype(int)
-    pillar_group['Completed_Projects'] = pillar_group['Completed_Projects'].astype(int)
-
-    fig_pillars = px.bar(
-        pillar_group,
-        x='JJM Strategic Pillars',
-        y=['Total_Projects', 'Completed_Projects'],
-        labels={'value': 'Number of Projects', 'variable': 'Project Status'},
-        title='Projects by JJM Strategic Pillars',
-        barmode='group'
-    )
-    st.plotly_chart(fig_pillars, use_container_width=True)
+    st.plotly_chart(figures["pillars"], use_container_width=True)
 
-    # Pie chart for Target Main Category
     st.subheader("Projects by Target Main Category")
-    category_counts = df['Target Main Category'].value_counts(dropna=True)
-    fig_category = px.pie(
-        names=category_counts.index,
-        values=category_counts.values,
-        title='Distribution of Projects by Main Category'
-    )
-    st.plotly_chart(fig_category, use_container_width=True)
+    st.plotly_chart(figures["category"], use_container_width=True)
 
-    # Bar chart for Target 16 Dimensions
     st.subheader("Projects by Target 16 Dimensions")
-    dims_counts = df['Target Sub Category'].value_counts()
-    dims_df = pd.DataFrame({'Target Sub Category': dims_counts.index, 'Count': dims_counts.values})
-    fig_dimensions = px.bar(
-        dims_df,
-        x='Target Sub Category',
-        y='Count',
-        labels={'x': 'Target Sub Category', 'y': 'Count'},
-        title='Number of Projects by Sub Category'
-    )
-    st.plotly_chart(fig_dimensions, use_container_width=True)
+    st.plotly_chart(figures["sub_category"], use_container_width=True)
 
-    # Grouped bar for Task Status by Manager
     st.subheader("Task Status by Manager")
-    status_by_manager = df.groupby(['Manager', 'Task Status']).size().unstack(fill_value=0)
-    if not status_by_manager.empty:
-        fig_manager_status = px.bar(
-            status_by_manager,
-            x=status_by_manager.index,
-            y=status_by_manager.columns,
-            labels={'value': 'Count', 'index': 'Manager'},
-            title='Task Status by Manager'
-        )
-        st.plotly_chart(fig_manager_status, use_container_width=True)
+    if figures["manager_status"] is not None:
+        st.plotly_chart(figures["manager_status"], use_container_width=True)
 
     # ========== Gantt Chart ==========
     st.subheader("Gantt Chart")
-    # For Gantt, we need 'Task', 'Start', 'Finish'
-    # We'll color by "Task Status"
-    # We'll skip rows missing Start or End
-    gantt_df = df.dropna(subset=["Start Date", "End Date"]).copy()
-    # Make sure they're strings recognized by px.timeline
-    gantt_df["Start"] = gantt_df["Start Date"].dt.strftime("%Y-%m-%d")
-    gantt_df["Finish"] = gantt_df["End Date"].dt.strftime("%Y-%m-%d")
-    if len(gantt_df):
-        fig_gantt = px.timeline(
-            gantt_df,
-            x_start="Start",
-            x_end="Finish",
-            y="Project Name",
-            color="Task Status",
-            hover_data=["Task Completion Rate", "Manager"],
-            title="Project Gantt Chart"
-        )
-        # Reverse y-axis so earliest project is at top
-        fig_gantt.update_yaxes(autorange="reversed")
-        st.plotly_chart(fig_gantt, use_container_width=True)
+    if figures["gantt"] is not None:
+        st.plotly_chart(figures["gantt"], use_container_width=True)
     else:
         st.info("No valid Start/End dates to display a Gantt chart.")
 
     # ========== Correlation Matrix for numeric columns ==========
     st.subheader("Correlation Matrix for Numeric Columns")
-    numeric_df = df.select_dtypes(include=['number'])
-    if len(numeric_df.columns) > 1:
-        corr_matrix = numeric_df.corr()
-        fig_corr = px.imshow(
-            corr_matrix,
-            labels=dict(x="Columns", y="Columns", color="Correlation"),
-            title="Correlation Matrix"
-        )
-        st.plotly_chart(fig_corr, use_container_width=True)
+    if figures["correlation"] is not None:
+        st.plotly_chart(figures["correlation"], use_container_width=True)
     else:
         st.write("Not enough numeric columns for correlation matrix.")
 
 
+@timed_span
+def visualize_training_analytics():
+    st.subheader("Training Analytics")
+    funnels = load_training_funnels(get_data_version("training"), current_tenant_id())
+    st.caption(f"Data as of {data_as_of()}")
+
+    overall = funnels["Role"][["Enrolled", "Started", "Completed"]].sum()
+    colA, colB, colC, colD = st.columns(4)
+    colA.metric("📚 Enrollments", int(overall["Enrolled"]))
+    colB.metric("🔄 Started", int(overall["Started"]))
+    colC.metric("✅ Completed", int(overall["Completed"]))
+    colD.metric("🎯 Completion", f"{(100.0 * overall['Completed'] / overall['Enrolled']) if overall['Enrolled'] else 0:.0f}%")
+
+    if not overall["Enrolled"]:
+        st.info("No training progress recorded yet.")
+        return
+
+    fig_funnel = px.funnel(
+        x=[overall["Enrolled"], overall["Started"], overall["Completed"]],
+        y=["Enrolled", "Started", "Completed"],
+        title="Overall Training Funnel"
+    )
+    reporting.apply_dark_layout(fig_funnel)
+    st.plotly_chart(fig_funnel, use_container_width=True)
+
+    dimension = st.radio("Break down by", list(funnels.keys()), horizontal=True, key="training_funnel_dimension")
+    funnel_df = funnels[dimension]
+    fig_breakdown = px.bar(
+        funnel_df,
+        x=dimension,
+        y=["Enrolled", "Started", "Completed"],
+        barmode="group",
+        labels={'value': 'Learners', 'variable': 'Stage'},
+        title=f"Completion Funnel by {dimension}"
+    )
+    reporting.apply_dark_layout(fig_breakdown, yaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)'))
+    st.plotly_chart(fig_breakdown, use_container_width=True)
+    st.dataframe(funnel_df, hide_index=True, use_container_width=True)
+
+
+def paginate(total, page_size, key):
+    """Renders a page picker and returns the (limit, offset) for the selected page."""
+    page_count = max((total - 1) // page_size + 1, 1)
+    page = st.number_input("Page", min_value=1, max_value=page_count, value=1, key=key)
+    st.caption(f"Page {page} of {page_count} ({total} rows)")
+    return page_size, (page - 1) * page_size
+
+
+def project_picker(label, key):
+    """Type-ahead project picker. Returns the selected (project_id, project_name), or None if nothing matches."""
+    prefix = st.text_input(f"{label}: type an ID or the start of a name", key=f"{key}_prefix").strip()
+    matches = find_projects(prefix)
+    if not matches:
+        st.info("No matching projects." if prefix else "No projects in the database yet.")
+        return None
+    if len(matches) == PROJECT_PICKER_LIMIT:
+        st.caption(f"Showing the first {PROJECT_PICKER_LIMIT} matches; keep typing to narrow the list.")
+    names = dict(matches)
+    project_id = st.selectbox(label, list(names), format_func=lambda pid: f"{pid} - {names[pid]}", key=key)
+    return project_id, names[project_id]
+
+
+def _merge_value(value):
+    # Form values and stored values differ in type (e.g. 50 vs 50.0, date vs 'YYYY-MM-DD')
+    if value is None:
+        return ""
+    if isinstance(value, (int, float)):
+        return str(float(value))
+    return str(value)
+
+def project_merge_view(base, mine):
+    """
+    Three-way merge after a rejected update: `base` is the row the editor loaded, `mine` the rejected
+    form values, and the current row is re-read. Fields changed on only one side merge automatically;
+    fields changed on both sides are resolved by the user. The merge is itself compare-and-swapped.
+    """
+    theirs = get_project_record(base.project_id)
+    if theirs is None:
+        st.error("This project has been deleted.")
+        st.session_state.pop("project_merge", None)
+        return
+    st.warning(f"Project {base.project_id} was changed by someone else while you were editing "
+               f"(version {base.row_version} → {theirs.row_version}). Review the merge below.")
+    merged, rows = {}, []
+    for field, label in zip(EDITABLE_PROJECT_FIELDS, reporting.PROJECT_COLUMNS[1:]):
+        b, t, m = (_merge_value(getattr(base, field)), _merge_value(getattr(theirs, field)),
+                   _merge_value(mine[field]))
+        if m == t or m == b:
+            continue  # no change of mine to apply over the current row
+        if t == b:
+            merged[field] = mine[field]
+            rows.append((label, b, t, m, "Yours"))
+            continue
+        choice = st.radio(f"{label}: both of you changed this", ["Keep current", "Use mine"],
+                          horizontal=True, key=f"merge_{base.project_id}_{field}")
+        if choice == "Use mine":
+            merged[field] = mine[field]
+        rows.append((label, b, t, m, "Yours" if choice == "Use mine" else "Current"))
+    if rows:
+        st.dataframe(pd.DataFrame(rows, columns=["Field", "Original", "Current", "Yours", "Result"]), hide_index=True)
+    else:
+        st.info("The other change already covers everything you edited.")
+
+    col_apply, col_discard = st.columns(2)
+    if col_apply.button("Apply Merge", key="merge_apply", disabled=not merged):
+        try:
+            apply_project_edits({theirs.project_id: merged}, {theirs.project_id: theirs.row_version})
+        except StaleProjectError:
+            st.error("The project changed again; review the updated merge.")
+        else:
+            st.session_state.update_project_base = get_project_record(theirs.project_id)
+            st.session_state.pop("project_merge", None)
+            rerun_with_notice("project_editor", f"Merged your changes into project {theirs.project_id}.")
+    if col_discard.button("Discard My Changes", key="merge_discard"):
+        st.session_state.update_project_base = theirs
+        st.session_state.pop("project_merge", None)
+        st.info("Kept the current version.")
+
+
 # ---------- 9) Sidebar with Logo and Text ----------
+LOGO_PATH = r'Jay jay  (2).png'
+LOGO_WIDTH = 250
+# Processed assets are published here and served by Streamlit at app/static/assets/
+STATIC_ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "assets")
+
+@st.cache_resource(show_spinner=False)
+def load_image_asset(path, width):
+    """
+    Decodes an image once per process, downsizes it to twice the display width (sharp on
+    high-DPI screens) and returns (png_bytes, static_url), or (None, None) if the file is missing.
+    With server.enableStaticServing on, the bytes are also written to a content-hashed file under
+    static/assets, served with ETag/Last-Modified so browsers can cache it; otherwise static_url is None.
+    """
+    if not os.path.exists(path):
+        return None, None
+    from PIL import Image
+    with Image.open(path) as image:
+        image.thumbnail((width * 2, width * 2), Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG", optimize=True)
+    data = buffer.getvalue()
+    if not st.get_option("server.enableStaticServing"):
+        return data, None
+    name = f"{hashlib.sha256(data).hexdigest()[:16]}.png"
+    try:
+        os.makedirs(STATIC_ASSET_DIR, exist_ok=True)
+        target = os.path.join(STATIC_ASSET_DIR, name)
+        if not os.path.exists(target):
+            with open(target, "wb") as f:
+                f.write(data)
+    except OSError:
+        return data, None
+    return data, f"app/static/assets/{name}"
+
 def display_sidebar():
     with st.sidebar:
-        logo_path = r'Jay jay  (2).png'
-        if os.path.exists(logo_path):
-            logo = Image.open(logo_path)
-            st.image(logo, width=250)
+        logo, logo_url = load_image_asset(LOGO_PATH, LOGO_WIDTH)
+        if logo_url:
+            st.markdown(f'<img src="{logo_url}" width="{LOGO_WIDTH}" alt="Jay Jay Group">', unsafe_allow_html=True)
+        elif logo:
+            st.image(logo, width=LOGO_WIDTH)
         
         st.markdown("""
         <div style="text-align: center; padding: 10px 0;">
@@ -1590,14 +2903,29 @@ def display_sidebar():
         st.markdown("---")
         
         if st.session_state.logged_in:
+            tenant_names = {t.tenant_id: t.tenant_name for t in get_all_tenants()}
             st.markdown(f"""
             <div style="background-color: rgba(255, 255, 255, 0.15); padding: 10px; border-radius: 5px; margin-bottom: 20px;">
                 <p style="margin: 0; font-size: 14px; color: #ecf0f1;">Logged in as</p>
                 <p style="margin: 0; font-weight: 600; color: #ecf0f1;">{st.session_state.role}</p>
+                <p style="margin: 0; font-size: 14px; color: #ecf0f1;">{tenant_names.get(st.session_state.tenant_id, "")}</p>
             </div>
             """, unsafe_allow_html=True)
+
+            # Group admins work inside one tenant at a time; the choice applies to everything below
+            if is_group_admin() and len(tenant_names) > 1:
+                st.session_state.active_tenant_id = st.selectbox(
+                    "Organization", list(tenant_names), format_func=tenant_names.get,
+                    index=list(tenant_names).index(current_tenant_id()) if current_tenant_id() in tenant_names else 0,
+                    key="tenant_switcher"
+                )
             
             if st.button("Logout", key="logout_button"):
+                audit("logout")
+                revoke_session_token(st.session_state.auth_token)
+                clear_session_cookie()
+                st.session_state.pop("active_tenant_id", None)
+                st.session_state.auth_token = None
                 st.session_state.logged_in = False
                 st.session_state.page = "login"
 
@@ -1639,12 +2967,12 @@ def login_page():
             if username and password:
                 result = login_user(username, password)
                 if result:
-                    st.session_state.logged_in = True
-                    st.session_state.user_id = result[0]
-                    st.session_state.role = result[3]
+                    start_session(result.user_id, result.role, result.tenant_id,
+                                  issue_session_token(result.user_id, result.role))
+                    st.session_state.session_handoff = auth.create_session_handoff(conn, result.user_id)
                     st.session_state.page = "dashboard"
                     st.success(f"Welcome {username}")
-                    st.experimental_rerun()
+                    st.rerun()
                 else:
                     st.error("Incorrect Username/Password")
             else:
@@ -1658,8 +2986,13 @@ def login_page():
         
         new_user = st.text_input("Username", key="signup_username")
         new_password = st.text_input("Password", type='password', key="signup_password")
-        all_depts = get_all_departments()
-        dept_names = [d[1] for d in all_depts] if all_depts else ["General"]
+        tenants = get_all_tenants()
+        signup_tenant = tenants[0]
+        if len(tenants) > 1:
+            signup_tenant = st.selectbox("Select Organization", tenants, format_func=lambda t: t.tenant_name,
+                                         key="signup_tenant")
+        all_depts = get_all_departments(signup_tenant.tenant_id)
+        dept_names = [d.department_name for d in all_depts] if all_depts else ["General"]
         department = st.selectbox("Select Department", dept_names, key="signup_department")
         role = st.selectbox("Select Role", ["Admin", "Manager", "User"], key="signup_role")
         
@@ -1671,8 +3004,11 @@ def login_page():
         
         if signup_button:
             if new_user and new_password:
-                add_user(new_user, new_password, role, department)
-                st.success("Account Created Successfully! Please Login.")
+                try:
+                    add_user(new_user, new_password, role, department, signup_tenant.tenant_id)
+                    st.success("Account Created Successfully! Please Login.")
+                except storage.IntegrityError:
+                    st.error(f"Username '{new_user}' is already taken.")
             else:
                 st.warning("Please enter all details to sign up.")
 
@@ -1699,6 +3035,407 @@ def show_16_dimension_tool():
     st.subheader("16-Dimension Industry 4.0 Assessment Tool")
     st.write("Coming soon...")
 
+# ---------- 10b) Admin Dashboard Fragments ----------
+# Each section below is an st.fragment: interacting with its widgets reruns only that section, not
+# the whole dashboard (user lists, the project dashboard charts). Multi-field inputs are st.forms, so
+# typing doesn't rerun anything until the form is submitted.
+
+def rerun_with_notice(key, message):
+    """
+    Ends a fragment's run with a full-app rerun, so views outside the fragment (such as the project
+    dashboard) pick up its write. show_notice(key) displays `message` on that rerun.
+    """
+    st.session_state[f"notice_{key}"] = message
+    st.rerun(scope="app")
+
+def show_notice(key):
+    message = st.session_state.pop(f"notice_{key}", None)
+    if message:
+        st.success(message)
+
+PROJECT_YEARS = ["2023-2024", "2025-2026", "2027-2028"]
+PROJECT_MAIN_CATEGORIES = {
+    "E2E Supply Chain Visibility & Connectivity": [
+        "Digitized Product Development", "Automation and Deskillment", "Seamless Connectivity"
+    ],
+    "Real-Time Data & Analytics": ["Predictive Analytics and Digitized Planning", "AI-Based Decision Making"],
+    "Organization Readiness": ["Digital Performance Management", "Cross-Functional Digitization"],
+}
+SIXTEEN_DIMENSIONS = [
+    "Management Mindset", "Strategy Roadmap", "Change Management Plan", "Technology Readiness",
+    "Data-Driven Decision Making", "Organizational Structure", "Process Digitization", "Talent Readiness",
+    "Supply Chain Integration", "Automation and Deskilling", "Predictive Analytics", "Customer Integration",
+    "Digital Product Development", "Real-Time Analytics", "Security and Compliance", "Continuous Improvement"
+]
+
+@st.fragment
+def project_editor_fragment():
+    st.markdown("""
+    <div style="max-width: 800px; margin: 0 auto; padding: 20px; background-color: white; 
+                border-radius: 10px; box-shadow: 0 4px 12px rgba(0,0,0,0.1);">
+        <h3 style="text-align: center; color: #2C3E50; margin-bottom: 20px;">Project Management</h3>
+    """, unsafe_allow_html=True)
+    show_notice("project_editor")
+
+    # ========== Project to update (optional); the form below adds a new project otherwise ==========
+    st.subheader("Update Existing Project")
+    selected_upd = project_picker("Select Project by ID", key="update_project_pick")
+    base = None
+    if selected_upd:
+        chosen_id = selected_upd[0]
+        # The version this editor started from; a save only lands if nobody has changed the row since
+        base = st.session_state.get("update_project_base")
+        if base is None or base.project_id != chosen_id:
+            base = st.session_state.update_project_base = get_project_record(chosen_id)
+            st.session_state.pop("project_merge", None)
+        st.caption(f"Editing version {base.row_version} of project {chosen_id}.")
+
+    # Outside the form, so the sub-category choices follow it immediately
+    target_main_category = st.selectbox("Target Main Category", list(PROJECT_MAIN_CATEGORIES),
+                                        key="target_main_category")
+
+    with st.form("project_form"):
+        project_name = st.text_input("Project Name", key="project_name")
+        year = st.selectbox("Year", PROJECT_YEARS, key="project_year")
+        jjm_strategic_pillars = st.text_input("JJM Strategic Pillars", key="jjm_strategic_pillars")
+        target_sub_category = st.selectbox("Target Sub Category", PROJECT_MAIN_CATEGORIES[target_main_category],
+                                           key="target_sub_category")
+        target_16_dimensions = st.selectbox("Target 16 Dimensions", SIXTEEN_DIMENSIONS, key="target_16_dimensions")
+
+        jjm_action_plan = st.text_area("JJM Action Plan and Tasks", key="jjm_action_plan")
+        start_date = st.date_input("Start Date", key="start_date")
+        end_date = st.date_input("End Date", key="end_date")
+        roadmap_captain = st.text_input("Roadmap Captain", key="roadmap_captain")
+        project_leaders = st.text_input("Project Leaders", key="project_leaders")
+        project_owners = st.text_input("Project Owners", key="project_owners")
+
+        task_status = st.selectbox("Task Status", reporting.STATUS_ORDER, key="task_status")
+        task_completion_rate = st.slider("Task Completion Rate", 0, 100, 0, key="task_completion_rate")
+        jjm_comments = st.text_area("JJM Comments", key="jjm_comments")
+        target_remark = st.text_area("Target Remark", key="target_remark")
+
+        # Assign project manager (users with role == Manager)
+        manager_opts = [u.username for u in get_users_by_role("Manager")]
+        manager = st.selectbox("Assign Project Manager", manager_opts, key="manager")
+
+        col1, col2 = st.columns(2)
+        add_project_button = col1.form_submit_button("Add Project", key="add_project_button",
+                                                     use_container_width=True)
+        update_project_button = col2.form_submit_button("Update Project Details", key="update_project_button",
+                                                        use_container_width=True, disabled=base is None)
+
+    st.markdown("</div>", unsafe_allow_html=True)
+
+    form_values = [
+        project_name, year, jjm_strategic_pillars, target_main_category,
+        target_sub_category, target_16_dimensions, jjm_action_plan, start_date,
+        end_date, roadmap_captain, project_leaders, project_owners, task_status,
+        task_completion_rate, jjm_comments, target_remark, manager
+    ]
+    if add_project_button:
+        add_project(*form_values)
+        rerun_with_notice("project_editor", f"Project '{project_name}' added successfully!")
+    if update_project_button and base is not None:
+        try:
+            update_project(base.project_id, *form_values, expected_version=base.row_version)
+        except StaleProjectError:
+            st.session_state.project_merge = dict(zip(
+                EDITABLE_PROJECT_FIELDS,
+                form_values[:7] + [str(start_date), str(end_date)] + form_values[9:]
+            ))
+        else:
+            st.session_state.update_project_base = get_project_record(base.project_id)
+            rerun_with_notice("project_editor", f"Project ID {base.project_id} updated successfully!")
+    if base is not None and "project_merge" in st.session_state:
+        project_merge_view(base, st.session_state.project_merge)
+
+@st.fragment
+def excel_import_fragment():
+    # ========== Section: Add/Update from Excel without crashing on missing columns ==========
+    st.subheader("Add/Update Projects from Excel (Optional)")
+    uploaded_files = st.file_uploader("Upload Excel Workbooks (all sheets are imported)", type=["xlsx", "xls"],
+                                      accept_multiple_files=True, key="excel_import_files")
+    if uploaded_files and st.button("Import Workbooks", key="excel_import_button"):
+        try:
+            results = process_excel_files(uploaded_files)
+        except Exception as e:
+            st.error(f"Excel import failed: {e}")
+        else:
+            # Shown after the full rerun that refreshes the dashboard
+            st.session_state.excel_import_results = results
+            st.rerun(scope="app")
+
+    results = st.session_state.pop("excel_import_results", None)
+    if results is not None:
+        st.success(
+            f"Imported {len(results)} sheets: {sum(r.get('inserted', 0) for r in results)} projects inserted, "
+            f"{sum(r.get('updated', 0) for r in results)} updated."
+        )
+        st.dataframe(pd.DataFrame([
+            (r["workbook"], r["sheet"], r["rows_read"], r.get("inserted", 0), r.get("updated", 0),
+             len(r["skipped"]), r["mapping_source"] or "", ", ".join(r["missing_fields"]), r["error"] or "")
+            for r in results
+        ], columns=["Workbook", "Sheet", "Rows", "Inserted", "Updated", "Skipped", "Mapping",
+                    "Unmatched Fields", "Error"]), hide_index=True)
+        skipped = [(r["workbook"], r["sheet"], row, reason) for r in results for row, reason in r["skipped"]]
+        if skipped:
+            with st.expander(f"{len(skipped)} rows skipped"):
+                st.dataframe(pd.DataFrame(skipped, columns=["Workbook", "Sheet", "Row", "Reason"]),
+                             hide_index=True)
+
+@st.fragment
+def mapping_profiles_fragment():
+    # ========== Section: Column mapping profiles ==========
+    profiles = get_mapping_profiles()
+    with st.expander(f"Excel Column Mapping Profiles ({len(profiles)})"):
+        if not profiles:
+            st.info("No profiles yet. A profile is saved for each new header layout on import.")
+            return
+        profile_labels = {f"{name} (last used {last_used or '-'})": fp
+                          for fp, name, _, _, last_used in profiles}
+        selected_fp = profile_labels[st.selectbox("Profile", list(profile_labels), key="mapping_profile_select")]
+        _, p_name, p_headers, p_mapping, _ = next(p for p in profiles if p[0] == selected_fp)
+        new_name = st.text_input("Profile Name", value=p_name, key=f"mapping_profile_name_{selected_fp}")
+        edited = st.data_editor(
+            pd.DataFrame({"Excel Header": p_headers,
+                          "DB Field": [p_mapping.get(h, "") for h in p_headers]}),
+            column_config={
+                "Excel Header": st.column_config.TextColumn(disabled=True),
+                "DB Field": st.column_config.SelectboxColumn(options=[""] + excel_import.PROJECT_FIELDS),
+            },
+            hide_index=True, key=f"mapping_profile_editor_{selected_fp}"
+        )
+        col_save, col_delete = st.columns(2)
+        if col_save.button("Save Profile", key="mapping_profile_save"):
+            save_mapping_profile(selected_fp, new_name,
+                                 dict(zip(edited["Excel Header"], edited["DB Field"].fillna(""))))
+            st.success("Profile saved.")
+        if col_delete.button("Delete Profile", key="mapping_profile_delete"):
+            delete_mapping_profile(selected_fp)
+            st.success("Profile deleted; this layout will be re-resolved on its next import.")
+
+@st.fragment
+def columnar_import_fragment():
+    # ========== Section: Columnar import ==========
+    st.subheader("Import Portfolio from Parquet/Arrow (Optional)")
+    show_notice("columnar_import")
+    columnar_file = st.file_uploader(
+        "Upload projects / dimensions / user_progress .parquet or .arrow file",
+        type=["parquet", "arrow"], key="columnar_import_file"
+    )
+    if columnar_file is not None and st.button("Import File", key="columnar_import_button"):
+        try:
+            table, rows, skipped = import_columnar_file(columnar_file)
+        except Exception as e:
+            st.error(f"Import failed: {e}")
+        else:
+            notice = f"Imported {rows} rows into {table}."
+            if skipped:
+                notice += f" Skipped {len(skipped)} IDs that belong to another organization: {skipped[:20]}"
+            rerun_with_notice("columnar_import", notice)
+
+@st.fragment
+def project_grid_fragment():
+    # ========== Section: Inline project grid ==========
+    st.subheader("Edit Projects Inline")
+    show_notice("project_grid")
+    limit, offset = paginate(count_projects(), 50, key="project_grid_page")
+    grid_df = pd.DataFrame(get_projects_page(limit, offset), columns=VersionedProject._fields)
+    # Bumped after each save so the editor starts from the freshly written rows. edited_rows holds
+    # row positions, so the key also carries the page's project IDs: edits never follow a page change
+    page_ids = hashlib.sha256(",".join(str(pid) for pid in grid_df["project_id"]).encode()).hexdigest()[:12]
+    grid_key = f"project_grid_{st.session_state.get('project_grid_rev', 0)}_{page_ids}"
+    st.data_editor(
+        grid_df,
+        column_config={
+            **{field: label for field, label in zip(reporting.PROJECT_FIELDS, reporting.PROJECT_COLUMNS)},
+            "project_id": st.column_config.NumberColumn("ID", disabled=True),
+            "task_status": st.column_config.SelectboxColumn("Task Status", options=reporting.STATUS_ORDER),
+            "task_completion_rate": st.column_config.NumberColumn("Task Completion Rate", min_value=0, max_value=100),
+            "row_version": st.column_config.NumberColumn("Version", disabled=True),
+        },
+        hide_index=True, num_rows="fixed", key=grid_key
+    )
+    # Only the cells the user touched, keyed by grid row position
+    edited_rows = st.session_state.get(grid_key, {}).get("edited_rows", {})
+    if edited_rows:
+        st.caption(f"{sum(len(v) for v in edited_rows.values())} cells changed in {len(edited_rows)} projects.")
+    if st.button("Save Grid Changes", key="project_grid_save", disabled=not edited_rows):
+        edits = {int(grid_df.at[int(row), "project_id"]): changes for row, changes in edited_rows.items()}
+        versions = {int(grid_df.at[int(row), "project_id"]): int(grid_df.at[int(row), "row_version"])
+                    for row in edited_rows}
+        try:
+            updated = apply_project_edits(edits, versions)
+        except StaleProjectError as e:
+            # Reload the page so the editor shows the other changes; the user re-applies theirs
+            st.session_state.project_grid_rev = st.session_state.get("project_grid_rev", 0) + 1
+            st.error(f"Nothing saved: {e} while you were editing. The grid has been reloaded.")
+        except storage.DatabaseError as e:
+            st.error(f"Saving failed: {e}")
+        else:
+            st.session_state.project_grid_rev = st.session_state.get("project_grid_rev", 0) + 1
+            rerun_with_notice("project_grid", f"Saved changes to {updated} projects.")
+
+@st.fragment
+def bulk_departments_fragment():
+    st.subheader("Bulk Import Departments (CSV/Excel)")
+    show_notice("bulk_departments")
+    dept_file = st.file_uploader("Upload file with a 'department_name' column",
+                                 type=["csv", "xlsx", "xls"], key="dept_bulk_file")
+    if dept_file is not None and st.button("Import Departments", key="import_depts_button"):
+        try:
+            dept_df = read_tabular_upload(dept_file)
+            if "department_name" not in dept_df.columns:
+                st.error("File must have a 'department_name' column.")
+            else:
+                inserted = bulk_add_departments(dept_df["department_name"].dropna().tolist())
+                # The department list below lives outside this fragment
+                rerun_with_notice("bulk_departments", f"Imported {inserted} new departments.")
+        except Exception as e:
+            st.error(f"Import failed: {e}")
+
+@st.fragment
+def bulk_users_fragment():
+    st.subheader("Bulk Import Users (CSV/Excel)")
+    user_file = st.file_uploader("Upload file with 'username', 'password', 'role' and 'department' columns",
+                                 type=["csv", "xlsx", "xls"], key="user_bulk_file")
+    if user_file is not None and st.button("Import Users", key="import_users_button"):
+        try:
+            rows, rejected = validate_user_rows(read_tabular_upload(user_file))
+            users_inserted, depts_inserted = bulk_add_users(rows)
+        except Exception as e:
+            st.error(f"Import failed: {e}")
+        else:
+            # Shown after the full rerun that refreshes the user list
+            st.session_state.bulk_users_result = (len(rows), users_inserted, depts_inserted, rejected)
+            st.rerun(scope="app")
+
+    result = st.session_state.pop("bulk_users_result", None)
+    if result is not None:
+        valid_rows, users_inserted, depts_inserted, rejected = result
+        st.success(f"Imported {users_inserted} new users "
+                   f"({valid_rows - users_inserted} already existed, {depts_inserted} departments created).")
+        if rejected:
+            st.warning(f"{len(rejected)} rows were rejected:")
+            st.dataframe(pd.DataFrame(rejected, columns=["Row", "Reason"]), hide_index=True)
+
+@st.fragment
+def users_list_fragment():
+    st.subheader("Users")
+    limit, offset = paginate(count_users(), 100, key="users_page")
+    st.dataframe(pd.DataFrame(get_users_page(limit, offset), columns=["ID", "Username", "Role", "Department"]),
+                 hide_index=True, use_container_width=True)
+
+@st.fragment
+def project_status_fragment():
+    st.subheader("Update Project Status")
+
+    selected_project = project_picker("Select Project", key="status_project_pick")
+    if selected_project:
+        pid, selected_project_name = selected_project
+        st.info(f"Selected Project: **{selected_project_name}**")
+        new_status = st.selectbox("New Status", reporting.STATUS_ORDER)
+        if st.button("Update Status"):
+            update_project_status(pid, new_status)
+            st.success(f"Updated '{selected_project_name}' to status: {new_status}")
+
+@st.fragment
+def bulk_status_fragment():
+    # ========== Section: Bulk status update ==========
+    st.subheader("Bulk Status Update")
+    select_by = st.radio("Select projects by", ["Filter", "Pick Projects"], horizontal=True, key="bulk_select_by")
+    bulk_ids, bulk_filters = None, None
+    if select_by == "Filter":
+        filter_options = load_project_filter_options(get_data_version("projects"), current_tenant_id())
+        filter_cols = st.columns(len(BULK_FILTER_FIELDS))
+        bulk_filters = {
+            field: col.multiselect(label, filter_options[field], key=f"bulk_filter_{field}")
+            for col, (field, label) in zip(filter_cols, BULK_FILTER_FIELDS.items())
+        }
+        match_count = count_filtered_projects(bulk_filters) if has_project_filters(bulk_filters) else 0
+        st.caption(f"{match_count} projects match the selected filters.")
+    else:
+        picked = st.session_state.get("bulk_pick_ids", [])
+        prefix = st.text_input("Find projects: type an ID or the start of a name", key="bulk_pick_prefix").strip()
+        # Keep earlier picks selectable while the search text changes
+        refs = {ref.project_id: ref.project_name for ref in get_project_refs(picked) + find_projects(prefix)}
+        bulk_ids = st.multiselect("Projects", list(refs), format_func=lambda pid: f"{pid} - {refs[pid]}",
+                                  key="bulk_pick_ids")
+        match_count = len(bulk_ids)
+
+    bulk_status = st.selectbox("New Status", reporting.STATUS_ORDER, key="bulk_new_status")
+    set_rate = st.checkbox("Also set Task Completion Rate", key="bulk_set_rate")
+    bulk_rate = st.slider("Task Completion Rate", 0, 100, 100, key="bulk_rate") if set_rate else None
+    if st.button(f"Apply to {match_count} Projects", key="bulk_apply_button", disabled=not match_count):
+        try:
+            changed = bulk_update_project_status(bulk_status, bulk_rate, project_ids=bulk_ids, filters=bulk_filters)
+        except storage.DatabaseError + (ValueError,) as e:
+            st.error(f"Bulk update failed: {e}")
+        else:
+            st.success(f"Updated {changed} projects to status: {bulk_status}")
+
+@st.fragment
+def project_archive_fragment():
+    st.subheader("Archive Completed Projects")
+    show_notice("project_archive")
+    keep_periods = int(st.number_input("Ended periods to keep live", min_value=0, max_value=10,
+                                       value=ARCHIVE_KEEP_PERIODS, step=1, key="archive_keep_periods"))
+    candidates = get_archive_candidates(keep_periods)
+    if candidates:
+        st.caption("Due for archiving: " + ", ".join(f"{p} ({n} projects)" for p, n in candidates.items()))
+    else:
+        st.caption("No completed projects are due for archiving.")
+    if st.button(f"Archive {sum(candidates.values())} Projects", key="archive_projects_button",
+                 disabled=not candidates):
+        try:
+            moved = archive_projects(keep_periods)
+        except storage.DatabaseError as e:
+            st.error(f"Archiving failed: {e}")
+        else:
+            # The project dashboard lives outside this fragment
+            rerun_with_notice("project_archive", f"Archived {moved} projects.")
+
+    archived = get_archived_periods()
+    if archived:
+        restore_periods = st.multiselect("Restore archived years", list(archived),
+                                         format_func=lambda p: f"{p} ({archived[p]} projects)",
+                                         key="restore_archived_periods")
+        if st.button("Restore to Live Projects", key="restore_archived_button", disabled=not restore_periods):
+            try:
+                restored = restore_archived_projects(restore_periods)
+            except storage.DatabaseError as e:
+                # e.g. a live project has since taken one of the archived IDs
+                st.error(f"Nothing restored: {e}")
+            else:
+                rerun_with_notice("project_archive", f"Restored {restored} projects.")
+
+@st.fragment
+def learner_progress_fragment():
+    st.subheader("Learner Progress")
+    total_learners = count_learners()
+    if total_learners:
+        limit, offset = paginate(total_learners, 50, key="learner_page")
+        learners = get_learner_progress_page(limit, offset)
+        st.dataframe(pd.DataFrame(learners, columns=[
+            "Username", "Department", "Role", "Enrolled", "In Progress", "Completed", "Completion %"
+        ]), hide_index=True, use_container_width=True)
+    else:
+        st.info("No learner progress recorded yet.")
+
+@st.fragment
+def project_search_fragment():
+    search_text = st.text_input("Search projects (name, action plan, comments, remarks)", key="project_search")
+    if search_text.strip():
+        total = count_search_results(search_text)
+        if total:
+            limit, offset = paginate(total, 25, key="project_search_page")
+            st.dataframe(pd.DataFrame(
+                search_projects(search_text, limit, offset),
+                columns=["ID", "Project Name", "Task Status", "Manager", "Match"]
+            ), hide_index=True)
+        else:
+            st.info("No projects match your search.")
+
 # ---------- 11) Admin Dashboard ----------
 def admin_dashboard(user_id):
     # Apply professional theme
@@ -1805,6 +3542,11 @@ def admin_dashboard(user_id):
         color: white;
     }
     
+    .tab-analytics {
+        background: linear-gradient(135deg, #ee0979, #ff6a00);
+        color: white;
+    }
+    
     /* Tab shimmer effect */
     .admin-tab::after {
         content: '';
@@ -1877,6 +3619,10 @@ def admin_dashboard(user_id):
             <div class="tab-icon">🔄</div>
             <div class="tab-text">Status</div>
         </div>
+        <div class="admin-tab tab-analytics" onclick="selectTab('Training Analytics')">
+            <div class="tab-icon">📚</div>
+            <div class="tab-text">Training Analytics</div>
+        </div>
     </div>
 
     <script>
@@ -1906,6 +3652,7 @@ def admin_dashboard(user_id):
         else if (tabName === 'View Reports') selectedTab = document.querySelector('.tab-reports');
         else if (tabName === '16-Dimension Tool') selectedTab = document.querySelector('.tab-dimensions');
         else if (tabName === 'Update Project Status') selectedTab = document.querySelector('.tab-status');
+        else if (tabName === 'Training Analytics') selectedTab = document.querySelector('.tab-analytics');
         
         if (selectedTab) selectedTab.classList.add('active');
     }
@@ -1928,10 +3675,14 @@ def admin_dashboard(user_id):
         "Manage Training",
         "View Reports",
         "16-Dimension Tool",
-        "Update Project Status"
+        "Update Project Status",
+        "Training Analytics"
     ]
+    if is_group_admin():
+        menu.append("Manage Tenants")
     
     choice = st.radio("", menu, horizontal=True)
+    count_view(f"admin/{choice}")
 
     if choice == "Manage Departments":
         st.markdown("""
@@ -1940,16 +3691,21 @@ def admin_dashboard(user_id):
             <h3 style="text-align: center; color: #2C3E50; margin-bottom: 20px;">Department Management</h3>
         """, unsafe_allow_html=True)
         
-        department_name = st.text_input("Department Name", key="department_name")
-        col1, col2, col3 = st.columns([1,2,1])
-        with col2:
-            add_dept_button = st.button("Add Department", key="add_dept_button", use_container_width=True)
+        with st.form("add_department_form"):
+            department_name = st.text_input("Department Name", key="department_name")
+            col1, col2, col3 = st.columns([1,2,1])
+            with col2:
+                add_dept_button = st.form_submit_button("Add Department", key="add_dept_button",
+                                                        use_container_width=True)
         
         st.markdown("</div>", unsafe_allow_html=True)
         
         if add_dept_button:
             add_department(department_name)
             st.success(f"Department {department_name} added successfully!")
+
+        bulk_departments_fragment()
+
         st.write(pd.DataFrame(get_all_departments(), columns=["ID", "Department Name"]))
 
     elif choice == "Manage Users":
@@ -1959,187 +3715,82 @@ def admin_dashboard(user_id):
             <h3 style="text-align: center; color: #2C3E50; margin-bottom: 20px;">User Management</h3>
         """, unsafe_allow_html=True)
         
-        username = st.text_input("Username", key="admin_username")
-        password = st.text_input("Password", type='password', key="admin_password")
-        depts = get_all_departments()
-        dept_names = [d[1] for d in depts] if depts else ["General"]
-        department = st.selectbox("Select Department", dept_names, key="admin_department")
-        role = st.selectbox("Role", ["Admin", "Manager", "User"], key="admin_role")
-        
-        col1, col2, col3 = st.columns([1,2,1])
-        with col2:
-            add_user_button = st.button("Add User", key="add_user_button", use_container_width=True)
+        with st.form("add_user_form"):
+            username = st.text_input("Username", key="admin_username")
+            password = st.text_input("Password", type='password', key="admin_password")
+            depts = get_all_departments()
+            dept_names = [d.department_name for d in depts] if depts else ["General"]
+            department = st.selectbox("Select Department", dept_names, key="admin_department")
+            role = st.selectbox("Role", USER_ROLES, key="admin_role")
+            
+            col1, col2, col3 = st.columns([1,2,1])
+            with col2:
+                add_user_button = st.form_submit_button("Add User", key="add_user_button", use_container_width=True)
         
         st.markdown("</div>", unsafe_allow_html=True)
         
         if add_user_button:
             if username and password:
-                add_user(username, password, role, department)
-                st.success(f"User {username} added successfully!")
+                try:
+                    add_user(username, password, role, department)
+                    st.success(f"User {username} added successfully!")
+                except storage.IntegrityError:
+                    st.error(f"Username '{username}' already exists.")
             else:
                 st.warning("Please provide all user details.")
-        st.write(pd.DataFrame(get_all_users(), columns=["ID", "Username", "Password", "Role", "Department"]))
 
-    elif choice == "Manage Projects":
-        st.markdown("""
-        <div style="max-width: 800px; margin: 0 auto; padding: 20px; background-color: white; 
-                    border-radius: 10px; box-shadow: 0 4px 12px rgba(0,0,0,0.1);">
-            <h3 style="text-align: center; color: #2C3E50; margin-bottom: 20px;">Project Management</h3>
-        """, unsafe_allow_html=True)
-        
-        project_name = st.text_input("Project Name", key="project_name")
-        year = st.selectbox("Year", ["2023-2024", "2025-2026", "2027-2028"], key="project_year")
-        jjm_strategic_pillars = st.text_input("JJM Strategic Pillars", key="jjm_strategic_pillars")
-        main_cat = ["E2E Supply Chain Visibility & Connectivity", "Real-Time Data & Analytics", "Organization Readiness"]
-        target_main_category = st.selectbox("Target Main Category", main_cat, key="target_main_category")
+        bulk_users_fragment()
+        users_list_fragment()
 
-        if target_main_category == "E2E Supply Chain Visibility & Connectivity":
-            sub_cat_opts = ["Digitized Product Development", "Automation and Deskillment", "Seamless Connectivity"]
-        elif target_main_category == "Real-Time Data & Analytics":
-            sub_cat_opts = ["Predictive Analytics and Digitized Planning", "AI-Based Decision Making"]
-        else:
-            sub_cat_opts = ["Digital Performance Management", "Cross-Functional Digitization"]
-        target_sub_category = st.selectbox("Target Sub Category", sub_cat_opts, key="target_sub_category")
-
-        sixteen_dims = [
-            "Management Mindset", "Strategy Roadmap", "Change Management Plan", "Technology Readiness",
-            "Data-Driven Decision Making", "Organizational Structure", "Process Digitization", "Talent Readiness",
-            "Supply Chain Integration", "Automation and Deskilling", "Predictive Analytics", "Customer Integration",
-            "Digital Product Development", "Real-Time Analytics", "Security and Compliance", "Continuous Improvement"
-        ]
-        target_16_dimensions = st.selectbox("Target 16 Dimensions", sixteen_dims, key="target_16_dimensions")
-
-        jjm_action_plan = st.text_area("JJM Action Plan and Tasks", key="jjm_action_plan")
-        start_date = st.date_input("Start Date", key="start_date")
-        end_date = st.date_input("End Date", key="end_date")
-        roadmap_captain = st.text_input("Roadmap Captain", key="roadmap_captain")
-        project_leaders = st.text_input("Project Leaders", key="project_leaders")
-        project_owners = st.text_input("Project Owners", key="project_owners")
-
-        task_status_list = [
-            "Not Started", "In Progress", "Trial Done", "In Testing",
-            "Production Deployed", "Running", "Completed"
-        ]
-        task_status = st.selectbox("Task Status", task_status_list, key="task_status")
-        task_completion_rate = st.slider("Task Completion Rate", 0, 100, 0, key="task_completion_rate")
-        jjm_comments = st.text_area("JJM Comments", key="jjm_comments")
-        target_remark = st.text_area("Target Remark", key="target_remark")
-
-        # Assign project manager (users with role == Manager)
-        all_users = get_all_users()
-        manager_opts = [u[1] for u in all_users if u[3] == "Manager"]
-        manager = st.selectbox("Assign Project Manager", manager_opts, key="manager")
-
-        col1, col2, col3 = st.columns([1,2,1])
-        with col2:
-            add_project_button = st.button("Add Project", key="add_project_button", use_container_width=True)
-        
-        st.markdown("</div>", unsafe_allow_html=True)
-        
-        if add_project_button:
-            add_project(
-                project_name, year, jjm_strategic_pillars, target_main_category,
-                target_sub_category, target_16_dimensions, jjm_action_plan, start_date,
-                end_date, roadmap_captain, project_leaders, project_owners, task_status,
-                task_completion_rate, jjm_comments, target_remark, manager
-            )
-            st.success(f"Project '{project_name}' added successfully!")
-
-        # ========== Section: Add/Update from Excel without crashing on missing columns ==========
-        st.subheader("Add/Update Projects from Excel (Optional)")
-        uploaded_file = st.file_uploader("Upload Excel File", type=["xlsx", "xls"])
-        if uploaded_file is not None:
-            process_excel_file(uploaded_file)
-
-        # ========== Section: Update Project by ID ==========
-        st.subheader("Update Existing Project")
-        all_projects = get_all_projects()
-        if all_projects:
-            project_id_list = [(p[0], p[1]) for p in all_projects]  # (ID, Name)
-            sel_texts = [f"{pid} - {pname}" for pid, pname in project_id_list]
-            selected_upd = st.selectbox("Select Project by ID", sel_texts)
-            # Parse the selection
-            if selected_upd:
-                chosen_id = int(selected_upd.split(" - ")[0])
-                if st.button("Update Project Details"):
-                    update_project(
-                        chosen_id,
-                        project_name,
-                        year,
-                        jjm_strategic_pillars,
-                        target_main_category,
-                        target_sub_category,
-                        target_16_dimensions,
-                        jjm_action_plan,
-                        start_date,
-                        end_date,
-                        roadmap_captain,
-                        project_leaders,
-                        project_owners,
-                        task_status,
-                        task_completion_rate,
-                        jjm_comments,
-                        target_remark,
-                        manager
-                    )
-                    st.success(f"Project ID {chosen_id} updated successfully!")
-        else:
-            st.info("No projects in the database yet.")
+    elif choice == "Manage Projects":
+        project_editor_fragment()
+        excel_import_fragment()
+        mapping_profiles_fragment()
+        columnar_import_fragment()
+        project_grid_fragment()
 
-        # Show Visualization
+        # Show Visualization; the fragments above rerun without rebuilding it
         visualize_projects()
 
     elif choice == "Update Project Status":
-        st.subheader("Update Project Status")
-
-        all_projects = get_all_projects()
-        if all_projects:
-            # We'll show the project name instead of ID
-            name_dict = {p[1]: p[0] for p in all_projects}  # {Name:ID}
-            selected_project_name = st.selectbox("Select Project", list(name_dict.keys()))
-            st.info(f"Selected Project: **{selected_project_name}**")
-            new_status_list = [
-                "Not Started", "In Progress", "Trial Done", "In Testing",
-                "Production Deployed", "Running", "Completed"
-            ]
-            new_status = st.selectbox("New Status", new_status_list)
-            if st.button("Update Status"):
-                pid = name_dict[selected_project_name]
-                update_project_status(pid, new_status)
-                st.success(f"Updated '{selected_project_name}' to status: {new_status}")
-        else:
-            st.info("No projects found to update.")
+        project_status_fragment()
+        bulk_status_fragment()
+        project_archive_fragment()
 
     elif choice == "Manage Training":
         st.subheader("Training Management")
-        title = st.text_input("Training Title", key="training_title")
-        description = st.text_area("Training Description", key="training_description")
-        schedule = st.date_input("Schedule Date", key="training_schedule")
-        material = st.file_uploader("Upload Training Material", type=["pdf", "docx", "pptx"], key="training_material")
-        
-        material_path = None
-        if material is not None:
-            material_path = f"training_materials/{material.name}"
-            if not os.path.exists('training_materials'):
-                os.makedirs('training_materials')
-            with open(material_path, "wb") as f:
-                f.write(material.getbuffer())
-            st.success(f"Uploaded {material.name} successfully!")
-
-        if st.button("Add Training"):
-            if material_path:
-                c.execute('''
-                    INSERT INTO training_sessions (title, description, schedule, material_path)
-                    VALUES (?, ?, ?, ?)
-                ''', (title, description, str(schedule), material_path))
-                conn.commit()
-                st.success("Training Session Added!")
+        with st.form("add_training_form"):
+            title = st.text_input("Training Title", key="training_title")
+            description = st.text_area("Training Description", key="training_description")
+            schedule = st.date_input("Schedule Date", key="training_schedule")
+            material = st.file_uploader("Upload Training Material", type=["pdf", "docx", "pptx"],
+                                        key="training_material")
+            add_training_button = st.form_submit_button("Add Training")
+
+        if add_training_button:
+            if material is not None:
+                # Stored only on submit; identical files share one blob
+                material_sha256 = store_training_material(material)
+                add_training_session(title, description, schedule, material_sha256)
+                st.success(f"Training Session Added with material {material.name}!")
             else:
                 st.error("Please upload the training material before adding the session.")
 
+        learner_progress_fragment()
+
     elif choice == "View Reports":
         st.subheader("Reports and Analysis")
-        projects = get_all_projects()
+        project_search_fragment()
+
+        # Archived projects are only loaded when the report asks for their years
+        archived = get_archived_periods()
+        archived_periods = st.multiselect(
+            "Include archived years", list(archived), format_func=lambda p: f"{p} ({archived[p]} projects)",
+            key="report_archived_periods"
+        ) if archived else []
+        with analytics_connection() as report_conn:
+            projects = get_all_projects(archived_periods, report_conn)
+        st.caption(f"Data as of {data_as_of()}")
         df = pd.DataFrame(projects, columns=[
             "ID", "Project Name", "Year", "JJM Strategic Pillars",
             "Target Main Category", "Target Sub Category", "Target 16 Dimensions",
@@ -2156,10 +3807,45 @@ def admin_dashboard(user_id):
             file_name="project_report.csv",
             mime='text/csv'
         )
+        st.download_button(
+            "Download as Parquet",
+            export_projects_parquet,
+            file_name="projects.parquet",
+            mime="application/vnd.apache.parquet"
+        )
+        st.download_button(
+            "Download HTML Report",
+            lambda: reporting.render_html_report(reporting.prepare_projects_frame(df.copy())),
+            file_name="project_report.html",
+            mime='text/html'
+        )
 
     elif choice == "16-Dimension Tool":
         show_16_dimension_tool()
 
+    elif choice == "Training Analytics":
+        visualize_training_analytics()
+
+    elif choice == "Manage Tenants":
+        st.subheader("Organizations and Plants")
+        with st.form("add_tenant_form"):
+            tenant_name = st.text_input("Organization / Plant Name", key="tenant_name")
+            add_tenant_button = st.form_submit_button("Add Organization")
+
+        if add_tenant_button:
+            if not tenant_name.strip():
+                st.warning("Please enter a name.")
+            else:
+                try:
+                    add_tenant(tenant_name.strip())
+                    st.success(f"Organization '{tenant_name.strip()}' added. Switch to it from the sidebar.")
+                except storage.IntegrityError:
+                    st.error(f"An organization named '{tenant_name.strip()}' already exists.")
+
+        st.dataframe(pd.DataFrame(get_tenant_overview(), columns=[
+            "ID", "Organization", "Users", "Projects", "Training Sessions"
+        ]), hide_index=True, use_container_width=True)
+
 # ---------- 12) Manager Dashboard ----------
 def manager_dashboard(user_id):
     # Apply professional theme
@@ -2176,6 +3862,7 @@ def manager_dashboard(user_id):
     """, unsafe_allow_html=True)
     
     st.subheader("Project Management and Reporting")
+    count_view("manager/dashboard")
     visualize_projects()
 
 # ---------- 13) User Dashboard ----------
@@ -2194,18 +3881,81 @@ def user_dashboard(user_id):
     """, unsafe_allow_html=True)
     
     st.subheader("Your Assigned Tasks and Progress")
-    progress = get_user_progress(user_id)
-    if progress:
-        for record in progress:
-            st.write(f"Session {record[0]}: {record[1]}")
+    count_view("user/dashboard")
+    enrolled, in_progress, completed, completion_pct = get_user_training_summary(user_id)
+    colA, colB, colC, colD = st.columns(4)
+    colA.metric("📚 Enrolled", enrolled)
+    colB.metric("🔄 In Progress", in_progress)
+    colC.metric("✅ Completed", completed)
+    colD.metric("🎯 Completion", f"{completion_pct:.0f}%")
+    st.progress(min(int(completion_pct), 100))
+
+    sessions = get_user_training_sessions(user_id)
+    if sessions:
+        sessions_df = pd.DataFrame(sessions, columns=[
+            "ID", "Title", "Description", "Schedule", "Material Path", "Status", "Last Updated",
+            "Material", "Content Type"
+        ])
+        st.dataframe(sessions_df.drop(columns=["Material Path", "Content Type"]),
+                     hide_index=True, use_container_width=True)
+
+        session_texts = [f"{s[0]} - {s[1]}" for s in sessions]
+        selected_session = st.selectbox("Select Session", session_texts, key="progress_session")
+        selected_row = sessions[session_texts.index(selected_session)]
+        current_status = selected_row[5]
+
+        material_path = selected_row[4]
+        if material_path and os.path.exists(material_path):
+            # Served by server.py straight from disk in fixed-size chunks, never held in memory whole
+            st.link_button("Download Material", auth.MATERIAL_ROUTE.format(session_id=selected_row[0]))
+        new_status = st.selectbox(
+            "Your Status", TRAINING_STATUSES,
+            index=TRAINING_STATUSES.index(current_status) if current_status in TRAINING_STATUSES else 0,
+            key="progress_status"
+        )
+        if st.button("Update Progress", key="update_progress_button"):
+            set_user_progress(user_id, int(selected_session.split(" - ")[0]), new_status)
+            st.success(f"Progress updated to: {new_status}")
+            st.rerun()
     else:
         st.write("No progress recorded yet.")
 
+    st.subheader("Available Training Sessions")
+    available = get_available_training_sessions(user_id)
+    if available:
+        available_texts = [f"{s[0]} - {s[1]} ({s[2]})" for s in available]
+        selected_available = st.selectbox("Select Training", available_texts, key="enroll_session")
+        if st.button("Enroll", key="enroll_button"):
+            set_user_progress(user_id, int(selected_available.split(" - ")[0]), "Not Started")
+            st.success("Enrolled successfully!")
+            st.rerun()
+    else:
+        st.info("You are enrolled in every available training session.")
+
 # ---------- 14) Main Function ----------
 def main():
     # Apply professional theme everywhere
     st.markdown(set_professional_theme(), unsafe_allow_html=True)
     
+    # A new browser session (reload, reconnect to another replica) resumes from the session cookie
+    if not st.session_state.logged_in:
+        token = session_cookie_token()
+        session = validate_session_token(token) if token else None
+        if session is not None:
+            start_session(*session, token)
+            st.session_state.page = "dashboard"
+
+    # Reruns are authorized by the signed session token; the password is only checked at login
+    if st.session_state.logged_in:
+        session = validate_session_token(st.session_state.auth_token)
+        if session is None:
+            st.session_state.logged_in = False
+            st.session_state.auth_token = None
+            st.session_state.page = "login"
+        else:
+            st.session_state.user_id, st.session_state.role, st.session_state.tenant_id = session
+            set_session_cookie()
+
     if st.session_state.logged_in:
         if st.session_state.role == "Admin":
             admin_dashboard(st.session_state.user_id)
@@ -0,0 +1,121 @@
+"""
+Login sessions.
+
+A session token is "<user_id>.<expires_at>.<nonce>.<hmac>", signed with the
+app's secret (APP_SECRET_KEY, else a random one kept in app_settings); only
+its sha256 is stored, in session_tokens. Each rerun re-validates the token
+and re-reads the user's role and tenant, so a demotion takes effect at once.
+
+The browser keeps the token in an HttpOnly cookie, so a reload or a
+reconnect to another replica resumes the login without the token ever
+appearing in a URL or in page script. Streamlit cannot set cookies itself:
+after login the page posts a single-use handoff code (valid for
+HANDOFF_TTL_SECONDS) to the /api/session route served by server.py, which
+redeems it for a fresh token and sets the cookie.
+
+Every function takes the caller's connection and leaves nothing uncommitted.
+Kept free of Streamlit, like storage.py.
+"""
+import hashlib
+import hmac
+import os
+import secrets
+import time
+
+SESSION_TOKEN_TTL_HOURS = int(os.environ.get("SESSION_TOKEN_TTL_HOURS", "12"))
+SESSION_COOKIE = "industry40_session"
+SESSION_ROUTE = "/api/session"
+# Cookie-authenticated download of a training session's material, for learners enrolled in it
+MATERIAL_ROUTE = "/api/training/{session_id}/material"
+HANDOFF_TTL_SECONDS = 60
+
+
+def _digest(value):
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def session_secret(conn):
+    """The signing key: APP_SECRET_KEY if set, else a random key created once and kept in app_settings."""
+    secret = os.environ.get("APP_SECRET_KEY")
+    if secret:
+        return secret.encode()
+    row = conn.execute("SELECT value FROM app_settings WHERE key = 'session_secret'").fetchone()
+    if row is None:
+        conn.execute("INSERT INTO app_settings (key, value) VALUES ('session_secret', ?) ON CONFLICT(key) DO NOTHING",
+                     (secrets.token_hex(32),))
+        conn.commit()
+        row = conn.execute("SELECT value FROM app_settings WHERE key = 'session_secret'").fetchone()
+    return row[0].encode()
+
+
+def _sign(secret, payload):
+    return hmac.new(secret, payload.encode(), hashlib.sha256).hexdigest()
+
+
+def issue_session_token(conn, secret, user_id, role, ttl_hours=SESSION_TOKEN_TTL_HOURS, now=None):
+    now = int(now if now is not None else time.time())
+    expires_at = now + ttl_hours * 3600
+    payload = f"{user_id}.{expires_at}.{secrets.token_urlsafe(16)}"
+    token = f"{payload}.{_sign(secret, payload)}"
+    conn.execute('''
+        INSERT INTO session_tokens (token_hash, user_id, role, created_at, expires_at)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (_digest(token), user_id, role, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now)), str(expires_at)))
+    # Opportunistically drop expired sessions and handoff codes
+    conn.execute("DELETE FROM session_tokens WHERE CAST(expires_at AS INTEGER) < ?", (now,))
+    conn.execute("DELETE FROM session_handoffs WHERE CAST(expires_at AS INTEGER) < ?", (now,))
+    conn.commit()
+    return token
+
+
+def validate_session_token(conn, secret, token, now=None):
+    """
+    Returns (user_id, role, tenant_id) for a live, correctly signed, unrevoked token, else None.
+    Role and tenant come from users, not from the token row. Never touches the password.
+    """
+    try:
+        user_id, expires_at, nonce, signature = token.split(".")
+        expired = int(expires_at) < (now if now is not None else time.time())
+    except (AttributeError, ValueError):
+        return None
+    if not hmac.compare_digest(signature, _sign(secret, f"{user_id}.{expires_at}.{nonce}")) or expired:
+        return None
+    return conn.execute('''
+        SELECT u.user_id, u.role, u.tenant_id
+        FROM session_tokens t JOIN users u ON u.user_id = t.user_id
+        WHERE t.token_hash = ?
+    ''', (_digest(token),)).fetchone()
+
+
+def revoke_session_token(conn, token):
+    if token:
+        conn.execute("DELETE FROM session_tokens WHERE token_hash = ?", (_digest(token),))
+        conn.commit()
+
+
+def create_session_handoff(conn, user_id, now=None):
+    """A single-use code the browser exchanges for a session cookie within HANDOFF_TTL_SECONDS."""
+    code = secrets.token_urlsafe(32)
+    expires_at = int(now if now is not None else time.time()) + HANDOFF_TTL_SECONDS
+    conn.execute("INSERT INTO session_handoffs (code_hash, user_id, expires_at) VALUES (?, ?, ?)",
+                 (_digest(code), user_id, str(expires_at)))
+    conn.commit()
+    return code
+
+
+def redeem_session_handoff(conn, secret, code, now=None):
+    """Consumes a handoff code and returns a new session token for its user, or None if it is unknown or expired."""
+    if not isinstance(code, str) or not code:
+        return None
+    now = int(now if now is not None else time.time())
+    row = conn.execute('''
+        SELECT h.user_id, h.expires_at, u.role
+        FROM session_handoffs h JOIN users u ON u.user_id = h.user_id
+        WHERE h.code_hash = ?
+    ''', (_digest(code),)).fetchone()
+    # Whoever deletes the row owns the code, so two concurrent redeems cannot both succeed
+    deleted = conn.execute("DELETE FROM session_handoffs WHERE code_hash = ?", (_digest(code),)).rowcount
+    conn.commit()
+    if row is None or deleted != 1 or int(row[1]) < now:
+        return None
+    return issue_session_token(conn, secret, row[0], row[2], now=now)
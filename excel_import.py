@@ -0,0 +1,313 @@
+"""
+Parallel Excel project import.
+
+Every sheet of every uploaded workbook is parsed in its own worker process
+(openpyxl parsing is CPU-bound); the normalized rows are then written by a
+single serialized writer in one transaction, with one provenance row per sheet.
+Headers are matched to DB fields through aliases and fuzzy matching, and each
+resolved layout is saved as a mapping profile keyed by its header fingerprint.
+Kept free of Streamlit so worker processes can import it cheaply.
+"""
+import difflib
+import functools
+import hashlib
+import io
+import json
+import re
+from datetime import datetime
+
+import pandas as pd
+
+# Map Excel columns to DB fields. If any column is missing, we won't error out.
+EXCEL_COLUMN_MAPPING = {
+    "Project Name": "project_name",
+    "Year": "year",
+    "JJM Strategic Pillars": "jjm_strategic_pillars",
+    "Target Main Category": "target_main_category",
+    "Target Sub Category": "target_sub_category",
+    "Target 16 Dimensions": "target_16_dimensions",
+    "JJM Action Plan": "jjm_action_plan",
+    "Start Date": "start_date",
+    "End Date": "end_date",
+    "Roadmap Captain": "roadmap_captain",
+    "Project Leaders": "project_leaders",
+    "Project Owners": "project_owners",
+    "Task Status": "task_status",
+    "Task Completion Rate": "task_completion_rate",
+    "JJM Comments": "jjm_comments",
+    "Target Remark": "target_remark",
+    "Manager": "manager",
+}
+
+# Order of the normalized row tuples handed to the writer
+PROJECT_FIELDS = list(EXCEL_COLUMN_MAPPING.values())
+
+# Other headers plants use for the same fields; matched after normalizing case, spaces and punctuation
+FIELD_ALIASES = {
+    "project_name": ["Project", "Project Title", "Name of Project", "Project Description"],
+    "year": ["FY", "Financial Year", "Fiscal Year", "Plan Year"],
+    "jjm_strategic_pillars": ["Strategic Pillar", "Strategic Pillars", "JJM Pillar", "Pillar"],
+    "target_main_category": ["Main Category", "Category"],
+    "target_sub_category": ["Sub Category", "Subcategory"],
+    "target_16_dimensions": ["16 Dimensions", "Dimension", "Target Dimension"],
+    "jjm_action_plan": ["Action Plan", "Action Plan and Tasks", "JJM Action Plan and Tasks"],
+    "start_date": ["Start", "Planned Start", "Begin Date"],
+    "end_date": ["End", "Finish", "Planned End", "Target Date", "Due Date"],
+    "roadmap_captain": ["Captain"],
+    "project_leaders": ["Project Leader", "Leader", "Leaders"],
+    "project_owners": ["Project Owner", "Owner", "Owners"],
+    "task_status": ["Status", "Project Status"],
+    "task_completion_rate": ["Completion Rate", "Completion %", "% Complete", "Progress", "Completion"],
+    "jjm_comments": ["Comments", "Comment", "JJM Comment"],
+    "target_remark": ["Remark", "Remarks", "Target Remarks"],
+    "manager": ["Project Manager", "Assigned Manager"],
+}
+
+# Minimum difflib similarity for a header that matches no alias exactly
+FUZZY_CUTOFF = 0.85
+
+
+# ---------- 1) Header resolution ----------
+def normalize_header(header):
+    return re.sub(r"[^a-z0-9%]", "", str(header).lower())
+
+
+def header_fingerprint(headers):
+    """Identifies a workbook layout by its normalized header row."""
+    return hashlib.sha1("\x1f".join(normalize_header(h) for h in headers).encode()).hexdigest()
+
+
+def _alias_index():
+    index = {normalize_header(excel_col): db_field for excel_col, db_field in EXCEL_COLUMN_MAPPING.items()}
+    for db_field, aliases in FIELD_ALIASES.items():
+        for alias in aliases:
+            index.setdefault(normalize_header(alias), db_field)
+    return index
+
+
+@functools.lru_cache(maxsize=256)
+def resolve_headers(headers):
+    """
+    Maps a tuple of Excel headers to DB fields: exact alias matches first, then the closest
+    fuzzy match above FUZZY_CUTOFF. Each DB field is claimed by at most one header.
+    """
+    index = _alias_index()
+    mapping, used = {}, set()
+    for header in headers:
+        db_field = index.get(normalize_header(header))
+        if db_field and db_field not in used:
+            mapping[header] = db_field
+            used.add(db_field)
+    for header in headers:
+        if header in mapping:
+            continue
+        candidates = [alias for alias, db_field in index.items() if db_field not in used]
+        match = difflib.get_close_matches(normalize_header(header), candidates, n=1, cutoff=FUZZY_CUTOFF)
+        if match:
+            mapping[header] = index[match[0]]
+            used.add(index[match[0]])
+    return mapping
+
+
+def apply_profile(profile, headers):
+    """
+    Re-keys a saved {excel_header: db_field} profile to this sheet's header text. Fingerprints
+    ignore case and punctuation, so "PROJECT NAME" must pick up a mapping saved for "Project Name".
+    """
+    by_normalized = {normalize_header(h): h for h in headers}
+    return {by_normalized[normalize_header(excel_col)]: db_field for excel_col, db_field in profile.items()
+            if normalize_header(excel_col) in by_normalized}
+
+
+# ---------- 2) Parsing (runs in worker processes) ----------
+def list_sheets(data):
+    return pd.ExcelFile(io.BytesIO(data)).sheet_names
+
+
+def _clean(value):
+    if value is None:
+        return None
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return value
+
+
+def _date_text(value):
+    value = _clean(value)
+    if value is None:
+        return ""
+    if hasattr(value, "strftime"):
+        return value.strftime("%Y-%m-%d")
+    return str(value)
+
+
+def _sql_value(value):
+    # sqlite3 only binds plain Python scalars; anything else (e.g. a Timestamp in a text column) is stored as text
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    return str(value)
+
+
+def normalize_frame(df, mapping=EXCEL_COLUMN_MAPPING):
+    """
+    Turns one sheet into writer rows, skipping rows that are missing 'Project Name'.
+    Missing columns are filled with None; dates are best-effort 'YYYY-MM-DD' text.
+    Returns (rows, skipped) where skipped is a list of (excel_row_number, reason).
+    """
+    rows, skipped = [], []
+    present = {excel_col: db_field for excel_col, db_field in mapping.items() if excel_col in df.columns}
+    for idx, record in enumerate(df.to_dict("records")):
+        row_data = {db_field: _clean(record.get(excel_col)) for excel_col, db_field in present.items()}
+
+        p_name = row_data.get("project_name")
+        if not p_name:
+            skipped.append((idx + 2, "no Project Name"))
+            continue
+
+        try:
+            tcr_val = float(row_data.get("task_completion_rate") or 0.0)
+        except (TypeError, ValueError):
+            tcr_val = 0.0
+
+        row_data["project_name"] = str(p_name)
+        row_data["start_date"] = _date_text(row_data.get("start_date"))
+        row_data["end_date"] = _date_text(row_data.get("end_date"))
+        row_data["task_completion_rate"] = tcr_val
+        row_data["task_status"] = row_data.get("task_status") or "Not Started"
+        rows.append(tuple(_sql_value(row_data.get(field)) for field in PROJECT_FIELDS))
+    return rows, skipped
+
+
+def _empty_result(workbook, sheet, error):
+    return {"workbook": workbook, "sheet": sheet, "rows": [], "skipped": [], "rows_read": 0,
+            "headers": [], "fingerprint": None, "mapping": {}, "mapping_source": None,
+            "missing_fields": [], "error": error}
+
+
+def parse_sheet(workbook, data, sheet, profiles=None):
+    """
+    Worker entry point: parses one sheet of a workbook given as raw bytes. A saved profile
+    for the sheet's header fingerprint is used as-is; otherwise headers are resolved by alias/fuzzy match.
+    """
+    try:
+        df = pd.read_excel(io.BytesIO(data), sheet_name=sheet)
+    except Exception as e:
+        return _empty_result(workbook, sheet, f"Failed to read sheet: {e}")
+
+    headers = tuple(str(col) for col in df.columns)
+    df.columns = headers
+    fingerprint = header_fingerprint(headers)
+    if profiles and fingerprint in profiles:
+        mapping, mapping_source = apply_profile(profiles[fingerprint], headers), "profile"
+    else:
+        mapping, mapping_source = resolve_headers(headers), "resolved"
+
+    result = _empty_result(workbook, sheet, None)
+    result.update(headers=list(headers), fingerprint=fingerprint, mapping=dict(mapping),
+                  mapping_source=mapping_source, rows_read=len(df),
+                  missing_fields=[f for f in PROJECT_FIELDS if f not in mapping.values()])
+    if "project_name" not in mapping.values():
+        result["error"] = "No column matches Project Name"
+        return result
+    result["rows"], result["skipped"] = normalize_frame(df, mapping)
+    return result
+
+
+def parse_workbooks(workbooks, executor=None, profiles=None):
+    """
+    Parses every sheet of every (name, bytes) workbook. With an executor, sheets are parsed
+    in parallel; results always come back in workbook/sheet order so later rows win.
+    `profiles` maps header fingerprints to saved {excel_header: db_field} mappings.
+    """
+    tasks, results = [], []
+    for name, data in workbooks:
+        try:
+            sheets = list_sheets(data)
+        except Exception as e:
+            results.append(_empty_result(name, None, f"Failed to read Excel: {e}"))
+            continue
+        tasks.extend((name, data, sheet) for sheet in sheets)
+
+    if executor is not None and len(tasks) > 1:
+        futures = [executor.submit(parse_sheet, name, data, sheet, profiles) for name, data, sheet in tasks]
+        results.extend(f.result() for f in futures)
+    else:
+        results.extend(parse_sheet(name, data, sheet, profiles) for name, data, sheet in tasks)
+    return results
+
+
+# ---------- 3) Serialized bulk writer ----------
+def write_projects(conn, sheet_results, tenant_id):
+    """
+    Upserts parsed rows by project name within `tenant_id` and records one import_sheets row per sheet.
+    Runs as one transaction on the caller's connection; the caller commits or rolls back.
+    Returns the sheet results annotated with inserted/updated counts.
+    """
+    cur = conn.cursor()
+    columns = ", ".join(PROJECT_FIELDS + ["tenant_id"])
+    insert_sql = f"INSERT INTO projects ({columns}) VALUES ({', '.join('?' for _ in PROJECT_FIELDS)}, ?)"
+    update_sql = (
+        f"UPDATE projects SET {', '.join(f'{f} = ?' for f in PROJECT_FIELDS[1:])} "
+        "WHERE project_id = (SELECT MIN(project_id) FROM projects WHERE tenant_id = ? AND project_name = ?)"
+    )
+    imported_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    known = set()
+    for result in sheet_results:
+        names = list({row[0] for row in result["rows"]} - known)
+        for i in range(0, len(names), 500):
+            chunk = names[i:i + 500]
+            cur.execute(f"SELECT DISTINCT project_name FROM projects "
+                        f"WHERE tenant_id = ? AND project_name IN ({', '.join('?' for _ in chunk)})",
+                        [tenant_id] + chunk)
+            known.update(r[0] for r in cur.fetchall())
+
+        inserts, updates = [], []
+        for row in result["rows"]:
+            if row[0] in known:
+                updates.append(row[1:] + (tenant_id, row[0]))
+            else:
+                inserts.append(row + (tenant_id,))
+                known.add(row[0])
+        # Inserts first so repeated names within the sheet update the freshly inserted row
+        cur.executemany(insert_sql, inserts)
+        cur.executemany(update_sql, updates)
+
+        result["inserted"] = len(inserts)
+        result["updated"] = len(updates)
+        cur.execute(
+            "INSERT INTO import_sheets (workbook, sheet, rows_read, rows_inserted, rows_updated, rows_skipped, error, imported_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (result["workbook"], result["sheet"], result["rows_read"], len(inserts), len(updates),
+             len(result["skipped"]), result["error"], imported_at)
+        )
+
+        # Remember newly resolved layouts so the next upload of the same headers skips resolution
+        if result["fingerprint"] and result["mapping_source"] == "resolved" and not result["error"]:
+            cur.execute(
+                "INSERT INTO excel_mapping_profiles (fingerprint, name, headers, mapping, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(fingerprint) DO NOTHING",
+                (result["fingerprint"], f"{result['workbook']} / {result['sheet']}", json.dumps(result["headers"]),
+                 json.dumps(result["mapping"]), imported_at, imported_at)
+            )
+        elif result["mapping_source"] == "profile":
+            cur.execute("UPDATE excel_mapping_profiles SET last_used_at = ? WHERE fingerprint = ?",
+                        (imported_at, result["fingerprint"]))
+    return sheet_results
+
+
+# ---------- 4) Mapping profiles ----------
+def load_profiles(conn):
+    """Saved {fingerprint: {excel_header: db_field}} mappings."""
+    return {fingerprint: json.loads(mapping)
+            for fingerprint, mapping in conn.execute("SELECT fingerprint, mapping FROM excel_mapping_profiles")}
+
+
+def save_profile(conn, fingerprint, name, mapping):
+    """Replaces a profile's name and mapping; blank DB fields drop the header from the mapping."""
+    mapping = {header: db_field for header, db_field in mapping.items() if db_field in PROJECT_FIELDS}
+    conn.execute("UPDATE excel_mapping_profiles SET name = ?, mapping = ? WHERE fingerprint = ?",
+                 (name, json.dumps(mapping), fingerprint))
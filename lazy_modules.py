@@ -0,0 +1,35 @@
+"""
+Deferred imports for heavy libraries.
+
+    pd = lazy_import("pandas")
+
+binds `pd` to a stand-in that imports pandas on first attribute access, so
+pages that never touch pandas, Plotly or pyarrow (the login page, most
+reruns) don't pay for loading them. The stand-in is not registered in
+sys.modules, so tools that walk every loaded module (inspect, tracebacks)
+can't trigger the import by accident.
+"""
+import importlib
+
+
+class LazyModule:
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        if self._module is None:
+            self.__dict__["_module"] = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_import(name):
+    """Returns a stand-in for module `name` that imports it when one of its attributes is first used."""
+    return LazyModule(name)
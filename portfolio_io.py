@@ -0,0 +1,282 @@
+"""
+Columnar export/import of the project portfolio.
+
+Tables are streamed between SQLite and Parquet or Arrow IPC files in record
+batches, with typed columns (dates as date32, completion rates as float64)
+and dictionary-encoded categoricals:
+
+    python portfolio_io.py export --out exports/ --format parquet
+    python portfolio_io.py import exports/projects.parquet exports/user_progress.parquet
+"""
+import argparse
+import os
+import sqlite3
+import sys
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+DB_PATH = "industry_4_0_app.db"
+BATCH_SIZE = 100_000
+
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
+
+# Arrow schema per exportable table; field order matches the SQLite columns
+TABLE_SCHEMAS = {
+    "projects": pa.schema([
+        ("project_id", pa.int64()),
+        ("project_name", pa.string()),
+        ("year", CATEGORY),
+        ("jjm_strategic_pillars", CATEGORY),
+        ("target_main_category", CATEGORY),
+        ("target_sub_category", CATEGORY),
+        ("target_16_dimensions", CATEGORY),
+        ("jjm_action_plan", pa.string()),
+        ("start_date", pa.date32()),
+        ("end_date", pa.date32()),
+        ("roadmap_captain", pa.string()),
+        ("project_leaders", pa.string()),
+        ("project_owners", pa.string()),
+        ("task_status", CATEGORY),
+        ("task_completion_rate", pa.float64()),
+        ("jjm_comments", pa.string()),
+        ("target_remark", pa.string()),
+        ("manager", CATEGORY),
+    ]),
+    "dimensions": pa.schema([
+        ("dimension_id", pa.int64()),
+        ("project_id", pa.int64()),
+        ("dimension_name", CATEGORY),
+        ("dimension_score", pa.int32()),
+        ("timestamp", pa.string()),
+    ]),
+    "user_progress": pa.schema([
+        ("user_id", pa.int64()),
+        ("session_id", pa.int64()),
+        ("status", CATEGORY),
+        ("updated_at", pa.string()),
+    ]),
+}
+
+PRIMARY_KEYS = {
+    "projects": ("project_id",),
+    "dimensions": ("dimension_id",),
+    "user_progress": ("user_id", "session_id"),
+}
+
+# Tables partitioned by tenant_id; the column itself is never exported, the importer's tenant is applied instead
+TENANT_TABLES = {"projects"}
+
+# How a tenant-limited export selects each table's rows: directly, or through the project or user they belong to
+TENANT_FILTERS = {
+    "projects": "tenant_id = ?",
+    "dimensions": "project_id IN (SELECT project_id FROM projects WHERE tenant_id = ?)",
+    "user_progress": "user_id IN (SELECT user_id FROM users WHERE tenant_id = ?)",
+}
+
+FORMAT_EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+
+# ---------- 1) SQLite -> Arrow ----------
+def _to_arrow_column(values, field):
+    """Converts one column of SQLite values to the field's Arrow type."""
+    if pa.types.is_date32(field.type):
+        # Dates are stored as 'YYYY-MM-DD' text, sometimes blank; unparseable values become null
+        text = pa.array(values, type=pa.string())
+        parsed = pc.strptime(pc.utf8_slice_codeunits(text, 0, 10), format="%Y-%m-%d", unit="s", error_is_null=True)
+        return parsed.cast(pa.date32())
+    if pa.types.is_dictionary(field.type):
+        return pa.array(values, type=pa.string()).dictionary_encode().cast(field.type)
+    if pa.types.is_floating(field.type):
+        try:
+            return pa.array(values, type=field.type)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Legacy rows may hold text such as '50' or ''
+            return pa.array([_as_float(v) for v in values], type=field.type)
+    return pa.array(values, type=field.type)
+
+
+def _as_float(value):
+    try:
+        return float(value) if value is not None and value != "" else None
+    except (TypeError, ValueError):
+        return None
+
+
+def iter_table_batches(conn, table, batch_size=BATCH_SIZE, tenant_id=None):
+    schema = TABLE_SCHEMAS[table]
+    if tenant_id is not None:
+        cursor = conn.execute(f"SELECT {', '.join(schema.names)} FROM {table} WHERE {TENANT_FILTERS[table]}",
+                              (tenant_id,))
+    else:
+        cursor = conn.execute(f"SELECT {', '.join(schema.names)} FROM {table}")
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        columns = list(zip(*rows))
+        yield pa.RecordBatch.from_arrays(
+            [_to_arrow_column(list(col), field) for col, field in zip(columns, schema)],
+            schema=schema
+        )
+
+
+def write_table(conn, table, sink, fmt="parquet", batch_size=BATCH_SIZE, tenant_id=None):
+    """
+    Streams one table to a path or writable file object. Returns the row count.
+    With `tenant_id`, only that tenant's rows are written (see TENANT_FILTERS).
+    """
+    schema = TABLE_SCHEMAS[table]
+    rows = 0
+    if fmt == "parquet":
+        with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+            for batch in iter_table_batches(conn, table, batch_size, tenant_id):
+                writer.write_batch(batch)
+                rows += batch.num_rows
+    elif fmt == "arrow":
+        # The IPC file format allows one dictionary per field, so unify the batches' dictionaries first
+        data = pa.Table.from_batches(list(iter_table_batches(conn, table, batch_size, tenant_id)), schema=schema)
+        data = data.unify_dictionaries()
+        with ipc.new_file(sink, schema) as writer:
+            writer.write_table(data, max_chunksize=batch_size)
+        rows = data.num_rows
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+    return rows
+
+
+def export_tables(conn, out_dir, fmt="parquet", tables=tuple(TABLE_SCHEMAS), tenant_id=None):
+    os.makedirs(out_dir, exist_ok=True)
+    written = {}
+    for table in tables:
+        path = os.path.join(out_dir, f"{table}{FORMAT_EXTENSIONS[fmt]}")
+        written[path] = write_table(conn, table, path, fmt, tenant_id=tenant_id)
+    return written
+
+
+# ---------- 2) Arrow -> SQLite ----------
+def _iter_file_batches(source, batch_size=BATCH_SIZE):
+    """Reads record batches from a Parquet or Arrow IPC path/file object, sniffing the format."""
+    if hasattr(source, "read"):
+        data = pa.py_buffer(source.read())
+        reader_source = pa.BufferReader(data)
+        magic = data[:4].to_pybytes()
+    else:
+        reader_source = source
+        with open(source, "rb") as f:
+            magic = f.read(4)
+    if magic == b"PAR1":
+        yield from pq.ParquetFile(reader_source).iter_batches(batch_size=batch_size)
+    else:
+        reader = ipc.open_file(reader_source)
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+
+
+def _to_sqlite_column(column):
+    if pa.types.is_dictionary(column.type):
+        column = column.cast(column.type.value_type)
+    if pa.types.is_date(column.type):
+        # Back to the 'YYYY-MM-DD' text the app stores
+        column = column.cast(pa.string())
+    return column.to_pylist()
+
+
+def read_table(conn, table, source, batch_size=BATCH_SIZE, tenant_id=None):
+    """
+    Upserts every row from a Parquet/Arrow file into `table` by primary key, as one transaction on
+    the caller's connection; the caller commits or rolls back. Uses ON CONFLICT DO UPDATE (not REPLACE) so update triggers on the target table still fire.
+    With `tenant_id`, rows of tenant-partitioned tables are written to that tenant, and keys that
+    belong to another tenant are left untouched. Returns (rows written, keys skipped because another
+    tenant owns them).
+    """
+    schema = TABLE_SCHEMAS[table]
+    keys = PRIMARY_KEYS[table]
+    tenant_scoped = tenant_id is not None and table in TENANT_TABLES
+    rows, skipped = 0, []
+    sql = None
+    for batch in _iter_file_batches(source, batch_size):
+        names = [n for n in batch.schema.names if n in schema.names]
+        if not all(k in names for k in keys):
+            raise ValueError(f"{table} file is missing key columns {keys}")
+        if sql is None:
+            targets = names + ["tenant_id"] if tenant_scoped else names
+            updates = ", ".join(f"{n} = excluded.{n}" for n in names if n not in keys)
+            sql = (
+                f"INSERT INTO {table} ({', '.join(targets)}) VALUES ({', '.join('?' for _ in targets)}) "
+                f"ON CONFLICT({', '.join(keys)}) DO "
+                + (f"UPDATE SET {updates}" if updates else "NOTHING")
+            )
+            if updates and tenant_scoped:
+                sql += f" WHERE {table}.tenant_id = excluded.tenant_id"
+        columns = [_to_sqlite_column(batch.column(n)) for n in names]
+        if tenant_scoped:
+            columns.append([tenant_id] * batch.num_rows)
+        written = conn.executemany(sql, zip(*columns)).rowcount
+        rows += written
+        if tenant_scoped and written < batch.num_rows:
+            skipped += _foreign_keys(conn, table, keys[0], columns[names.index(keys[0])], tenant_id)
+    return rows, skipped
+
+
+def _foreign_keys(conn, table, key, values, tenant_id, chunk_size=500):
+    """The `values` of `key` that exist in `table` under a tenant other than `tenant_id`."""
+    found = []
+    for start in range(0, len(values), chunk_size):
+        chunk = values[start:start + chunk_size]
+        found += [row[0] for row in conn.execute(
+            f"SELECT {key} FROM {table} WHERE tenant_id <> ? AND {key} IN ({', '.join('?' for _ in chunk)})",
+            [tenant_id] + list(chunk)
+        ).fetchall()]
+    return found
+
+
+def table_for_path(path):
+    """Infers the target table from a file name like 'projects.parquet'."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    if name not in TABLE_SCHEMAS:
+        raise ValueError(f"Cannot tell which table '{path}' belongs to; expected one of {list(TABLE_SCHEMAS)}")
+    return name
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Columnar export/import of the project portfolio.")
+    parser.add_argument("--db", default=DB_PATH, help="Path to the SQLite database (default: %(default)s)")
+    parser.add_argument("--tenant", type=int, default=None, dest="tenant_id",
+                        help="Limit exports to, and import projects into, this tenant (default: every tenant)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = sub.add_parser("export", help="Export tables to Parquet or Arrow IPC files")
+    export_parser.add_argument("--out", default="exports", help="Output directory (default: %(default)s)")
+    export_parser.add_argument("--format", choices=list(FORMAT_EXTENSIONS), default="parquet")
+    export_parser.add_argument("--tables", nargs="+", choices=list(TABLE_SCHEMAS), default=list(TABLE_SCHEMAS))
+
+    import_parser = sub.add_parser("import", help="Upsert tables from files named <table>.parquet/.arrow")
+    import_parser.add_argument("files", nargs="+")
+
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.db):
+        parser.error(f"database not found: {args.db}")
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.command == "export":
+            for path, rows in export_tables(conn, args.out, args.format, args.tables, args.tenant_id).items():
+                print(f"{path}: {rows} rows")
+        else:
+            for path in args.files:
+                try:
+                    rows, skipped = read_table(conn, table_for_path(path), path, tenant_id=args.tenant_id)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                print(f"{path}: {rows} rows" + (f", skipped keys of other tenants: {skipped}" if skipped else ""))
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,443 @@
+"""
+Headless project reporting.
+
+Computes the dashboard metrics and Plotly charts straight from the SQLite file,
+without Streamlit, so reports can be produced by scheduled batch jobs:
+
+    python reporting.py --out reports/ --format csv parquet html --per-manager --workers 8
+"""
+import argparse
+import hashlib
+import html
+import os
+import re
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from lazy_modules import lazy_import
+
+# Loaded on first use, so importing this module for its field lists stays cheap
+pd = lazy_import("pandas")
+px = lazy_import("plotly.express")
+
+DB_PATH = "industry_4_0_app.db"
+
+# DB columns of the projects table, in order, and their display names
+PROJECT_FIELDS = [
+    "project_id", "project_name", "year", "jjm_strategic_pillars", "target_main_category",
+    "target_sub_category", "target_16_dimensions", "jjm_action_plan", "start_date",
+    "end_date", "roadmap_captain", "project_leaders", "project_owners",
+    "task_status", "task_completion_rate", "jjm_comments", "target_remark",
+    "manager"
+]
+PROJECT_COLUMNS = [
+    "ID", "Project Name", "Year", "JJM Strategic Pillars", "Target Main Category",
+    "Target Sub Category", "Target 16 Dimensions", "JJM Action Plan", "Start Date",
+    "End Date", "Roadmap Captain", "Project Leaders", "Project Owners",
+    "Task Status", "Task Completion Rate", "JJM Comments", "Target Remark",
+    "Manager"
+]
+
+# What the dashboard metrics, charts and Kanban read; leaves out the long free-text fields
+DASHBOARD_FIELDS = [
+    "project_id", "project_name", "year", "jjm_strategic_pillars", "target_main_category",
+    "target_sub_category", "target_16_dimensions", "start_date", "end_date",
+    "task_status", "task_completion_rate", "manager"
+]
+
+STATUS_ORDER = [
+    "Not Started", "In Progress", "Trial Done",
+    "In Testing", "Production Deployed", "Running", "Completed"
+]
+
+STATUS_COLORS = {
+    "Completed": "#4CAF50",
+    "In Progress": "#2196F3",
+    "Not Started": "#78909C",
+    "Trial Done": "#00BCD4",
+    "In Testing": "#FF9800",
+    "Production Deployed": "#9C27B0",
+    "Running": "#009688"
+}
+
+DEFAULT_FORMATS = ("csv", "html")
+
+
+# ---------- 1) Loading ----------
+def connect_readonly(db_path=DB_PATH):
+    return sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+
+def load_projects(conn, manager=None, fields=PROJECT_FIELDS, tenant_id=None, archived_periods=()):
+    """
+    Projects as a DataFrame with display column names, parsed dates and numeric completion rates.
+    `fields` narrows the projection to a subset of PROJECT_FIELDS (it must include the date and rate columns).
+    With `tenant_id`, only that tenant's projects are read. Archived projects (projects_archive) are
+    left out unless their year is listed in `archived_periods`.
+    """
+    conditions, params = [], []
+    if tenant_id is not None:
+        conditions.append("tenant_id = ?")
+        params.append(tenant_id)
+    if manager is not None:
+        conditions.append("manager = ?")
+        params.append(manager)
+    sql = f"SELECT {', '.join(fields)} FROM projects"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    if archived_periods:
+        archive_conditions = conditions + [f"year IN ({', '.join('?' for _ in archived_periods)})"]
+        sql += f" UNION ALL SELECT {', '.join(fields)} FROM projects_archive WHERE {' AND '.join(archive_conditions)}"
+        params = params * 2 + list(archived_periods)
+    columns = [PROJECT_COLUMNS[PROJECT_FIELDS.index(field)] for field in fields]
+    df = pd.DataFrame(conn.execute(sql, params).fetchall(), columns=columns)
+    return prepare_projects_frame(df)
+
+
+def prepare_projects_frame(df):
+    df["Start Date"] = pd.to_datetime(df["Start Date"], errors="coerce")
+    df["End Date"] = pd.to_datetime(df["End Date"], errors="coerce")
+    df["Task Completion Rate"] = pd.to_numeric(df["Task Completion Rate"], errors="coerce").fillna(0)
+    return df
+
+
+def list_managers(conn, tenant_id=None):
+    sql = "SELECT DISTINCT manager FROM projects WHERE manager IS NOT NULL AND manager != ''"
+    params = ()
+    if tenant_id is not None:
+        sql += " AND tenant_id = ?"
+        params = (tenant_id,)
+    return [row[0] for row in conn.execute(sql + " ORDER BY manager", params)]
+
+
+# ---------- 2) Metrics ----------
+def compute_summary(df, now=None):
+    now = now or datetime.now()
+    status = df["Task Status"]
+    delayed = df[
+        (df["End Date"].notnull()) &
+        (df["End Date"] < now) &
+        (status != "Completed")
+    ]
+    return {
+        "Total Projects": len(df),
+        "Completed": int((status == "Completed").sum()),
+        "In Progress": int((status == "In Progress").sum()),
+        "Delayed": len(delayed),
+        "Trial Done": int((status == "Trial Done").sum()),
+        "In Testing": int((status == "In Testing").sum()),
+        "Deployed": int((status == "Production Deployed").sum()),
+    }
+
+
+# ---------- 3) Charts ----------
+def apply_dark_layout(fig, **layout):
+    fig.update_layout(
+        plot_bgcolor='rgba(15,23,42,0)',
+        paper_bgcolor='rgba(15,23,42,0)',
+        title_font=dict(size=20, color='#ffffff', family="Segoe UI, sans-serif"),
+        font=dict(family="Segoe UI, sans-serif", color='#ffffff'),
+        **layout
+    )
+    return fig
+
+
+def status_bar_figure(df):
+    status_counts = df["Task Status"].value_counts()
+    status_df = pd.DataFrame({"Task Status": status_counts.index, "Count": status_counts.values})
+    fig = px.bar(
+        status_df, x="Task Status", y="Count",
+        title="Project Status Overview",
+        color="Task Status",
+        color_discrete_map=STATUS_COLORS
+    )
+    apply_dark_layout(
+        fig,
+        xaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)'),
+        yaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)'),
+        xaxis_title_font=dict(size=14),
+        yaxis_title_font=dict(size=14),
+        hoverlabel=dict(font_size=14, font_family="Segoe UI, sans-serif"),
+        margin=dict(t=80, b=40, l=40, r=40),
+    )
+    fig.update_traces(texttemplate='%{y}', textposition='outside')
+    return fig
+
+
+def completion_figure(df):
+    completion_df = df.groupby(['JJM Strategic Pillars', 'Target Main Category'])['Task Completion Rate'].mean().reset_index()
+    fig = px.line(
+        completion_df,
+        x='JJM Strategic Pillars',
+        y='Task Completion Rate',
+        color='Target Main Category',
+        title="Task Completion Rate Across Projects",
+        markers=True,
+        line_shape='spline',
+    )
+    apply_dark_layout(
+        fig,
+        xaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)', title="JJM Strategic Pillars"),
+        yaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)', title="Avg. Completion Rate (%)"),
+        legend_title_text="Target Main Category",
+        hovermode="x unified"
+    )
+    fig.update_traces(
+        line=dict(width=3),
+        marker=dict(size=8),
+        hovertemplate="<b>%{x}</b><br>%{y:.1f}%<extra></extra>"
+    )
+    return fig
+
+
+def milestone_figure(df):
+    mile_df = df.groupby("Target Main Category")["Task Completion Rate"].mean().reset_index()
+    fig = px.bar(
+        mile_df,
+        x='Target Main Category',
+        y='Task Completion Rate',
+        color='Target Main Category',
+        title="Milestone Progress by Category",
+        text_auto='.1f'
+    )
+    apply_dark_layout(
+        fig,
+        xaxis=dict(showgrid=False, title="Target Main Category", categoryorder='total descending'),
+        yaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)', title="Avg. Completion Rate (%)", range=[0, 100]),
+        showlegend=False,
+        margin=dict(t=50, b=0, l=0, r=0),
+    )
+    fig.update_traces(
+        marker_line_width=1,
+        marker_line_color="rgba(255,255,255,0.3)",
+        opacity=0.85,
+        textposition='outside',
+        textfont=dict(color='white'),
+        hovertemplate="<b>%{x}</b><br>Completion: %{y:.1f}%<extra></extra>"
+    )
+    return fig
+
+
+def scatter_figure(df):
+    return px.scatter(
+        df, x="JJM Strategic Pillars", y="Task Completion Rate",
+        color="Target Main Category", hover_data=["Project Name"],
+        title="Completion Rate vs. JJM Strategic Pillars"
+    )
+
+
+def pillars_figure(df):
+    pillar_group = df.groupby('JJM Strategic Pillars').agg(
+        Total_Projects=('Project Name', 'count'),
+        Completed_Projects=('Task Status', lambda x: (x == 'Completed').sum())
+    ).reset_index()
+    pillar_group['Total_Projects'] = pillar_group['Total_Projects'].astype(int)
+    pillar_group['Completed_Projects'] = pillar_group['Completed_Projects'].astype(int)
+    return px.bar(
+        pillar_group,
+        x='JJM Strategic Pillars',
+        y=['Total_Projects', 'Completed_Projects'],
+        labels={'value': 'Number of Projects', 'variable': 'Project Status'},
+        title='Projects by JJM Strategic Pillars',
+        barmode='group'
+    )
+
+
+def category_figure(df):
+    category_counts = df['Target Main Category'].value_counts(dropna=True)
+    return px.pie(
+        names=category_counts.index,
+        values=category_counts.values,
+        title='Distribution of Projects by Main Category'
+    )
+
+
+def sub_category_figure(df):
+    dims_counts = df['Target Sub Category'].value_counts()
+    dims_df = pd.DataFrame({'Target Sub Category': dims_counts.index, 'Count': dims_counts.values})
+    return px.bar(
+        dims_df,
+        x='Target Sub Category',
+        y='Count',
+        labels={'x': 'Target Sub Category', 'y': 'Count'},
+        title='Number of Projects by Sub Category'
+    )
+
+
+def manager_status_figure(df):
+    status_by_manager = df.groupby(['Manager', 'Task Status']).size().unstack(fill_value=0)
+    if status_by_manager.empty:
+        return None
+    return px.bar(
+        status_by_manager,
+        x=status_by_manager.index,
+        y=status_by_manager.columns,
+        labels={'value': 'Count', 'index': 'Manager'},
+        title='Task Status by Manager'
+    )
+
+
+def gantt_figure(df):
+    gantt_df = df.dropna(subset=["Start Date", "End Date"]).copy()
+    if not len(gantt_df):
+        return None
+    gantt_df["Start"] = gantt_df["Start Date"].dt.strftime("%Y-%m-%d")
+    gantt_df["Finish"] = gantt_df["End Date"].dt.strftime("%Y-%m-%d")
+    fig = px.timeline(
+        gantt_df,
+        x_start="Start",
+        x_end="Finish",
+        y="Project Name",
+        color="Task Status",
+        hover_data=["Task Completion Rate", "Manager"],
+        title="Project Gantt Chart"
+    )
+    fig.update_yaxes(autorange="reversed")
+    return fig
+
+
+def correlation_figure(df):
+    numeric_df = df.select_dtypes(include=['number'])
+    if len(numeric_df.columns) <= 1:
+        return None
+    return px.imshow(
+        numeric_df.corr(),
+        labels=dict(x="Columns", y="Columns", color="Correlation"),
+        title="Correlation Matrix"
+    )
+
+
+# Report sections in dashboard order: (key, heading, builder)
+FIGURE_BUILDERS = [
+    ("status", "Project Status Overview", status_bar_figure),
+    ("completion", "Task Completion Rate Across Projects", completion_figure),
+    ("milestone", "Milestone Progress by Category", milestone_figure),
+    ("scatter", "Completion Rate vs. JJM Strategic Pillars", scatter_figure),
+    ("pillars", "Projects by JJM Strategic Pillars", pillars_figure),
+    ("category", "Projects by Target Main Category", category_figure),
+    ("sub_category", "Projects by Target 16 Dimensions", sub_category_figure),
+    ("manager_status", "Task Status by Manager", manager_status_figure),
+    ("gantt", "Gantt Chart", gantt_figure),
+    ("correlation", "Correlation Matrix for Numeric Columns", correlation_figure),
+]
+
+
+def build_figures(df):
+    """Returns {key: figure or None} for every dashboard chart."""
+    return {key: builder(df) for key, _, builder in FIGURE_BUILDERS}
+
+
+# ---------- 4) Export ----------
+def render_html_report(df, title="Industry 4.0 Project Report", include_plotlyjs="cdn"):
+    summary = compute_summary(df)
+    figures = build_figures(df)
+    # The title carries a manager's name; the summary table is escaped by to_html and chart data by plotly
+    title = html.escape(title)
+    parts = [
+        "<html><head><meta charset='utf-8'>",
+        f"<title>{title}</title>",
+        "<style>body{background:#0f172a;color:white;font-family:'Segoe UI',sans-serif;margin:2rem;}"
+        "table{border-collapse:collapse;}td,th{padding:6px 12px;border-bottom:1px solid #334155;}</style>",
+        "</head><body>",
+        f"<h1>{title}</h1>",
+        f"<p>Generated {datetime.now().strftime('%Y-%m-%d %H:%M')}</p>",
+        pd.DataFrame([summary]).to_html(index=False),
+    ]
+    plotlyjs_included = False
+    for key, heading, _ in FIGURE_BUILDERS:
+        fig = figures[key]
+        if fig is None:
+            continue
+        parts.append(f"<h2>{html.escape(heading)}</h2>")
+        parts.append(fig.to_html(full_html=False,
+                                 include_plotlyjs=False if plotlyjs_included else include_plotlyjs))
+        plotlyjs_included = True
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def export_report(df, out_dir, formats=DEFAULT_FORMATS, title="Industry 4.0 Project Report"):
+    """Writes the project table, summary and charts for one scope into out_dir. Returns written paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    summary_df = pd.DataFrame([compute_summary(df)])
+    if "csv" in formats:
+        for name, frame in (("projects", df), ("summary", summary_df)):
+            path = os.path.join(out_dir, f"{name}.csv")
+            frame.to_csv(path, index=False)
+            written.append(path)
+    if "parquet" in formats:
+        for name, frame in (("projects", df), ("summary", summary_df)):
+            path = os.path.join(out_dir, f"{name}.parquet")
+            frame.to_parquet(path, index=False)
+            written.append(path)
+    if "html" in formats:
+        path = os.path.join(out_dir, "report.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(render_html_report(df, title=title))
+        written.append(path)
+    return written
+
+
+def _safe_dirname(name):
+    # The hash of the raw name keeps names that sanitize alike ("A/B", "A B") in separate directories
+    readable = re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("_") or "unnamed"
+    return f"{readable}-{hashlib.sha256(name.encode()).hexdigest()[:8]}"
+
+
+def generate_manager_report(db_path, manager, out_dir, formats=DEFAULT_FORMATS, tenant_id=None, archived_periods=()):
+    """Worker entry point: opens its own read-only connection so reports run in separate processes."""
+    conn = connect_readonly(db_path)
+    try:
+        df = load_projects(conn, manager=manager, tenant_id=tenant_id, archived_periods=archived_periods)
+    finally:
+        conn.close()
+    target = os.path.join(out_dir, "managers", _safe_dirname(manager))
+    return export_report(df, target, formats, title=f"Project Report - {manager}")
+
+
+def generate_reports(db_path=DB_PATH, out_dir="reports", formats=DEFAULT_FORMATS, per_manager=False, workers=None,
+                     tenant_id=None, archived_periods=()):
+    """Portfolio report plus, optionally, one report per manager spread over a process pool."""
+    conn = connect_readonly(db_path)
+    try:
+        portfolio = load_projects(conn, tenant_id=tenant_id, archived_periods=archived_periods)
+        managers = list_managers(conn, tenant_id) if per_manager else []
+    finally:
+        conn.close()
+
+    written = export_report(portfolio, os.path.join(out_dir, "portfolio"), formats)
+    if managers:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(generate_manager_report, db_path, m, out_dir, formats, tenant_id, archived_periods) for m in managers]
+            for future in as_completed(futures):
+                written.extend(future.result())
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate Industry 4.0 project reports without the web app.")
+    parser.add_argument("--db", default=DB_PATH, help="Path to the SQLite database (default: %(default)s)")
+    parser.add_argument("--out", default="reports", help="Output directory (default: %(default)s)")
+    parser.add_argument("--format", nargs="+", choices=["csv", "parquet", "html"], default=list(DEFAULT_FORMATS),
+                        dest="formats", help="Output formats (default: csv html)")
+    parser.add_argument("--per-manager", action="store_true", help="Also write one report per project manager")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for per-manager reports")
+    parser.add_argument("--tenant", type=int, default=None, dest="tenant_id",
+                        help="Only report on this tenant's projects (default: every tenant)")
+    parser.add_argument("--archived-years", nargs="+", default=[], dest="archived_periods", metavar="YEAR",
+                        help="Also include archived projects from these years, e.g. 2023-2024")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        parser.error(f"database not found: {args.db}")
+    written = generate_reports(args.db, args.out, args.formats, args.per_manager, args.workers, args.tenant_id,
+                               args.archived_periods)
+    print(f"Wrote {len(written)} files to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
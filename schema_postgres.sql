@@ -0,0 +1,339 @@
+-- PostgreSQL schema for DATABASE_URL=postgresql://...
+-- Mirrors create_tables() in app.py; every statement is idempotent so it runs on each start.
+
+-- Organizations / plants; tenant 1 is the group itself and owns rows from before tenants existed
+CREATE TABLE IF NOT EXISTS tenants (
+    tenant_id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    tenant_name TEXT NOT NULL UNIQUE,
+    created_at TEXT
+);
+INSERT INTO tenants (tenant_id, tenant_name, created_at)
+VALUES (1, 'Jay Jay Group', to_char(now(), 'YYYY-MM-DD HH24:MI:SS'))
+ON CONFLICT DO NOTHING;
+-- The seed row bypasses the identity sequence; move it past every explicit id
+SELECT setval(pg_get_serial_sequence('tenants', 'tenant_id'), (SELECT MAX(tenant_id) FROM tenants));
+
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    username TEXT,
+    password TEXT,
+    role TEXT,
+    department TEXT,
+    tenant_id INTEGER NOT NULL DEFAULT 1 REFERENCES tenants(tenant_id)
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_username_unique ON users(username);
+
+CREATE TABLE IF NOT EXISTS departments (
+    department_id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    department_name TEXT,
+    tenant_id INTEGER NOT NULL DEFAULT 1 REFERENCES tenants(tenant_id)
+);
+
+CREATE TABLE IF NOT EXISTS projects (
+    project_id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    project_name TEXT,
+    year TEXT,
+    jjm_strategic_pillars TEXT,
+    target_main_category TEXT,
+    target_sub_category TEXT,
+    target_16_dimensions TEXT,
+    jjm_action_plan TEXT,
+    start_date TEXT,
+    end_date TEXT,
+    roadmap_captain TEXT,
+    project_leaders TEXT,
+    project_owners TEXT,
+    task_status TEXT,
+    task_completion_rate DOUBLE PRECISION,
+    jjm_comments TEXT,
+    target_remark TEXT,
+    manager TEXT,
+    row_version INTEGER NOT NULL DEFAULT 1,
+    tenant_id INTEGER NOT NULL DEFAULT 1 REFERENCES tenants(tenant_id)
+);
+
+-- Every write path advances the version, so compare-and-swap updates see it
+CREATE OR REPLACE FUNCTION projects_bump_row_version() RETURNS trigger AS $$
+BEGIN
+    IF NEW.row_version = OLD.row_version THEN
+        NEW.row_version := OLD.row_version + 1;
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+CREATE OR REPLACE TRIGGER trg_projects_row_version BEFORE UPDATE ON projects
+    FOR EACH ROW EXECUTE FUNCTION projects_bump_row_version();
+
+-- Archive tier: completed projects of long-ended periods, moved out of the live table with their IDs
+CREATE TABLE IF NOT EXISTS projects_archive (
+    project_id INTEGER PRIMARY KEY,
+    project_name TEXT,
+    year TEXT,
+    jjm_strategic_pillars TEXT,
+    target_main_category TEXT,
+    target_sub_category TEXT,
+    target_16_dimensions TEXT,
+    jjm_action_plan TEXT,
+    start_date TEXT,
+    end_date TEXT,
+    roadmap_captain TEXT,
+    project_leaders TEXT,
+    project_owners TEXT,
+    task_status TEXT,
+    task_completion_rate DOUBLE PRECISION,
+    jjm_comments TEXT,
+    target_remark TEXT,
+    manager TEXT,
+    row_version INTEGER NOT NULL DEFAULT 1,
+    tenant_id INTEGER NOT NULL DEFAULT 1 REFERENCES tenants(tenant_id),
+    archived_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_projects_archive_tenant_year ON projects_archive(tenant_id, year);
+
+CREATE TABLE IF NOT EXISTS import_sheets (
+    import_id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    workbook TEXT,
+    sheet TEXT,
+    rows_read INTEGER,
+    rows_inserted INTEGER,
+    rows_updated INTEGER,
+    rows_skipped INTEGER,
+    error TEXT,
+    imported_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS excel_mapping_profiles (
+    fingerprint TEXT PRIMARY KEY,
+    name TEXT,
+    headers TEXT,
+    mapping TEXT,
+    created_at TEXT,
+    last_used_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS dimensions (
+    dimension_id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    project_id INTEGER REFERENCES projects(project_id),
+    dimension_name TEXT,
+    dimension_score INTEGER,
+    timestamp TEXT
+);
+
+-- Dimension scores of archived projects, moved together with them
+CREATE TABLE IF NOT EXISTS dimensions_archive (
+    dimension_id INTEGER PRIMARY KEY,
+    project_id INTEGER REFERENCES projects_archive(project_id),
+    dimension_name TEXT,
+    dimension_score INTEGER,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_dimensions_archive_project ON dimensions_archive(project_id);
+
+CREATE TABLE IF NOT EXISTS training_sessions (
+    session_id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    title TEXT,
+    description TEXT,
+    schedule TEXT,
+    material_path TEXT,
+    material_sha256 TEXT,
+    tenant_id INTEGER NOT NULL DEFAULT 1 REFERENCES tenants(tenant_id)
+);
+
+-- Databases created before tenants existed get the key, every existing row landing in tenant 1
+ALTER TABLE users ADD COLUMN IF NOT EXISTS tenant_id INTEGER NOT NULL DEFAULT 1 REFERENCES tenants(tenant_id);
+ALTER TABLE departments ADD COLUMN IF NOT EXISTS tenant_id INTEGER NOT NULL DEFAULT 1 REFERENCES tenants(tenant_id);
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS tenant_id INTEGER NOT NULL DEFAULT 1 REFERENCES tenants(tenant_id);
+ALTER TABLE training_sessions ADD COLUMN IF NOT EXISTS tenant_id INTEGER NOT NULL DEFAULT 1 REFERENCES tenants(tenant_id);
+
+-- Every lookup is scoped to one tenant, so indexes lead with tenant_id
+DROP INDEX IF EXISTS idx_projects_name;
+DROP INDEX IF EXISTS idx_projects_name_lower;
+DROP INDEX IF EXISTS idx_departments_name;
+DROP INDEX IF EXISTS idx_training_sessions_schedule;
+CREATE INDEX IF NOT EXISTS idx_projects_tenant ON projects(tenant_id, project_id);
+CREATE INDEX IF NOT EXISTS idx_projects_tenant_name ON projects(tenant_id, project_name);
+-- Case-insensitive prefix lookups (lower(name) LIKE 'abc%') for the project picker
+CREATE INDEX IF NOT EXISTS idx_projects_tenant_name_lower ON projects(tenant_id, lower(project_name) text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_projects_tenant_status ON projects(tenant_id, task_status);
+CREATE INDEX IF NOT EXISTS idx_users_tenant_role ON users(tenant_id, role, username);
+CREATE INDEX IF NOT EXISTS idx_departments_tenant_name ON departments(tenant_id, department_name);
+CREATE INDEX IF NOT EXISTS idx_training_sessions_tenant_schedule ON training_sessions(tenant_id, schedule);
+
+CREATE TABLE IF NOT EXISTS training_materials (
+    sha256 TEXT PRIMARY KEY,
+    file_name TEXT,
+    content_type TEXT,
+    size_bytes BIGINT,
+    stored_path TEXT,
+    created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS user_progress (
+    user_id INTEGER NOT NULL,
+    session_id INTEGER NOT NULL REFERENCES training_sessions(session_id),
+    status TEXT NOT NULL DEFAULT 'Not Started',
+    updated_at TEXT,
+    PRIMARY KEY (user_id, session_id)
+);
+CREATE INDEX IF NOT EXISTS idx_user_progress_session ON user_progress(session_id, status);
+
+-- Per-user completion figures, kept current by a trigger so dashboards never aggregate on read
+CREATE TABLE IF NOT EXISTS user_training_summary (
+    user_id INTEGER PRIMARY KEY,
+    enrolled_sessions INTEGER NOT NULL DEFAULT 0,
+    in_progress_sessions INTEGER NOT NULL DEFAULT 0,
+    completed_sessions INTEGER NOT NULL DEFAULT 0,
+    completion_pct DOUBLE PRECISION NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_user_training_summary_pct ON user_training_summary(completion_pct);
+
+CREATE OR REPLACE FUNCTION refresh_user_training_summary(uid INTEGER) RETURNS void AS $$
+    INSERT INTO user_training_summary (
+        user_id, enrolled_sessions, in_progress_sessions, completed_sessions, completion_pct
+    )
+    SELECT uid, COUNT(*),
+           COUNT(*) FILTER (WHERE status = 'In Progress'),
+           COUNT(*) FILTER (WHERE status = 'Completed'),
+           COALESCE(ROUND(100.0 * COUNT(*) FILTER (WHERE status = 'Completed') / NULLIF(COUNT(*), 0), 1), 0)
+    FROM user_progress WHERE user_id = uid
+    ON CONFLICT (user_id) DO UPDATE SET
+        enrolled_sessions = excluded.enrolled_sessions,
+        in_progress_sessions = excluded.in_progress_sessions,
+        completed_sessions = excluded.completed_sessions,
+        completion_pct = excluded.completion_pct;
+$$ LANGUAGE sql;
+
+-- Training uptake per (session, department, role), adjusted incrementally
+CREATE TABLE IF NOT EXISTS training_cohort_stats (
+    session_id INTEGER NOT NULL,
+    department TEXT NOT NULL,
+    role TEXT NOT NULL,
+    enrolled INTEGER NOT NULL DEFAULT 0,
+    in_progress INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (session_id, department, role)
+);
+
+CREATE OR REPLACE FUNCTION apply_cohort_delta(p_session INTEGER, p_user INTEGER, p_status TEXT, p_sign INTEGER)
+RETURNS void AS $$
+    INSERT INTO training_cohort_stats (session_id, department, role, enrolled, in_progress, completed)
+    SELECT p_session,
+           COALESCE(u.department, 'Unassigned'),
+           COALESCE(u.role, 'Unassigned'),
+           p_sign,
+           p_sign * (p_status = 'In Progress')::int,
+           p_sign * (p_status = 'Completed')::int
+    FROM (SELECT 1) AS one LEFT JOIN users u ON u.user_id = p_user
+    ON CONFLICT (session_id, department, role) DO UPDATE SET
+        enrolled = training_cohort_stats.enrolled + excluded.enrolled,
+        in_progress = training_cohort_stats.in_progress + excluded.in_progress,
+        completed = training_cohort_stats.completed + excluded.completed;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION user_progress_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM refresh_user_training_summary(OLD.user_id);
+        PERFORM apply_cohort_delta(OLD.session_id, OLD.user_id, OLD.status, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM refresh_user_training_summary(NEW.user_id);
+        PERFORM apply_cohort_delta(NEW.session_id, NEW.user_id, NEW.status, 1);
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+CREATE OR REPLACE TRIGGER trg_user_progress_changed AFTER INSERT OR UPDATE OR DELETE ON user_progress
+    FOR EACH ROW EXECUTE FUNCTION user_progress_changed();
+
+-- A user's department or role change moves their progress rows to the new cohort bucket
+CREATE OR REPLACE FUNCTION users_cohort_changed() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO training_cohort_stats (session_id, department, role, enrolled, in_progress, completed)
+    SELECT p.session_id,
+           COALESCE(OLD.department, 'Unassigned'),
+           COALESCE(OLD.role, 'Unassigned'),
+           -COUNT(*),
+           -SUM((p.status = 'In Progress')::int),
+           -SUM((p.status = 'Completed')::int)
+    FROM user_progress p
+    WHERE p.user_id = OLD.user_id
+    GROUP BY p.session_id
+    ON CONFLICT (session_id, department, role) DO UPDATE SET
+        enrolled = training_cohort_stats.enrolled + excluded.enrolled,
+        in_progress = training_cohort_stats.in_progress + excluded.in_progress,
+        completed = training_cohort_stats.completed + excluded.completed;
+    INSERT INTO training_cohort_stats (session_id, department, role, enrolled, in_progress, completed)
+    SELECT p.session_id,
+           COALESCE(NEW.department, 'Unassigned'),
+           COALESCE(NEW.role, 'Unassigned'),
+           COUNT(*),
+           SUM((p.status = 'In Progress')::int),
+           SUM((p.status = 'Completed')::int)
+    FROM user_progress p
+    WHERE p.user_id = NEW.user_id
+    GROUP BY p.session_id
+    ON CONFLICT (session_id, department, role) DO UPDATE SET
+        enrolled = training_cohort_stats.enrolled + excluded.enrolled,
+        in_progress = training_cohort_stats.in_progress + excluded.in_progress,
+        completed = training_cohort_stats.completed + excluded.completed;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+CREATE OR REPLACE TRIGGER trg_users_cohort AFTER UPDATE OF department, role ON users
+    FOR EACH ROW WHEN (OLD.department IS DISTINCT FROM NEW.department OR OLD.role IS DISTINCT FROM NEW.role)
+    EXECUTE FUNCTION users_cohort_changed();
+
+-- Issued login sessions; only a hash of each token is stored
+CREATE TABLE IF NOT EXISTS session_tokens (
+    token_hash TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    role TEXT,
+    created_at TEXT,
+    expires_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_session_tokens_user ON session_tokens(user_id);
+
+-- One-time codes the browser swaps for the HttpOnly session cookie (see auth.py)
+CREATE TABLE IF NOT EXISTS session_handoffs (
+    code_hash TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    expires_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS app_settings (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+-- Monotonic per-scope counters; cached loaders take the version as a cache key
+CREATE TABLE IF NOT EXISTS data_versions (
+    scope TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+-- Telemetry tables, written only through the write-behind queue
+CREATE TABLE IF NOT EXISTS audit_log (
+    audit_id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    logged_at TEXT,
+    user_id INTEGER,
+    action TEXT,
+    detail TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_audit_log_logged_at ON audit_log(logged_at);
+
+CREATE TABLE IF NOT EXISTS view_counters (
+    view TEXT NOT NULL,
+    day TEXT NOT NULL,
+    views INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (view, day)
+);
+
+CREATE TABLE IF NOT EXISTS timing_spans (
+    span_id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    name TEXT,
+    started_at TEXT,
+    duration_ms DOUBLE PRECISION,
+    user_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_timing_spans_name ON timing_spans(name, started_at);
@@ -0,0 +1,93 @@
+"""
+ASGI entry point: the Streamlit app plus its cookie-authenticated routes.
+
+    streamlit run server.py        (or: uvicorn server:app)
+
+POST /api/session redeems the one-time handoff code app.py hands the
+browser after login and sets the session token as an HttpOnly cookie;
+DELETE /api/session revokes the cookie's token and clears it at logout.
+GET /api/training/<session_id>/material streams a training material from
+disk, in fixed-size chunks, to a learner enrolled in that session.
+See auth.py.
+"""
+import functools
+import os
+
+import streamlit as st
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import FileResponse, JSONResponse, Response
+from starlette.routing import Route
+
+import auth
+import storage
+
+
+@functools.cache
+def get_backend():
+    return storage.backend_from_url()
+
+
+def _with_connection(func, *args):
+    conn = get_backend().connect()
+    try:
+        return func(conn, *args)
+    finally:
+        conn.close()
+
+
+def _redeem(conn, code):
+    return auth.redeem_session_handoff(conn, auth.session_secret(conn), code)
+
+
+async def session_cookie(request):
+    if request.method == "DELETE":
+        await run_in_threadpool(_with_connection, auth.revoke_session_token,
+                                request.cookies.get(auth.SESSION_COOKIE))
+        response = Response(status_code=204)
+        response.delete_cookie(auth.SESSION_COOKIE, path="/")
+        return response
+    try:
+        code = (await request.json()).get("code")
+    except (ValueError, AttributeError):
+        code = None
+    token = await run_in_threadpool(_with_connection, _redeem, code)
+    if token is None:
+        return JSONResponse({"error": "invalid or expired code"}, status_code=400)
+    response = Response(status_code=204)
+    response.set_cookie(
+        auth.SESSION_COOKIE, token, max_age=auth.SESSION_TOKEN_TTL_HOURS * 3600, path="/",
+        httponly=True, samesite="strict", secure=request.url.scheme == "https",
+    )
+    return response
+
+
+def _enrolled_material(conn, token, session_id):
+    session = auth.validate_session_token(conn, auth.session_secret(conn), token) if token else None
+    if session is None:
+        return None
+    return conn.execute('''
+        SELECT s.material_path, m.file_name, m.content_type
+        FROM user_progress p
+        JOIN training_sessions s ON s.session_id = p.session_id
+        LEFT JOIN training_materials m ON m.sha256 = s.material_sha256
+        WHERE p.user_id = ? AND p.session_id = ?
+    ''', (session[0], session_id)).fetchone()
+
+
+async def training_material(request):
+    material = await run_in_threadpool(_with_connection, _enrolled_material,
+                                       request.cookies.get(auth.SESSION_COOKIE), request.path_params["session_id"])
+    if material is None or not material[0] or not os.path.exists(material[0]):
+        return Response(status_code=404)
+    path, file_name, content_type = material
+    return FileResponse(path, filename=file_name or os.path.basename(path),
+                        media_type=content_type or "application/octet-stream")
+
+
+app = st.App(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py"),
+    routes=[
+        Route(auth.SESSION_ROUTE, session_cookie, methods=["POST", "DELETE"]),
+        Route(auth.MATERIAL_ROUTE.replace("{session_id}", "{session_id:int}"), training_material),
+    ],
+)
@@ -0,0 +1,132 @@
+"""
+Cache tier shared by every app process.
+
+st.cache_data lives inside one Streamlit process, so each replica behind a
+load balancer would rebuild the same snapshots and figures. Values stored
+here are visible to all replicas. CACHE_URL selects the backend:
+
+    file://.cache/shared            (default; a directory on a disk the replicas share)
+    redis://host:6379/0             (needs the 'redis' package)
+
+Keys carry the caller's data version, so writers never delete entries; stale
+versions simply stop being read and age out after CACHE_TTL_SECONDS.
+Values are pickled, so point CACHE_URL only at storage the app alone writes to.
+Kept free of Streamlit, like storage.py.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+
+try:
+    import redis
+except ImportError:  # only needed for a Redis cache
+    redis = None
+
+DEFAULT_URL = "file://.cache/shared"
+DEFAULT_TTL_SECONDS = 24 * 3600
+
+
+def make_key(namespace, args):
+    """Stable key for a namespace and the call's (picklable) arguments."""
+    return f"{namespace}:{hashlib.sha256(pickle.dumps(args)).hexdigest()}"
+
+
+# ---------- 1) Local directory ----------
+class DiskCache:
+    # Expired files are swept on every Nth set() rather than on each call
+    SWEEP_EVERY = 100
+
+    def __init__(self, directory, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self._sets = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        namespace, digest = key.split(":", 1)
+        return os.path.join(self.directory, f"{namespace}-{digest}.pkl")
+
+    def get(self, key):
+        """Returns the stored value, or None when missing, expired or unreadable."""
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                return None
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def set(self, key, value):
+        # Write to a temp file and rename, so readers in other processes never see half a value
+        # A full or read-only disk costs a recompute on the next miss, never the page
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._sets += 1
+        if self._sets % self.SWEEP_EVERY == 0:
+            self.sweep()
+
+    def sweep(self):
+        """Deletes expired entries. Returns how many were removed."""
+        cutoff = time.time() - self.ttl_seconds
+        removed = 0
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError:
+                pass  # removed concurrently by another replica
+        return removed
+
+
+# ---------- 2) Redis ----------
+class RedisCache:
+    def __init__(self, url, ttl_seconds=DEFAULT_TTL_SECONDS):
+        if redis is None:
+            raise RuntimeError("A Redis cache needs the 'redis' package")
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key):
+        data = self.client.get(key)
+        return pickle.loads(data) if data is not None else None
+
+    def set(self, key, value):
+        self.client.set(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), ex=self.ttl_seconds)
+
+    def sweep(self):
+        return 0  # Redis expires keys itself
+
+
+def cache_from_url(url=None):
+    """Builds the cache named by `url` (default: the CACHE_URL environment variable, else a local directory)."""
+    url = url or os.environ.get("CACHE_URL", DEFAULT_URL)
+    ttl_seconds = int(os.environ.get("CACHE_TTL_SECONDS", str(DEFAULT_TTL_SECONDS)))
+    if url.startswith("file://"):
+        return DiskCache(url[len("file://"):], ttl_seconds)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCache(url, ttl_seconds)
+    raise ValueError(f"Unsupported CACHE_URL: {url}")
+
+
+def get_or_compute(cache, namespace, args, compute):
+    """Returns the cached value for (namespace, args), computing and storing it on a miss."""
+    key = make_key(namespace, args)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value)
+    return value
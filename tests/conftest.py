@@ -0,0 +1,25 @@
+import importlib
+import sys
+
+import pytest
+import streamlit as st
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """app.py imported in Streamlit's bare mode against a fresh SQLite database in tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'app.db'}")
+    monkeypatch.setenv("PASSWORD_HASH_ITERATIONS", "1000")
+    monkeypatch.setenv("SNAPSHOT_MAX_AGE_SECONDS", "0")
+    monkeypatch.setenv("CACHE_PREWARM_WORKERS", "0")
+    monkeypatch.setenv("CACHE_URL", f"file://{tmp_path / 'cache'}")
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    sys.modules.pop("app", None)
+    module = importlib.import_module("app")
+    yield module
+    module.conn.close()
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    sys.modules.pop("app", None)
@@ -0,0 +1,50 @@
+import reporting
+
+OLD_PERIOD = "2020-2021"
+
+
+def _add_project(app, name, year, status):
+    app.add_project(name, year, "Pillar A", "Cat", "Sub", "Dim", "plan", f"{year[:4]}-01-01", f"{year[:4]}-06-01",
+                    "captain", "leader", "owner", status, 100 if status == "Completed" else 40,
+                    "comment", "remark", "mgr1")
+    project_id = app.get_project_by_name(name).project_id
+    app.c.execute("INSERT INTO dimensions (project_id, dimension_name, dimension_score) VALUES (?, 'Strategy', 3)",
+                  (project_id,))
+    app.conn.commit()
+    return project_id
+
+
+def _count(app, table):
+    return app.c.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_archiving_a_period_shrinks_live_tables_but_not_totals(app):
+    for i in range(3):
+        _add_project(app, f"Done {i}", OLD_PERIOD, "Completed")
+    _add_project(app, "Still open", OLD_PERIOD, "In Progress")
+    _add_project(app, "Current", "2099-2100", "Completed")
+    tenant_id = app.DEFAULT_TENANT_ID
+    report_before = reporting.compute_summary(reporting.load_projects(app.conn, tenant_id=tenant_id))
+    projects_before = sorted(app.get_all_projects())
+    version_before = app.get_data_version("projects", tenant_id)
+    assert len(app.load_project_snapshot(version_before, tenant_id)) == 5
+
+    assert app.archive_projects(keep_periods=0, tenant_id=tenant_id) == 3
+
+    assert (_count(app, "projects"), _count(app, "dimensions")) == (2, 2)
+    assert (_count(app, "projects_archive"), _count(app, "dimensions_archive")) == (3, 3)
+    assert app.get_archived_periods() == {OLD_PERIOD: 3}
+    # The dashboard shows live projects; archiving bumps the data version, so its cache is not reused
+    version_after = app.get_data_version("projects", tenant_id)
+    assert version_after > version_before
+    assert len(app.load_project_snapshot(version_after, tenant_id)) == 2
+    assert reporting.compute_summary(reporting.load_projects(app.conn, tenant_id=tenant_id))["Total Projects"] == 2
+    # Reports that include the archived period see exactly what they saw before
+    assert reporting.compute_summary(
+        reporting.load_projects(app.conn, tenant_id=tenant_id, archived_periods=[OLD_PERIOD])
+    ) == report_before
+    assert sorted(app.get_all_projects([OLD_PERIOD])) == projects_before
+
+    assert app.restore_archived_projects([OLD_PERIOD]) == 3
+    assert (_count(app, "projects"), _count(app, "dimensions"), _count(app, "projects_archive")) == (5, 5, 0)
+    assert sorted(app.get_all_projects()) == projects_before
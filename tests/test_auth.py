@@ -0,0 +1,86 @@
+import time
+
+import auth
+
+
+def _user_id(app, username):
+    return app.c.execute("SELECT user_id FROM users WHERE username = ?", (username,)).fetchone()[0]
+
+
+def test_password_hash_round_trip(app):
+    stored = app.hash_password("s3cret")
+
+    assert stored.startswith(app.PASSWORD_HASH_PREFIX + "$1000$")
+    assert stored != app.hash_password("s3cret")  # salted
+    assert app.verify_password("s3cret", stored)
+    assert not app.verify_password("S3cret", stored)
+    assert not app.verify_password("s3cret", "s3cret")  # plain text is never accepted as a hash
+
+
+def test_legacy_plaintext_passwords_are_hashed_and_still_log_in(app):
+    app.c.execute("INSERT INTO users (username, password, role, department, tenant_id) VALUES (?, ?, ?, ?, ?)",
+                  ("legacy", "old-password", "User", "Ops", app.DEFAULT_TENANT_ID))
+    app.conn.commit()
+
+    app.upgrade_legacy_passwords.clear()
+    app.upgrade_legacy_passwords()
+
+    stored = app.c.execute("SELECT password FROM users WHERE username = 'legacy'").fetchone()[0]
+    assert stored.startswith(app.PASSWORD_HASH_PREFIX + "$")
+    assert app.login_user("legacy", "old-password").username == "legacy"
+    assert app.login_user("legacy", stored) is None
+
+
+def test_session_token_round_trip_reads_the_current_role(app):
+    app.add_user("mgr1", "x", "Manager", "Ops")
+    user_id = _user_id(app, "mgr1")
+    token = app.issue_session_token(user_id, "Manager")
+
+    assert tuple(app.validate_session_token(token)) == (user_id, "Manager", app.DEFAULT_TENANT_ID)
+    app.c.execute("UPDATE users SET role = 'User' WHERE user_id = ?", (user_id,))
+    app.conn.commit()
+    assert tuple(app.validate_session_token(token)) == (user_id, "User", app.DEFAULT_TENANT_ID)
+    app.revoke_session_token(token)
+    assert app.validate_session_token(token) is None
+
+
+def test_tampered_session_token_is_rejected(app):
+    app.add_user("admin", "x", "Admin", "Ops")
+    app.add_user("u1", "x", "User", "Ops")
+    admin_id = _user_id(app, "admin")
+    token = app.issue_session_token(_user_id(app, "u1"), "User")
+    user_id, expires_at, nonce, signature = token.split(".")
+
+    for forged in (
+        ".".join([str(admin_id), expires_at, nonce, signature]),
+        ".".join([user_id, str(int(expires_at) + 3600), nonce, signature]),
+        ".".join([user_id, expires_at, nonce, signature[:-1] + ("0" if signature[-1] != "0" else "1")]),
+        token + ".extra",
+        "",
+        None,
+    ):
+        assert app.validate_session_token(forged) is None
+
+
+def test_expired_session_token_is_rejected(app):
+    app.add_user("u1", "x", "User", "Ops")
+    secret = app.get_session_secret()
+    issued_at = time.time() - (auth.SESSION_TOKEN_TTL_HOURS * 3600 + 60)
+    token = auth.issue_session_token(app.conn, secret, _user_id(app, "u1"), "User", now=issued_at)
+
+    assert auth.validate_session_token(app.conn, secret, token, now=issued_at + 60) is not None
+    assert app.validate_session_token(token) is None
+
+
+def test_session_handoff_code_is_single_use(app):
+    app.add_user("u1", "x", "User", "Ops")
+    user_id = _user_id(app, "u1")
+    secret = app.get_session_secret()
+    code = auth.create_session_handoff(app.conn, user_id)
+
+    token = auth.redeem_session_handoff(app.conn, secret, code)
+
+    assert tuple(app.validate_session_token(token))[:2] == (user_id, "User")
+    assert auth.redeem_session_handoff(app.conn, secret, code) is None
+    late = auth.create_session_handoff(app.conn, user_id, now=time.time() - auth.HANDOFF_TTL_SECONDS - 1)
+    assert auth.redeem_session_handoff(app.conn, secret, late) is None
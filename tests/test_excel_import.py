@@ -0,0 +1,31 @@
+import io
+
+import pandas as pd
+
+import excel_import
+
+
+def _workbook(columns, rows):
+    buffer = io.BytesIO()
+    pd.DataFrame(rows, columns=columns).to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def test_profile_applies_to_headers_that_differ_only_in_case():
+    saved_headers = ["Project Name", "Year"]
+    profiles = {excel_import.header_fingerprint(saved_headers): {"Project Name": "project_name", "Year": "year"}}
+    data = _workbook(["PROJECT NAME", "year"], [["Line 4 sensors", "2025-2026"]])
+
+    result = excel_import.parse_sheet("plant.xlsx", data, 0, profiles)
+
+    assert result["mapping_source"] == "profile"
+    assert result["error"] is None
+    assert result["skipped"] == []
+    assert len(result["rows"]) == 1
+    row = dict(zip(excel_import.PROJECT_FIELDS, result["rows"][0]))
+    assert (row["project_name"], row["year"]) == ("Line 4 sensors", "2025-2026")
+
+
+def test_apply_profile_drops_headers_missing_from_the_sheet():
+    profile = {"Project Name": "project_name", "Manager": "manager"}
+    assert excel_import.apply_profile(profile, ("project-name",)) == {"project-name": "project_name"}
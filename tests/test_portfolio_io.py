@@ -0,0 +1,51 @@
+import sqlite3
+
+import pyarrow.parquet as pq
+
+import portfolio_io
+
+TENANT_A, TENANT_B = 1, 2
+
+
+def _database(path):
+    db = sqlite3.connect(path)
+    db.execute(f'''
+        CREATE TABLE projects ({", ".join(portfolio_io.TABLE_SCHEMAS["projects"].names)}, tenant_id INTEGER)
+    ''')
+    db.execute("CREATE TABLE dimensions (dimension_id, project_id, dimension_name, dimension_score, timestamp)")
+    db.execute("CREATE TABLE users (user_id INTEGER PRIMARY KEY, username TEXT, tenant_id INTEGER)")
+    db.execute("CREATE TABLE user_progress (user_id, session_id, status, updated_at)")
+    for project_id, tenant_id in ((1, TENANT_A), (2, TENANT_B), (3, TENANT_A)):
+        db.execute("INSERT INTO projects (project_id, project_name, start_date, tenant_id) VALUES (?, ?, ?, ?)",
+                   (project_id, f"Project {project_id}", "2025-01-01", tenant_id))
+    db.executemany("INSERT INTO dimensions VALUES (?, ?, 'Strategy', 3, '2025-01-01 08:00:00')",
+                   [(1, 1), (2, 2), (3, 3), (4, 2)])
+    db.executemany("INSERT INTO users VALUES (?, ?, ?)", [(10, "a1", TENANT_A), (20, "b1", TENANT_B)])
+    db.executemany("INSERT INTO user_progress VALUES (?, ?, 'Completed', '2025-01-01 08:00:00')",
+                   [(10, 1), (20, 1), (20, 2)])
+    db.commit()
+    db.close()
+
+
+def test_tenant_export_leaves_out_other_tenants_rows_in_every_table(tmp_path):
+    _database(tmp_path / "tracker.db")
+
+    assert portfolio_io.main(["--db", str(tmp_path / "tracker.db"), "--tenant", str(TENANT_A),
+                              "export", "--out", str(tmp_path / "out")]) == 0
+
+    def column(table, name):
+        return sorted(pq.read_table(tmp_path / "out" / f"{table}.parquet").column(name).to_pylist())
+
+    assert column("projects", "project_id") == [1, 3]
+    assert column("dimensions", "project_id") == [1, 3]
+    assert column("user_progress", "user_id") == [10]
+
+
+def test_export_without_tenant_keeps_every_row(tmp_path):
+    _database(tmp_path / "tracker.db")
+    conn = sqlite3.connect(tmp_path / "tracker.db")
+
+    written = portfolio_io.export_tables(conn, tmp_path / "out")
+    conn.close()
+
+    assert sorted(written.values()) == [3, 3, 4]
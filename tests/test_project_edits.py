@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+
+def _add_project(app, name="Line 4 sensors"):
+    app.add_project(name, "2025-2026", "Pillar A", "Cat", "Sub", "Dim", "plan", "2025-01-01", "2025-06-01",
+                    "captain", "leader", "owner", "In Progress", 40, "comment", "remark", "mgr1")
+    return app.get_project_by_name(name).project_id
+
+
+def test_concurrent_edits_at_the_same_version_let_exactly_one_through(app, monkeypatch):
+    project_id = _add_project(app)
+    loaded = app.get_project_record(project_id).row_version
+    first_written, second_done = threading.Event(), threading.Event()
+    bump_data_version = app.bump_data_version
+
+    def bump_after_the_other_edit(*args, **kwargs):
+        # Hold the first edit's transaction open while the second edit runs
+        if not first_written.is_set():
+            first_written.set()
+            second_done.wait(timeout=1)
+        bump_data_version(*args, **kwargs)
+
+    monkeypatch.setattr(app, "bump_data_version", bump_after_the_other_edit)
+    outcomes = {}
+
+    def edit(year):
+        try:
+            outcomes[year] = app.apply_project_edits({project_id: {"year": year}}, {project_id: loaded})
+        except app.StaleProjectError as e:
+            outcomes[year] = e
+
+    first = threading.Thread(target=edit, args=("2030",))
+    first.start()
+    first_written.wait(timeout=5)
+    try:
+        edit("2031")
+    finally:
+        second_done.set()
+    first.join()
+
+    assert outcomes["2030"] == 1
+    assert isinstance(outcomes["2031"], app.StaleProjectError)
+    assert outcomes["2031"].project_ids == [project_id]
+    record = app.get_project_record(project_id)
+    assert (record.year, record.row_version) == ("2030", loaded + 1)
+
+
+def test_stale_update_writes_nothing(app):
+    project_id = _add_project(app)
+    record = app.get_project_record(project_id)
+
+    with pytest.raises(app.StaleProjectError):
+        app.update_project(*record[:-2], "new manager", expected_version=record.row_version + 1)
+
+    assert app.get_project_record(project_id) == record
+
+
+def test_bulk_status_update_counts_only_rows_it_changed(app):
+    project_ids = [_add_project(app, f"Project {i}") for i in range(3)]
+    missing_id = max(project_ids) + 100
+
+    changed = app.bulk_update_project_status("Completed", 100, project_ids=project_ids[:2] + [missing_id])
+
+    assert changed == 2
+    assert [app.get_project_record(pid).task_status for pid in project_ids] == ["Completed", "Completed", "In Progress"]
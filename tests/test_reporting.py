@@ -0,0 +1,17 @@
+import pandas as pd
+
+import reporting
+
+MARKUP = "</script><img src=x onerror=alert(1)>"
+
+
+def test_html_report_escapes_user_supplied_text():
+    row = {column: MARKUP for column in reporting.PROJECT_COLUMNS}
+    row.update({"ID": 1, "Start Date": "2025-01-01", "End Date": "2025-06-01",
+                "Task Status": "Completed", "Task Completion Rate": 100})
+    df = reporting.prepare_projects_frame(pd.DataFrame([row], columns=reporting.PROJECT_COLUMNS))
+
+    page = reporting.render_html_report(df, title=f"Project Report - {MARKUP}", include_plotlyjs=False)
+
+    assert "<img" not in page
+    assert "<h1>Project Report - &lt;/script&gt;&lt;img src=x onerror=alert(1)&gt;</h1>" in page
@@ -0,0 +1,256 @@
+import os
+import sqlite3
+import threading
+
+import pytest
+
+import storage
+
+
+# ---------- translate_placeholders ----------
+def test_translate_placeholders_rewrites_qmarks_and_escapes_percent():
+    sql = "SELECT * FROM projects WHERE tenant_id = ? AND project_name LIKE ? AND rate > 50%"
+    assert storage.translate_placeholders(sql) == (
+        "SELECT * FROM projects WHERE tenant_id = %s AND project_name LIKE %s AND rate > 50%%"
+    )
+
+
+def test_translate_placeholders_leaves_quoted_text_alone():
+    sql = "SELECT 'why?', \"odd?col\" FROM t WHERE a = ? AND b = 'it''s ?' AND c LIKE '100%'"
+    assert storage.translate_placeholders(sql) == (
+        "SELECT 'why?', \"odd?col\" FROM t WHERE a = %s AND b = 'it''s ?' AND c LIKE '100%%'"
+    )
+
+
+# ---------- backend_from_url ----------
+class StubPool:
+    """Stands in for psycopg_pool.ConnectionPool: hands out StubConnections and records their use."""
+
+    def __init__(self, url=None, min_size=1, max_size=10, open=True, kwargs=None):
+        self.url, self.min_size, self.max_size, self.kwargs = url, min_size, max_size, kwargs
+        self.lock = threading.Lock()
+        self.connections = []
+        self.idle = []
+
+    def getconn(self):
+        with self.lock:
+            if not self.idle:
+                self.connections.append(StubConnection(len(self.connections)))
+                self.idle.append(self.connections[-1])
+            conn = self.idle.pop()
+            conn.checked_out = True
+            return conn
+
+    def putconn(self, conn):
+        with self.lock:
+            conn.checked_out = False
+            self.idle.append(conn)
+
+    @property
+    def checked_out(self):
+        return [conn for conn in self.connections if conn.checked_out]
+
+
+class StubConnection:
+    def __init__(self, number):
+        self.number = number
+        self.checked_out = False
+        self.statements = []
+
+    def execute(self, sql):
+        self.statements.append(sql)
+
+    def cursor(self):
+        return StubCursor(self)
+
+
+class StubCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rowcount = -1
+
+    def execute(self, sql, params):
+        if "fail" in sql:
+            raise RuntimeError("statement failed")
+        self.connection.statements.append(sql)
+        self.rowcount = len(params)
+
+    def executemany(self, sql, seq_of_params):
+        self.connection.statements.append(sql)
+        self.rowcount = len(seq_of_params)
+
+    def fetchone(self):
+        return (self.connection.number,)
+
+
+def test_backend_from_url_opens_sqlite_paths(tmp_path):
+    backend = storage.backend_from_url(f"sqlite:///{tmp_path / 'tracker.db'}")
+    assert isinstance(backend, storage.SQLiteBackend)
+    assert backend.path == str(tmp_path / "tracker.db")
+    assert backend.url == "sqlite:///" + str(tmp_path / "tracker.db")
+
+
+def test_backend_from_url_defaults_to_database_url(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'env.db'}")
+    assert storage.backend_from_url().path == str(tmp_path / "env.db")
+    monkeypatch.delenv("DATABASE_URL")
+    assert storage.backend_from_url().path == "industry_4_0_app.db"
+
+
+@pytest.mark.parametrize("url", [
+    "postgres://app@db:5432/tracker",
+    "postgresql://app@db:5432/tracker",
+    "postgresql+psycopg://app@db:5432/tracker",
+])
+def test_backend_from_url_normalizes_postgres_urls(url, monkeypatch):
+    monkeypatch.setattr(storage, "psycopg", object())
+    monkeypatch.setattr(storage, "ConnectionPool", StubPool)
+    monkeypatch.setenv("DB_POOL_MAX_SIZE", "4")
+    backend = storage.backend_from_url(url)
+    assert isinstance(backend, storage.PostgresBackend)
+    assert backend.pool.url == "postgresql://app@db:5432/tracker"
+    assert (backend.pool.min_size, backend.pool.max_size) == (1, 4)
+    assert backend.pool.kwargs == {"autocommit": True, "prepare_threshold": 2}
+
+
+def test_backend_from_url_rejects_other_schemes():
+    with pytest.raises(ValueError):
+        storage.backend_from_url("mysql://app@db/tracker")
+
+
+# ---------- PostgresConnection / PostgresCursor ----------
+def test_reads_outside_a_transaction_return_their_connection():
+    pool = StubPool()
+    conn = storage.PostgresConnection(pool)
+    conn.execute("SELECT 1")
+    assert pool.checked_out == []
+    assert pool.connections[0].statements == ["SELECT 1"]
+
+
+def test_a_write_pins_one_connection_until_commit():
+    pool = StubPool()
+    conn = storage.PostgresConnection(pool)
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO projects (project_name) VALUES (?)", ("Line 4",))
+    pinned = pool.checked_out
+    assert len(pinned) == 1
+    cursor.execute("SELECT ?", (1,))
+    assert cursor.fetchone() == (pinned[0].number,)
+    conn.commit()
+    assert pool.checked_out == []
+    assert pinned[0].statements == [
+        "BEGIN", "INSERT INTO projects (project_name) VALUES (%s)", "SELECT %s", "COMMIT"
+    ]
+    assert conn.total_changes == 1
+
+
+def test_each_thread_gets_its_own_transaction_and_rowcount():
+    pool = StubPool()
+    conn = storage.PostgresConnection(pool)
+    cursor = conn.cursor()
+    both_written = threading.Barrier(2)
+    seen = {}
+
+    def write(rows):
+        cursor.executemany("UPDATE projects SET year = ? WHERE project_id = ?", rows)
+        both_written.wait()
+        seen[len(rows)] = (cursor.rowcount, pool.checked_out[:])
+        both_written.wait()
+        conn.rollback()
+
+    threads = [threading.Thread(target=write, args=([("2030", i) for i in range(n)],)) for n in (2, 3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert seen[2][0] == 2 and seen[3][0] == 3
+    assert len(seen[2][1]) == 2  # both transactions were open at once, on different connections
+    assert pool.checked_out == []
+    assert all(c.statements[0] == "BEGIN" and c.statements[-1] == "ROLLBACK" for c in pool.connections)
+
+
+def test_a_failed_write_rolls_back_and_returns_the_connection():
+    pool = StubPool()
+    conn = storage.PostgresConnection(pool)
+    conn.execute("UPDATE projects SET year = ?", ("2030",))
+    with pytest.raises(RuntimeError):
+        conn.execute("UPDATE fail")
+    assert pool.checked_out == []
+    assert pool.connections[0].statements[-1] == "ROLLBACK"
+    conn.commit()  # nothing left to commit
+    assert pool.connections[0].statements[-1] == "ROLLBACK"
+
+
+# ---------- ReadSnapshot ----------
+@pytest.fixture
+def primary(tmp_path):
+    path = tmp_path / "primary.db"
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE projects (project_id INTEGER PRIMARY KEY, project_name TEXT)")
+    db.execute("INSERT INTO projects (project_name) VALUES ('first')")
+    db.commit()
+    yield storage.SQLiteBackend(str(path)), db
+    db.close()
+
+
+def _count(conn):
+    return conn.execute("SELECT COUNT(*) FROM projects").fetchone()[0]
+
+
+def _snapshot(backend, tmp_path):
+    return storage.ReadSnapshot(backend, str(tmp_path / "snapshots" / "primary.db"), max_age_seconds=3600)
+
+
+def test_snapshot_refresh_copies_only_when_the_primary_changed(primary, tmp_path):
+    backend, db = primary
+    snapshot = _snapshot(backend, tmp_path)
+    with snapshot.lease(max_age_seconds=0) as first:
+        assert _count(first) == 1
+    with snapshot.lease(max_age_seconds=0) as again:
+        assert again is first
+
+    db.execute("INSERT INTO projects (project_name) VALUES ('second')")
+    db.commit()
+    with snapshot.lease(max_age_seconds=0) as second:
+        assert second is not first
+        assert _count(second) == 2
+        with pytest.raises(sqlite3.OperationalError):
+            second.execute("INSERT INTO projects (project_name) VALUES ('read-only')")
+
+
+def test_snapshot_keeps_a_leased_generation_open_across_refreshes(primary, tmp_path):
+    backend, db = primary
+    snapshot = _snapshot(backend, tmp_path)
+    with snapshot.lease(max_age_seconds=0) as slow:
+        slow_path = snapshot._conn_path
+        for name in ("second", "third"):
+            db.execute("INSERT INTO projects (project_name) VALUES (?)", (name,))
+            db.commit()
+            snapshot.refresh()
+        assert _count(slow) == 1  # a slow read outlives any number of refreshes
+        assert os.path.exists(slow_path)
+        with snapshot.lease() as current:
+            assert _count(current) == 3
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        _count(slow)
+    assert not os.path.exists(slow_path)
+    assert os.listdir(tmp_path / "snapshots") == [os.path.basename(snapshot._conn_path)]
+
+
+def test_snapshot_startup_deletes_generations_of_finished_processes(primary, tmp_path, monkeypatch):
+    backend, _ = primary
+    folder = tmp_path / "snapshots"
+    folder.mkdir()
+    for name in ("primary.111.4.db", "primary.222.9.db", f"primary.{os.getpid()}.7.db", "other.111.1.db"):
+        (folder / name).write_bytes(b"")
+    monkeypatch.setattr(storage, "_process_running", lambda pid: pid == 222)
+
+    snapshot = _snapshot(backend, tmp_path)
+    with snapshot.lease():
+        pass
+
+    assert sorted(os.listdir(folder)) == sorted(
+        ["primary.222.9.db", "other.111.1.db", os.path.basename(snapshot._conn_path)]
+    )
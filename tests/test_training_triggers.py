@@ -0,0 +1,63 @@
+def _user_id(app, username):
+    return app.c.execute("SELECT user_id FROM users WHERE username = ?", (username,)).fetchone()[0]
+
+
+def _add_session(app, title):
+    app.c.execute("INSERT INTO training_sessions (title, schedule, tenant_id) VALUES (?, '2025-01-01', ?)",
+                  (title, app.DEFAULT_TENANT_ID))
+    app.conn.commit()
+    return app.c.execute("SELECT session_id FROM training_sessions WHERE title = ?", (title,)).fetchone()[0]
+
+
+def _summary(app, user_id):
+    return app.c.execute('''
+        SELECT enrolled_sessions, in_progress_sessions, completed_sessions, completion_pct
+        FROM user_training_summary WHERE user_id = ?
+    ''', (user_id,)).fetchone()
+
+
+def _cohorts(app):
+    """(session_id, department, role) -> (enrolled, in_progress, completed), leaving out emptied cohorts."""
+    rows = app.c.execute("SELECT session_id, department, role, enrolled, in_progress, completed "
+                         "FROM training_cohort_stats WHERE enrolled > 0").fetchall()
+    return {tuple(row[:3]): tuple(row[3:]) for row in rows}
+
+
+def test_triggers_keep_training_summaries_and_cohorts_in_step(app):
+    app.add_user("ana", "x", "User", "Ops")
+    app.add_user("ben", "x", "User", "QA")
+    ana, ben = _user_id(app, "ana"), _user_id(app, "ben")
+    intro, safety = _add_session(app, "Intro"), _add_session(app, "Safety")
+
+    # Inserts
+    app.set_user_progress(ana, intro, "Not Started")
+    app.set_user_progress(ana, safety, "In Progress")
+    app.set_user_progress(ben, intro, "Completed")
+    assert _summary(app, ana) == (2, 1, 0, 0.0)
+    assert _cohorts(app) == {
+        (intro, "Ops", "User"): (1, 0, 0),
+        (safety, "Ops", "User"): (1, 1, 0),
+        (intro, "QA", "User"): (1, 0, 1),
+    }
+
+    # Upsert of an existing row
+    app.set_user_progress(ana, intro, "Completed")
+    assert _summary(app, ana) == (2, 1, 1, 50.0)
+    assert _cohorts(app)[(intro, "Ops", "User")] == (1, 0, 1)
+
+    # Delete
+    app.c.execute("DELETE FROM user_progress WHERE user_id = ? AND session_id = ?", (ana, safety))
+    app.conn.commit()
+    assert _summary(app, ana) == (1, 0, 1, 100.0)
+    assert (safety, "Ops", "User") not in _cohorts(app)
+
+    # Moving a learner to another department moves their progress to that cohort
+    app.c.execute("UPDATE users SET department = 'QA' WHERE user_id = ?", (ana,))
+    app.conn.commit()
+    assert _cohorts(app) == {(intro, "QA", "User"): (2, 0, 2)}
+    assert _summary(app, ben) == (1, 0, 1, 100.0)
+
+    # The incrementally maintained cohorts match a full rebuild
+    maintained = _cohorts(app)
+    app.rebuild_training_cohort_stats()
+    assert _cohorts(app) == maintained
@@ -0,0 +1,97 @@
+"""
+Write-behind queue for non-critical writes.
+
+Audit rows, view counters and timing spans don't need to be durable before
+the page renders. Callers enqueue (sql, params) and return at once; a
+background thread drains the queue and applies everything that has piled
+up in one transaction per batch, grouping identical statements into
+executemany calls. close() flushes what is left, and is registered with
+atexit by the app.
+
+Kept free of Streamlit, like storage.py.
+"""
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    def __init__(self, connect, linger_seconds=0.5, max_batch=1000, max_pending=100_000):
+        """
+        connect: opens the connection the writer thread uses (called on that thread).
+        linger_seconds: how long to wait after the first queued write so a batch can form.
+        max_pending: beyond this, new writes are dropped rather than blocking the caller.
+        """
+        self._connect = connect
+        self.linger_seconds = linger_seconds
+        self.max_batch = max_batch
+        self._queue = queue.Queue(maxsize=max_pending)
+        self.dropped = 0
+        self.failed = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def put(self, sql, params=()):
+        """Enqueues one statement. Never blocks; returns False if the write was dropped."""
+        if self._closed:
+            self.dropped += 1
+            return False
+        try:
+            self._queue.put_nowait((sql, tuple(params)))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self):
+        """Blocks until every write queued so far has been committed (or has failed)."""
+        self._queue.join()
+
+    def close(self, timeout=10):
+        """Stops accepting writes, commits what is queued and stops the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        conn = self._connect()
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            batch = [first]
+            if first is not _STOP:
+                time.sleep(self.linger_seconds)
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = any(item is _STOP for item in batch)
+            self._write(conn, [item for item in batch if item is not _STOP])
+            for _ in batch:
+                self._queue.task_done()
+        conn.close()
+
+    def _write(self, conn, batch):
+        if not batch:
+            return
+        grouped = {}
+        for sql, params in batch:
+            grouped.setdefault(sql, []).append(params)
+        try:
+            for sql, rows in grouped.items():
+                conn.executemany(sql, rows)
+            conn.commit()
+        except Exception:
+            # Losing a batch of telemetry must not take the writer thread down with it
+            conn.rollback()
+            self.failed += len(batch)
+            logger.exception("write-behind batch of %d writes failed", len(batch))